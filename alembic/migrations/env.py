@@ -7,6 +7,7 @@ from sqlalchemy import pool
 from src.auth.models import *
 from src.notes.models import *
 from src.summary.models import *
+from src.storage.models import *
 from src.config import config as app_config
 from src.database import Base
 
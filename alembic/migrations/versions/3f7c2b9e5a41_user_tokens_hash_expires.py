@@ -0,0 +1,41 @@
+"""user tokens hash index and expires_at
+
+Revision ID: 3f7c2b9e5a41
+Revises: 6e2d8a4f1b90
+Create Date: 2026-10-17 23:40:12.517304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7c2b9e5a41'
+down_revision: Union[str, None] = '6e2d8a4f1b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Срок старых токенов не известен, берется максимальный - время жизни
+    # токена подтверждения fastapi-users
+    op.add_column('user_tokens', sa.Column('expires_at', sa.TIMESTAMP(), nullable=True))
+    op.execute("UPDATE user_tokens SET expires_at = now() at time zone 'utc' + interval '1 hour'")
+    op.alter_column('user_tokens', 'expires_at', nullable=False)
+    op.create_index(op.f('ix_user_tokens_expires_at'), 'user_tokens', ['expires_at'], unique=False)
+    # Оставляется один токен на пользователя
+    op.execute(
+        'DELETE FROM user_tokens a USING user_tokens b '
+        'WHERE a.user_id = b.user_id AND a.id < b.id'
+    )
+    op.create_unique_constraint(op.f('uq_user_tokens_user_id'), 'user_tokens', ['user_id'])
+    op.create_index('ix_user_tokens_token_hash', 'user_tokens', [sa.text("sha256(convert_to(token_verify, 'UTF8'))")], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_tokens_token_hash', table_name='user_tokens')
+    op.drop_constraint(op.f('uq_user_tokens_user_id'), 'user_tokens', type_='unique')
+    op.drop_index(op.f('ix_user_tokens_expires_at'), table_name='user_tokens')
+    op.drop_column('user_tokens', 'expires_at')
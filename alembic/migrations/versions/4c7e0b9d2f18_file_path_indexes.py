@@ -0,0 +1,28 @@
+"""file path indexes
+
+Revision ID: 4c7e0b9d2f18
+Revises: d81b6f3a2c57
+Create Date: 2026-10-17 18:02:41.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e0b9d2f18'
+down_revision: Union[str, None] = 'd81b6f3a2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_summary_summary_path'), 'summary', ['summary_path'], unique=False)
+    op.create_index(op.f('ix_summary_image_path'), 'summary_image', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_summary_image_path'), table_name='summary_image')
+    op.drop_index(op.f('ix_summary_summary_path'), table_name='summary')
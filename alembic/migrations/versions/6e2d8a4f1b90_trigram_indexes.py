@@ -0,0 +1,29 @@
+"""trigram indexes
+
+Revision ID: 6e2d8a4f1b90
+Revises: 9b3e61f0c7a5
+Create Date: 2026-10-17 22:11:48.203671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2d8a4f1b90'
+down_revision: Union[str, None] = '9b3e61f0c7a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_user_username_trgm', 'user', ['username'], unique=False, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+    op.create_index('ix_summary_public_name_trgm', 'summary', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_where=sa.text('is_public'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_summary_public_name_trgm', table_name='summary', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_where=sa.text('is_public'))
+    op.drop_index('ix_user_username_trgm', table_name='user', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
@@ -0,0 +1,39 @@
+"""search vector
+
+Revision ID: 9b3e61f0c7a5
+Revises: 4c7e0b9d2f18
+Create Date: 2026-10-17 20:37:12.516380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e61f0c7a5'
+down_revision: Union[str, None] = '4c7e0b9d2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Текст уже загруженных конспектов заполняет
+    # Summary.backfill_content при запуске приложения
+    op.add_column('summary', sa.Column('content', sa.Text(), nullable=True))
+    op.add_column('summary', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('russian', name), 'A') || setweight(to_tsvector('russian', coalesce(content, '')), 'B')", persisted=True), nullable=False))
+    op.add_column('note', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('russian', title), 'A') || setweight(to_tsvector('russian', intro), 'B') || setweight(to_tsvector('russian', text), 'C')", persisted=True), nullable=False))
+    op.create_index('ix_summary_search_vector', 'summary', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_note_search_vector', 'note', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_summary_content_missing', 'summary', ['id'], unique=False, postgresql_where=sa.text('content IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_summary_content_missing', table_name='summary', postgresql_where=sa.text('content IS NULL'))
+    op.drop_index('ix_note_search_vector', table_name='note', postgresql_using='gin')
+    op.drop_index('ix_summary_search_vector', table_name='summary', postgresql_using='gin')
+    op.drop_column('note', 'search_vector')
+    op.drop_column('summary', 'search_vector')
+    op.drop_column('summary', 'content')
@@ -0,0 +1,54 @@
+"""blob storage
+
+Revision ID: a3f09c6e81d4
+Revises: c7d1e5a2f9b3
+Create Date: 2026-10-17 14:03:27.118044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f09c6e81d4'
+down_revision: Union[str, None] = 'c7d1e5a2f9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blob',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('hash', name=op.f('pk_blob')),
+    sa.UniqueConstraint('path', name=op.f('uq_blob_path'))
+    )
+    op.create_index('ix_blob_unused', 'blob', ['hash'], unique=False, postgresql_where=sa.text('ref_count = 0'))
+    # Старые файлы остаются на своих местах с пустым blob_hash
+    op.add_column('summary', sa.Column('blob_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_summary_blob_hash'), 'summary', ['blob_hash'], unique=False)
+    op.create_foreign_key(op.f('fk_summary_blob_hash_blob'), 'summary', 'blob', ['blob_hash'], ['hash'], ondelete='RESTRICT')
+    op.drop_constraint('uq_summary_summary_path', 'summary', type_='unique')
+    op.add_column('summary_image', sa.Column('blob_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_summary_image_blob_hash'), 'summary_image', ['blob_hash'], unique=False)
+    op.create_foreign_key(op.f('fk_summary_image_blob_hash_blob'), 'summary_image', 'blob', ['blob_hash'], ['hash'], ondelete='RESTRICT')
+    op.drop_constraint('uq_summary_image_path', 'summary_image', type_='unique')
+
+
+def downgrade() -> None:
+    op.create_unique_constraint('uq_summary_image_path', 'summary_image', ['path'])
+    op.drop_constraint(op.f('fk_summary_image_blob_hash_blob'), 'summary_image', type_='foreignkey')
+    op.drop_index(op.f('ix_summary_image_blob_hash'), table_name='summary_image')
+    op.drop_column('summary_image', 'blob_hash')
+    op.create_unique_constraint('uq_summary_summary_path', 'summary', ['summary_path'])
+    op.drop_constraint(op.f('fk_summary_blob_hash_blob'), 'summary', type_='foreignkey')
+    op.drop_index(op.f('ix_summary_blob_hash'), table_name='summary')
+    op.drop_column('summary', 'blob_hash')
+    op.drop_index('ix_blob_unused', table_name='blob', postgresql_where=sa.text('ref_count = 0'))
+    op.drop_table('blob')
@@ -0,0 +1,42 @@
+"""list indexes
+
+Revision ID: c7d1e5a2f9b3
+Revises: bf4ea2491335
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d1e5a2f9b3'
+down_revision: Union[str, None] = 'bf4ea2491335'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_summary_created_at_id', 'summary', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_summary_author_id_created_at_id', 'summary', ['author_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_summary_public_created_at_id', 'summary', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_where=sa.text('is_public'))
+    op.create_index('ix_summary_user_user_id_created_at', 'summary_user', ['user_id', sa.text('created_at DESC'), sa.text('summary_id DESC')], unique=False)
+    op.create_index(op.f('ix_summary_image_summary_id'), 'summary_image', ['summary_id'], unique=False)
+    op.create_index('ix_note_created_at_id', 'note', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_note_author_id_created_at_id', 'note', ['author_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_note_public_created_at_id', 'note', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False, postgresql_where=sa.text('is_public'))
+    op.create_index('ix_note_user_user_id_created_at', 'note_user', ['user_id', sa.text('created_at DESC'), sa.text('note_id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_user_user_id_created_at', table_name='note_user')
+    op.drop_index('ix_note_public_created_at_id', table_name='note', postgresql_where=sa.text('is_public'))
+    op.drop_index('ix_note_author_id_created_at_id', table_name='note')
+    op.drop_index('ix_note_created_at_id', table_name='note')
+    op.drop_index(op.f('ix_summary_image_summary_id'), table_name='summary_image')
+    op.drop_index('ix_summary_user_user_id_created_at', table_name='summary_user')
+    op.drop_index('ix_summary_public_created_at_id', table_name='summary', postgresql_where=sa.text('is_public'))
+    op.drop_index('ix_summary_author_id_created_at_id', table_name='summary')
+    op.drop_index('ix_summary_created_at_id', table_name='summary')
@@ -0,0 +1,47 @@
+"""favorite count
+
+Revision ID: d81b6f3a2c57
+Revises: a3f09c6e81d4
+Create Date: 2026-10-17 16:21:09.374512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81b6f3a2c57'
+down_revision: Union[str, None] = 'a3f09c6e81d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('summary', sa.Column('favorite_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('note', sa.Column('favorite_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_index(op.f('ix_summary_user_summary_id'), 'summary_user', ['summary_id'], unique=False)
+    op.create_index(op.f('ix_note_user_note_id'), 'note_user', ['note_id'], unique=False)
+    # Начальные значения счетчиков из существующего избранного
+    op.execute(
+        'UPDATE summary SET favorite_count = favorites.count '
+        'FROM (SELECT summary_id, count(*) AS count FROM summary_user '
+        'GROUP BY summary_id) AS favorites '
+        'WHERE summary.id = favorites.summary_id'
+    )
+    op.execute(
+        'UPDATE note SET favorite_count = favorites.count '
+        'FROM (SELECT note_id, count(*) AS count FROM note_user '
+        'GROUP BY note_id) AS favorites '
+        'WHERE note.id = favorites.note_id'
+    )
+    op.create_index('ix_summary_public_favorite_count_id', 'summary', [sa.text('favorite_count DESC'), sa.text('id DESC')], unique=False, postgresql_where=sa.text('is_public'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_summary_public_favorite_count_id', table_name='summary', postgresql_where=sa.text('is_public'))
+    op.drop_index(op.f('ix_note_user_note_id'), table_name='note_user')
+    op.drop_index(op.f('ix_summary_user_summary_id'), table_name='summary_user')
+    op.drop_column('note', 'favorite_count')
+    op.drop_column('summary', 'favorite_count')
@@ -3,7 +3,7 @@
 
 
 if [[ "${1}" == "celery" ]]; then
-  celery --app=src.tasks.tasks:celery worker
+  celery --app=src.tasks.tasks:celery worker --beat
 elif [[ "${1}" == "flower" ]]; then
   celery --app=src.tasks.tasks:celery flower
  fi
\ No newline at end of file
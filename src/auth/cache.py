@@ -0,0 +1,131 @@
+"""
+Кэш пользователей для аутентификации запросов.
+
+Каждый защищенный запрос после проверки JWT читает пользователя по id.
+Перед базой стоят два уровня: LRU в памяти процесса на
+config.USER_CACHE_LOCAL_EXPIRE секунд и Redis на config.USER_CACHE_EXPIRE.
+Хранятся только колонки пользователя без хеша пароля.
+
+UserManager сбрасывает запись после изменения, верификации, смены пароля
+и удаления пользователя (роль пользователя меняется тем же обновлением).
+Запись удаляется из Redis и из памяти текущего процесса, в памяти других
+процессов она живет не дольше USER_CACHE_LOCAL_EXPIRE. При недоступности
+Redis пользователь читается из базы.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import time
+from typing import Any
+from uuid import UUID
+
+from fastapi_cache import FastAPICache
+from pydantic import BaseModel
+
+from src.auth.models import User
+from src.cache import get_redis
+from src.config import config
+
+
+logger = logging.getLogger('root')
+
+
+class CachedUser(BaseModel):
+    id: UUID
+    email: str
+    username: str
+    registered_at: datetime | None
+    updated_at: datetime | None
+    role_id: UUID
+    is_active: bool
+    is_superuser: bool
+    is_verified: bool
+
+    class Config:
+        from_attributes = True
+
+
+class LocalCache:
+    """
+    LRU в памяти процесса с временем жизни записей.
+    Только для одного event loop, блокировки не нужны.
+    """
+
+    def __init__(self, size: int, expire: float) -> None:
+        self.size = size
+        self.expire = expire
+        self.items: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Any) -> Any | None:
+        item = self.items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self.items[key]
+            return None
+        self.items.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self.items[key] = (time.monotonic() + self.expire, value)
+        self.items.move_to_end(key)
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        self.items.pop(key, None)
+
+    def clear(self) -> None:
+        self.items.clear()
+
+
+local_cache = LocalCache(
+    config.USER_CACHE_LOCAL_SIZE, config.USER_CACHE_LOCAL_EXPIRE)
+
+
+def make_user_key(user_id: UUID) -> str:
+    return f'{FastAPICache.get_prefix()}:user:{user_id}'
+
+
+async def get_cached_user(user_id: UUID) -> CachedUser | None:
+    """
+    Пользователь из памяти процесса или из Redis, None при промахе.
+    """
+    cached = local_cache.get(user_id)
+    if cached is not None:
+        return cached
+    try:
+        content = await get_redis().get(make_user_key(user_id))
+    except Exception:
+        logger.warning('User cache is unavailable', exc_info=True)
+        return None
+    if content is None:
+        return None
+    cached = CachedUser.model_validate_json(content)
+    local_cache.set(user_id, cached)
+    return cached
+
+
+async def cache_user(user: User) -> None:
+    cached = CachedUser.model_validate(user)
+    local_cache.set(user.id, cached)
+    try:
+        await get_redis().set(
+            make_user_key(user.id), cached.model_dump_json(),
+            ex=config.USER_CACHE_EXPIRE
+        )
+    except Exception:
+        logger.warning('User cache is unavailable', exc_info=True)
+
+
+async def invalidate_user(user_id: UUID) -> None:
+    """
+    Сбрасывает пользователя. Вызывается после коммита изменений.
+    """
+    local_cache.delete(user_id)
+    try:
+        await get_redis().delete(make_user_key(user_id))
+    except Exception:
+        logger.warning(
+            f'User cache invalidation failed, {user_id}', exc_info=True)
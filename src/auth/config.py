@@ -1,12 +1,14 @@
 import uuid
 from fastapi_users import FastAPIUsers
+from fastapi_users.authentication import Authenticator
 from fastapi_users.authentication import (
-    AuthenticationBackend, CookieTransport, JWTStrategy
+    AuthenticationBackend, BearerTransport, CookieTransport, JWTStrategy
 )
 
 from src.config import config
-from src.auth.manager import get_user_manager
+from src.auth.manager import get_cached_user_manager, get_user_manager
 from src.auth.models import User
+from src.auth.tokens import ClaimsAuthenticationBackend, get_claims_strategy
 
 
 cookie_transport = CookieTransport(cookie_name="Bearer",
@@ -26,17 +28,36 @@ auth_backend = AuthenticationBackend(
     get_strategy=get_jwt_strategy,
 )
 
+# Токены доступа с правами пользователя в заголовке Authorization,
+# пользователь запроса собирается из токена без базы, см. src/auth/tokens.py
+claims_backend = ClaimsAuthenticationBackend(
+    name="jwt-claims",
+    transport=BearerTransport(tokenUrl="auth/token/login"),
+    get_strategy=get_claims_strategy,
+)
+
 fastapi_users = FastAPIUsers[User, uuid.UUID](
     get_user_manager,
     [auth_backend],
 )
 
-current_user: User = fastapi_users.current_user()
-current_active_user = fastapi_users.current_user(active=True)
-current_active_verified_user = fastapi_users.current_user(
+# Пользователь запроса читается через кэш, см. src/auth/cache.py,
+# или из токена доступа. Маршруты fastapi_users (вход, регистрация, /users)
+# работают без кэша и только с cookie
+authenticator = Authenticator(
+    [auth_backend, claims_backend], get_cached_user_manager)
+claims_authenticator = Authenticator([claims_backend], get_user_manager)
+
+current_user: User = authenticator.current_user()
+current_active_user = authenticator.current_user(active=True)
+current_active_verified_user = authenticator.current_user(
     active=True, verified=True
 )
-current_superuser = fastapi_users.current_user(
+# Для открытых маршрутов: None, если пользователь не вошел
+current_optional_verified_user = authenticator.current_user(
+    active=True, verified=True, optional=True
+)
+current_superuser = authenticator.current_user(
     active=True, superuser=True
 )
 # Использование:
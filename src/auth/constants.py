@@ -8,6 +8,10 @@ class Permission(str, Enum):
     superuser = "superuser"
 
 
+ACCESS_TOKEN_AUDIENCE = "fastapi-users:access"
+REFRESH_TOKEN_AUDIENCE = "fastapi-users:refresh"
+
+
 class RoleNotFoundError(Exception):
     status_code = 404
     description = "Role is not found"
@@ -16,3 +20,18 @@ class RoleNotFoundError(Exception):
 class TokenNotFoundError(Exception):
     status_code = 404
     description = "Token is not found"
+
+
+class InvalidRefreshTokenError(Exception):
+    status_code = 401
+    description = "Refresh token is invalid or revoked"
+
+
+class PasswordHashQueueFullError(Exception):
+    status_code = 503
+    description = "Too many password checks, try again later"
+
+
+class TooManyRequestsError(Exception):
+    status_code = 429
+    description = "Too many requests, try again later"
@@ -1,19 +1,30 @@
 from datetime import datetime
+import hashlib
 import logging
 from pydantic import UUID4
-from sqlalchemy import UUID, select
+from sqlalchemy import UUID, delete, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.models import (
-    Role as RoleModel, RoleCRUD, User as UserModel, UserCRUD, UserTokenVerify as UserTokenVerifyModel, UserTokenVerifyCRUD
+    Role as RoleModel, RoleCRUD, User as UserModel, UserCRUD, UserTokenVerify as UserTokenVerifyModel, UserTokenVerifyCRUD,
+    token_hash
 )
 from src.auth.schemas import RoleResponse
-from src.exceptions import ObjectNotFoundError
-from src.models import get_list, get_by_name
+from src.models import exactly_one, get_list, get_by_name
 
 
 logger = logging.getLogger('root')
 
+PURGE_BATCH_SIZE = 500
+
+
+def hash_token(token_verify: str) -> bytes:
+    """
+    Значение token_hash для поиска по индексу ix_user_tokens_token_hash.
+    """
+    return hashlib.sha256(token_verify.encode()).digest()
+
 
 class Role:
     crud = RoleCRUD
@@ -63,26 +74,67 @@ class UserTokenVerify:
     async def get(
         cls, session: AsyncSession, token_verify: str
     ) -> UserTokenVerifyModel:
-        return await cls.crud.get(session, "token_verify", token_verify)
+        """
+        Действующий токен подтверждения.
+
+        Исключения:
+        ObjectNotFoundError - если токена нет или его срок истек
+        """
+        query = select(UserTokenVerifyModel).where(
+            token_hash(UserTokenVerifyModel.token_verify)
+            == hash_token(token_verify),
+            UserTokenVerifyModel.expires_at > datetime.utcnow()
+        )
+        return await exactly_one(session, query)
 
     @classmethod
     async def delete(cls, session: AsyncSession, token_verify: str) -> None:
-        await cls.crud.delete(session, "token_verify", token_verify)
+        query = delete(UserTokenVerifyModel).where(
+            token_hash(UserTokenVerifyModel.token_verify)
+            == hash_token(token_verify)
+        )
+        await session.execute(query)
+        await session.flush()
 
     @classmethod
     async def get_or_create(
-        cls, session: AsyncSession, user_id: UUID4, token_verify: str
+        cls, session: AsyncSession, user_id: UUID4, token_verify: str,
+        expires_at: datetime
     ) -> UserTokenVerifyModel:
-        try:
-            instance = await cls.crud.get(session, "user_id", user_id)
-            instance.token_verify = token_verify
-            updated_fields = dict(token_verify=token_verify)
-            return await cls.crud.update(
-                session, "user_id", user_id, **updated_fields
-            )
-        except ObjectNotFoundError:
-            created_fields = dict(user_id=user_id, token_verify=token_verify)  # Можно добавить еще полей
-            return await cls.crud.create(session, **created_fields)
+        """
+        Сохраняет токен пользователя одним INSERT ... ON CONFLICT (user_id):
+        новый токен заменяет прежний.
+        """
+        query = insert(UserTokenVerifyModel).values(
+            user_id=user_id, token_verify=token_verify, expires_at=expires_at
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[UserTokenVerifyModel.user_id],
+            set_=dict(token_verify=query.excluded.token_verify,
+                      expires_at=query.excluded.expires_at)
+        ).returning(UserTokenVerifyModel)
+        return (await session.scalars(
+            query, execution_options={"populate_existing": True})).one()
+
+    @classmethod
+    async def purge_expired(
+        cls, session: AsyncSession, batch_size: int = PURGE_BATCH_SIZE
+    ) -> int:
+        """
+        Удаляет до batch_size токенов с истекшим сроком.
+
+        :return: количество удаленных токенов
+        """
+        expired = (select(UserTokenVerifyModel.id)
+                   .where(UserTokenVerifyModel.expires_at <= datetime.utcnow())
+                   .limit(batch_size)
+                   .with_for_update(skip_locked=True))
+        result = await session.execute(
+            delete(UserTokenVerifyModel)
+            .where(UserTokenVerifyModel.id.in_(expired.scalar_subquery())),
+            execution_options={"synchronize_session": False}
+        )
+        return result.rowcount
 
 
 class User:
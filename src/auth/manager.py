@@ -1,16 +1,22 @@
+from datetime import datetime, timedelta
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 import uuid
 
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (
     BaseUserManager, UUIDIDMixin, exceptions, models, schemas
 )
 from src.auth.logic import UserTokenVerify
 from src.models import get_by_name
 
+from src.auth.cache import invalidate_user
 from src.auth.models import Role, User
-from src.auth.utils import get_user_db
+from src.auth.password import password_helper, password_hasher
+from src.auth.tokens import revoke_user_tokens
+from src.auth.utils import get_cached_user_db, get_user_db
+from src.cache import SUMMARY_LIST_TAG, invalidate, user_tag
 from src.config import config
 from src.tasks.tasks import send_email_register, send_email_verify
 
@@ -24,6 +30,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     Реализует взаимодействие с пользователями.
 
     Переопределили метод create, чтобы присвоить роль по умолчанию.
+    Пароли хешируются и проверяются в пуле процессов, см. src/auth/password.py.
     """
     reset_password_token_secret = config.SECRET_AUTH_KEY
     verification_token_secret = config.SECRET_AUTH_KEY
@@ -61,7 +68,10 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         send_email_verify.delay(username=user.username,
                                 user_email=user.email,
                                 token=token)
-        await UserTokenVerify.get_or_create(self.user_db.session, user.id, token)
+        expires_at = datetime.utcnow() + timedelta(
+            seconds=self.verification_token_lifetime_seconds)
+        await UserTokenVerify.get_or_create(
+            self.user_db.session, user.id, token, expires_at)
         await self.user_db.session.commit()
         logger.info(f"Verification requested for user {user.id}. "
                     f"Verification token: {token}")
@@ -72,8 +82,33 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         """
         Действия после верификации пользователя.
         """
+        await invalidate_user(user.id)
+        await revoke_user_tokens(user.id)
         logger.info(f"User {user.username} has been verified.")
 
+    async def on_after_update(
+        self, user: User, update_dict: dict, request: Optional[Request] = None
+    ):
+        """
+        Действия после обновления пользователя.
+        Сбрасывается кэш пользователя и токены доступа с его правами
+        (в том числе при смене роли и блокировке) и кэш ответов,
+        в которые входит username.
+        """
+        await invalidate_user(user.id)
+        await revoke_user_tokens(user.id)
+        if "username" in update_dict:
+            await invalidate(user_tag(user.id), SUMMARY_LIST_TAG)
+
+    async def on_after_delete(
+        self, user: User, request: Optional[Request] = None
+    ):
+        """
+        Действия после удаления пользователя.
+        """
+        await invalidate_user(user.id)
+        await revoke_user_tokens(user.id)
+
     async def create(
         self,
         user_create: schemas.UC,
@@ -96,7 +131,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
             else user_create.create_update_dict_superuser()
         )
         password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+        user_dict["hashed_password"] = await password_hasher.hash(password)
         role_default = await get_by_name(
             self.user_db.session, Role, config.ROLE_DEFAULT
         )
@@ -108,6 +143,53 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
 
         return created_user
 
+    async def authenticate(
+        self, credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        """
+        Вход по email и паролю.
+        Устаревший хеш пароля пересчитывается с текущей стоимостью.
+        """
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Хеш считается и для несуществующего пользователя, чтобы
+            # по времени ответа нельзя было проверить email
+            await password_hasher.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = \
+            await password_hasher.verify_and_update(
+                credentials.password, user.hashed_password)
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(
+                user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        """
+        Новый пароль хешируется в пуле процессов,
+        остальные поля обновляются как в fastapi-users.
+        """
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {
+                **{k: v for k, v in update_dict.items() if k != "password"},
+                "hashed_password": await password_hasher.hash(password),
+            }
+        return await super()._update(user, update_dict)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_helper)
+
+
+async def get_cached_user_manager(user_db=Depends(get_cached_user_db)):
+    """
+    Менеджер для зависимостей current_*: пользователь запроса читается
+    из кэша. Маршруты fastapi-users работают через get_user_manager.
+    """
+    yield UserManager(user_db, password_helper)
@@ -3,7 +3,7 @@ import uuid
 
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTableUUID
 from sqlalchemy import (TIMESTAMP, UUID, Boolean, ForeignKey,
-                        String)
+                        Index, String, func, literal_column)
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -88,6 +88,11 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
         )
 
 
+# Подсказки по части имени пользователя, см. src/search/logic.py
+Index("ix_user_username_trgm", User.username, postgresql_using="gin",
+      postgresql_ops={"username": "gin_trgm_ops"})
+
+
 class UserCRUD(CRUDBase):
     table = User
 
@@ -96,9 +101,12 @@ class UserTokenVerify(Base):
     __tablename__ = "user_tokens"
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=new_uuid)
+    # Один действующий токен на пользователя, новый заменяет старый
     user_id: Mapped[UUID] = mapped_column(ForeignKey("user.id",
-                                                     ondelete="CASCADE"))
+                                                     ondelete="CASCADE"),
+                                          unique=True)
     token_verify: Mapped[str]
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, index=True)
 
     def __str__(self):
         return (
@@ -114,5 +122,17 @@ class UserTokenVerify(Base):
         )
 
 
+def token_hash(token):
+    """
+    sha256 токена в SQL. Токены - длинные JWT, поэтому индексируется
+    их хеш, а не сами строки.
+    """
+    return func.sha256(func.convert_to(token, literal_column("'UTF8'")))
+
+
+Index("ix_user_tokens_token_hash", token_hash(UserTokenVerify.token_verify),
+      unique=True)
+
+
 class UserTokenVerifyCRUD(CRUDBase):
     table = UserTokenVerify
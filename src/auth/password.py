@@ -0,0 +1,126 @@
+"""
+Хеширование паролей в пуле процессов.
+
+bcrypt занимает процессор на десятки и сотни миллисекунд, и в event loop
+всплеск входов останавливал бы все остальные запросы процесса. Хеши
+считаются в пуле из config.PASSWORD_HASH_WORKERS процессов (по умолчанию
+по числу ядер). Одновременно ждать и выполняться может не больше
+config.PASSWORD_HASH_QUEUE_SIZE хешей, следующие отклоняются с
+PasswordHashQueueFullError (503), а не копятся в очереди.
+
+Стоимость задается config.PASSWORD_BCRYPT_ROUNDS. Хеши с меньшей
+стоимостью считаются устаревшими и пересчитываются при входе.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Callable
+
+from fastapi_users.password import PasswordHelper
+from passlib.context import CryptContext
+
+from src.auth.constants import PasswordHashQueueFullError
+from src.config import config
+
+
+logger = logging.getLogger('root')
+
+context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__default_rounds=config.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.PASSWORD_BCRYPT_ROUNDS,
+)
+# Для синхронных проверок fastapi-users (токены сброса пароля)
+password_helper = PasswordHelper(context)
+
+
+def hash_password(password: str) -> str:
+    return context.hash(password)
+
+
+def verify_and_update(
+        password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    :return: (пароль верный, новый хеш, если старый устарел, иначе None)
+    """
+    return context.verify_and_update(password, hashed_password)
+
+
+@dataclass
+class PasswordHasherStats:
+    workers: int
+    queue_size: int
+    in_flight: int = 0
+    max_in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    # Суммарное время от постановки в очередь до результата
+    total_seconds: float = 0.0
+
+
+class PasswordHasher:
+    """
+    Пул процессов для хеширования паролей.
+    Процессы запускаются при первом хеше. Только для одного event loop,
+    счетчики не защищены блокировкой.
+    """
+
+    def __init__(self, workers: int | None, queue_size: int) -> None:
+        self.stats = PasswordHasherStats(
+            workers=workers or os.cpu_count() or 1, queue_size=queue_size)
+        self.executor: ProcessPoolExecutor | None = None
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Исключения:
+        PasswordHashQueueFullError - если очередь заполнена
+        """
+        stats = self.stats
+        if stats.in_flight >= stats.queue_size:
+            stats.rejected += 1
+            logger.warning(
+                f'Password hash queue is full, {stats.in_flight} in flight')
+            raise PasswordHashQueueFullError
+        if self.executor is None:
+            # spawn: fork процесса с потоками и открытыми соединениями
+            # небезопасен
+            self.executor = ProcessPoolExecutor(
+                stats.workers, mp_context=multiprocessing.get_context('spawn'))
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args)
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_seconds += time.perf_counter() - start
+        stats.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_and_update(
+            self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self.run(verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+password_hasher = PasswordHasher(
+    config.PASSWORD_HASH_WORKERS, config.PASSWORD_HASH_QUEUE_SIZE)
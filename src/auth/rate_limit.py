@@ -0,0 +1,131 @@
+"""
+Ограничение частоты запросов к маршрутам входа и регистрации.
+
+Каждый запрос тратит по токену из корзин своего IP и аккаунта (email
+из формы входа или тела запроса). Корзина вмещает capacity токенов
+и полностью восстанавливается за period секунд, лимиты задаются
+в config.RATE_LIMITS по маршруту и типу ключа. Все корзины запроса
+проверяются и списываются одним Lua-скриптом в Redis, атомарно: запрос
+пропускается, только если токен есть в каждой.
+
+При недоступности Redis запросы пропускаются без ограничения.
+"""
+import logging
+import math
+import time
+
+from fastapi import HTTPException, Request
+from fastapi_cache import FastAPICache
+
+from src.auth.constants import TooManyRequestsError
+from src.cache import get_redis
+from src.config import config
+
+
+logger = logging.getLogger('root')
+
+# KEYS - корзины, ARGV - текущее время и пары (capacity, period) корзин.
+# Возвращает 0 или через сколько секунд появится токен во всех корзинах
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = capacity / tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local left = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    left = math.min(capacity, left + elapsed * rate)
+    if left < 1 then
+        retry_after = math.max(retry_after, (1 - left) / rate)
+    end
+    tokens[i] = left
+end
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('EXPIRE', key, ARGV[i * 2 + 1])
+end
+return '0'
+"""
+
+
+def make_bucket_key(route: str, key_type: str, value: str) -> str:
+    return f'{FastAPICache.get_prefix()}:rate-limit:{route}:{key_type}:{value}'
+
+
+async def get_account(request: Request) -> str | None:
+    """
+    email из формы входа (поле username) или из JSON тела запроса.
+    """
+    content_type = request.headers.get('content-type', '')
+    try:
+        if content_type.startswith('application/json'):
+            data = await request.json()
+            value = data.get('email') if isinstance(data, dict) else None
+        elif content_type.startswith(
+                ('application/x-www-form-urlencoded', 'multipart/form-data')):
+            value = (await request.form()).get('username')
+        else:
+            return None
+    except Exception:
+        # Некорректное тело отклонит валидация маршрута
+        return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower()
+
+
+async def take(buckets: dict[str, tuple[int, int]]) -> float:
+    """
+    Списывает по токену из корзин.
+
+    :param buckets: ключ корзины -> (capacity, period)
+    :return: 0 или через сколько секунд повторить запрос
+    """
+    args = [time.time()]
+    for capacity, period in buckets.values():
+        args += [capacity, period]
+    retry_after = await get_redis().eval(
+        TOKEN_BUCKET_SCRIPT, len(buckets), *buckets, *args)
+    return float(retry_after)
+
+
+async def rate_limit(request: Request) -> None:
+    """
+    Зависимость маршрутов из config.RATE_LIMITS.
+    Лимиты выбираются по последнему сегменту пути маршрута.
+
+    Исключения:
+    HTTPException 429 с заголовком Retry-After - если лимит исчерпан
+    """
+    route = request.scope['route'].path.rstrip('/').rsplit('/', 1)[-1]
+    limits = config.RATE_LIMITS.get(route)
+    if not limits:
+        return
+    values = {}
+    if 'ip' in limits and request.client is not None:
+        values['ip'] = request.client.host
+    if 'account' in limits:
+        values['account'] = await get_account(request)
+    buckets = {
+        make_bucket_key(route, key_type, value): limits[key_type]
+        for key_type, value in values.items() if value
+    }
+    if not buckets:
+        return
+    try:
+        retry_after = await take(buckets)
+    except Exception:
+        logger.warning(f'Rate limit is unavailable, {route}', exc_info=True)
+        return
+    if retry_after:
+        logger.warning(f'Rate limit exceeded, {route}, {values.get("ip")}')
+        raise HTTPException(
+            status_code=TooManyRequestsError.status_code,
+            detail=TooManyRequestsError.description,
+            headers={'Retry-After': str(math.ceil(retry_after))}
+        )
@@ -3,18 +3,28 @@ from typing import Mapping
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi_users import exceptions
+from fastapi_users.router import get_auth_router
 from fastapi_users.router.common import ErrorCode
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.manager import UserManager, get_user_manager
 from src.auth.config import (
     current_user, current_active_user, current_active_verified_user,
-    current_superuser, auth_backend, fastapi_users
+    current_superuser, auth_backend, claims_authenticator, claims_backend,
+    fastapi_users
 )
+from src.auth.constants import InvalidRefreshTokenError
 from src.auth.logic import Role, UserTokenVerify
 from src.auth.dependencies import valid_role_id, valid_token
-from src.auth.schemas import RoleResponse, UserCreate, UserRead, UserUpdate
+from src.auth.schemas import (
+    RefreshTokenRequest, RoleResponse, TokenPair, UserCreate, UserRead,
+    UserUpdate
+)
+from src.auth.password import PasswordHasherStats, password_hasher
+from src.auth.rate_limit import rate_limit
+from src.auth.tokens import ClaimsJWTStrategy, get_claims_strategy
 from src.auth.models import User
+from src.cache import ROLES_TAG, cached_response, invalidate
 from src.database import get_async_session
 
 
@@ -24,17 +34,27 @@ router_auth = APIRouter(prefix="/auth", tags=["auth"])
 router_users = APIRouter(prefix="/users", tags=["users"])
 router_roles = APIRouter(prefix="/roles", tags=["roles"])
 
+# Лимиты частоты запросов по маршрутам - в config.RATE_LIMITS
+router_auth.include_router(
+    fastapi_users.get_auth_router(auth_backend),
+    dependencies=[Depends(rate_limit)]
+)
 router_auth.include_router(
-    fastapi_users.get_auth_router(auth_backend)
+    get_auth_router(claims_backend, get_user_manager, claims_authenticator),
+    prefix="/token",
+    dependencies=[Depends(rate_limit)]
 )
 router_auth.include_router(
-    fastapi_users.get_register_router(UserRead, UserCreate)
+    fastapi_users.get_register_router(UserRead, UserCreate),
+    dependencies=[Depends(rate_limit)]
 )
 router_auth.include_router(
-    fastapi_users.get_verify_router(UserRead)
+    fastapi_users.get_verify_router(UserRead),
+    dependencies=[Depends(rate_limit)]
 )
 router_auth.include_router(
-    fastapi_users.get_reset_password_router()
+    fastapi_users.get_reset_password_router(),
+    dependencies=[Depends(rate_limit)]
 )
 router_users.include_router(
     fastapi_users.get_users_router(
@@ -48,7 +68,12 @@ async def get_roles(
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_verified_user),
 ) -> list[RoleResponse]:
-    return await Role.get_list(session)
+    return await cached_response(
+        "roles", {},
+        [ROLES_TAG],
+        lambda: Role.get_list(session),
+        list[RoleResponse]
+    )
 
 
 @router_roles.delete(
@@ -62,7 +87,8 @@ async def delete_role(
 ) -> None:
     await Role.delete(session, role.id)
     await session.commit()
-    logger.warning(f"Role {role.name} deleted by {user.username}")
+    await invalidate(ROLES_TAG)
+    logger.warning(f"Role {role.name} deleted by {user.id}")
 
 
 @router_roles.get(
@@ -76,9 +102,45 @@ async def get_role(
     return role
 
 
+@router_auth.post(
+    "/token/refresh",
+    response_model=TokenPair,
+)
+async def refresh_token(
+    data: RefreshTokenRequest,
+    user_manager: UserManager = Depends(get_user_manager),
+    strategy: ClaimsJWTStrategy = Depends(get_claims_strategy),
+) -> TokenPair:
+    """
+    Новая пара токенов по токену обновления.
+    Токен обновления одноразовый.
+    """
+    try:
+        return await strategy.refresh(data.refresh_token, user_manager)
+    except InvalidRefreshTokenError:
+        raise HTTPException(
+            status_code=InvalidRefreshTokenError.status_code,
+            detail=InvalidRefreshTokenError.description
+        )
+
+
+@router_auth.get(
+    "/password-hasher",
+    response_model=PasswordHasherStats,
+)
+async def get_password_hasher_stats(
+    user: User = Depends(current_superuser),
+) -> PasswordHasherStats:
+    """
+    Счетчики пула хеширования паролей текущего процесса.
+    """
+    return password_hasher.stats
+
+
 @router_auth.get(
     "/accept",
     response_model=UserRead,
+    dependencies=[Depends(rate_limit)],
 )
 async def accept(
     request: Request,
@@ -87,6 +87,34 @@ class ShortUser(BaseModel):
     class Config:
         from_attributes = True
 
+
+class AccessTokenClaims(BaseModel):
+    """
+    Данные токена доступа, по которым пользователь авторизуется
+    без обращения к базе.
+    """
+    sub: UUID4
+    jti: str
+    rid: str
+    iat: float
+    exp: float
+    role_id: UUID4
+    permission: Permission
+    is_active: bool
+    is_verified: bool
+    is_superuser: bool
+
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
 class UserTokenVerifyRequest(BaseModel):
 
     class Config:
@@ -0,0 +1,228 @@
+"""
+Токены доступа с правами пользователя.
+
+Обычный JWT содержит только id, и каждый запрос читает пользователя
+из базы. Токен доступа этого модуля подписывает role_id, permission
+и флаги пользователя, поэтому пользователь запроса собирается из токена
+без базы. Токен живет config.ACCESS_TOKEN_LIFETIME, затем клиент получает
+новую пару по токену обновления (config.REFRESH_TOKEN_LIFETIME).
+
+Отозванные токены хранятся в Redis по jti до истечения их срока:
+- выход отзывает токен доступа и его токен обновления;
+- токен обновления одноразовый, при обновлении он отзывается;
+- после изменения пользователя (роль, блокировка, верификация) все его
+  выданные ранее токены доступа отклоняются, и права берутся из базы
+  при обновлении.
+
+Если Redis недоступен, токены доступа проверяются только по подписи
+и сроку, а обновление пары не работает.
+"""
+import logging
+import time
+from typing import Optional
+import uuid
+
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_users import BaseUserManager, exceptions
+from fastapi_users.authentication import AuthenticationBackend, JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+import jwt
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.auth.constants import (
+    ACCESS_TOKEN_AUDIENCE, REFRESH_TOKEN_AUDIENCE, InvalidRefreshTokenError
+)
+from src.auth.models import Role, User
+from src.auth.schemas import AccessTokenClaims, TokenPair
+from src.cache import get_redis
+from src.config import config
+from src.database import get_async_session
+
+
+logger = logging.getLogger('root')
+
+
+def make_revoked_key(jti: str) -> str:
+    return f'{FastAPICache.get_prefix()}:token:revoked:{jti}'
+
+
+def make_not_before_key(user_id: uuid.UUID) -> str:
+    return f'{FastAPICache.get_prefix()}:token:not-before:{user_id}'
+
+
+async def revoke(jti: str, expire: int) -> bool:
+    """
+    Отзывает токен на expire секунд.
+
+    :return: False, если токен уже был отозван
+    """
+    return bool(await get_redis().set(
+        make_revoked_key(jti), 1, ex=max(expire, 1), nx=True))
+
+
+async def revoke_user_tokens(user_id: uuid.UUID) -> None:
+    """
+    Отклоняет токены доступа пользователя, выданные до этого момента.
+    Вызывается после коммита изменений пользователя.
+    """
+    try:
+        await get_redis().set(
+            make_not_before_key(user_id), time.time(),
+            ex=config.ACCESS_TOKEN_LIFETIME
+        )
+    except Exception:
+        logger.warning(
+            f'User tokens revocation failed, {user_id}', exc_info=True)
+
+
+async def is_revoked(claims: AccessTokenClaims) -> bool:
+    try:
+        revoked, not_before = await get_redis().mget(
+            make_revoked_key(claims.jti), make_not_before_key(claims.sub))
+    except Exception:
+        logger.warning('Token revocation list is unavailable', exc_info=True)
+        return False
+    return revoked is not None or (
+        not_before is not None and claims.iat < float(not_before))
+
+
+def user_from_claims(claims: AccessTokenClaims) -> User:
+    """
+    Пользователь из токена доступа, не привязанный к сессии.
+    Заполнены только id, role_id, флаги и role.permission.
+    """
+    user = User(
+        id=claims.sub,
+        role_id=claims.role_id,
+        is_active=claims.is_active,
+        is_verified=claims.is_verified,
+        is_superuser=claims.is_superuser,
+    )
+    role = Role(id=claims.role_id, permission=claims.permission)
+    make_transient_to_detached(role)
+    set_committed_value(user, 'role', role)
+    make_transient_to_detached(user)
+    return user
+
+
+class ClaimsJWTStrategy(JWTStrategy):
+    """
+    Стратегия с токенами доступа и обновления.
+    Сессия нужна только для выдачи токенов: права роли пишутся в токен.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(
+            secret=config.SECRET_AUTH_KEY,
+            lifetime_seconds=config.ACCESS_TOKEN_LIFETIME,
+            token_audience=[ACCESS_TOKEN_AUDIENCE],
+        )
+        self.session = session
+
+    async def read_token(
+            self, token: Optional[str], user_manager: BaseUserManager
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            claims = AccessTokenClaims.model_validate(decode_jwt(
+                token, self.decode_key, self.token_audience,
+                algorithms=[self.algorithm]
+            ))
+        except (jwt.PyJWTError, ValidationError):
+            return None
+        if await is_revoked(claims):
+            return None
+        return user_from_claims(claims)
+
+    async def write_token(
+            self, user: User, refresh_id: str | None = None
+    ) -> str:
+        permission = await self.session.scalar(
+            select(Role.permission).where(Role.id == user.role_id))
+        data = dict(
+            sub=str(user.id),
+            aud=self.token_audience,
+            jti=uuid.uuid4().hex,
+            rid=refresh_id or uuid.uuid4().hex,
+            iat=time.time(),
+            role_id=str(user.role_id),
+            permission=permission.value,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            is_superuser=user.is_superuser,
+        )
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds,
+            algorithm=self.algorithm
+        )
+
+    async def write_tokens(self, user: User) -> TokenPair:
+        refresh_id = uuid.uuid4().hex
+        refresh_token = generate_jwt(
+            dict(sub=str(user.id), aud=[REFRESH_TOKEN_AUDIENCE],
+                 jti=refresh_id),
+            self.encode_key, config.REFRESH_TOKEN_LIFETIME,
+            algorithm=self.algorithm
+        )
+        return TokenPair(
+            access_token=await self.write_token(user, refresh_id),
+            refresh_token=refresh_token,
+        )
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        """
+        Выход: отзывает токен доступа и выданный вместе с ним
+        токен обновления.
+        """
+        data = decode_jwt(token, self.decode_key, self.token_audience,
+                          algorithms=[self.algorithm])
+        await revoke(data['jti'], int(data['exp'] - time.time()) + 1)
+        await revoke(data['rid'], config.REFRESH_TOKEN_LIFETIME)
+
+    async def refresh(
+            self, token: str, user_manager: BaseUserManager
+    ) -> TokenPair:
+        """
+        Новая пара токенов с текущими правами пользователя из базы.
+
+        Исключения:
+        InvalidRefreshTokenError - если токен недействителен, уже
+            использован или отозван, либо пользователь заблокирован
+        """
+        try:
+            data = decode_jwt(token, self.decode_key, [REFRESH_TOKEN_AUDIENCE],
+                              algorithms=[self.algorithm])
+            user = await user_manager.get(user_manager.parse_id(data['sub']))
+        except (jwt.PyJWTError, KeyError,
+                exceptions.InvalidID, exceptions.UserNotExists):
+            raise InvalidRefreshTokenError
+        if not await revoke(data['jti'], int(data['exp'] - time.time()) + 1):
+            raise InvalidRefreshTokenError
+        if not user.is_active:
+            raise InvalidRefreshTokenError
+        return await self.write_tokens(user)
+
+
+class ClaimsAuthenticationBackend(AuthenticationBackend):
+    """
+    Вход отвечает парой токенов доступа и обновления.
+    """
+
+    async def login(
+            self, strategy: ClaimsJWTStrategy, user: User
+    ) -> JSONResponse:
+        tokens = await strategy.write_tokens(user)
+        return JSONResponse(tokens.model_dump())
+
+
+def get_claims_strategy(
+        session: AsyncSession = Depends(get_async_session)
+) -> ClaimsJWTStrategy:
+    return ClaimsJWTStrategy(session)
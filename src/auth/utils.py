@@ -1,10 +1,40 @@
+from typing import Optional
+import uuid
+
 from fastapi import Depends
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from src.auth.cache import cache_user, get_cached_user
 from src.auth.models import User
 from src.database import get_async_session
 
 
+class CachedUserDatabase(SQLAlchemyUserDatabase):
+    """
+    База пользователей с кэшем чтения по id, см. src/auth/cache.py.
+    Только для аутентификации запросов: у пользователя из кэша
+    нет хеша пароля, а сам он не привязан к сессии.
+    """
+
+    async def get(self, id: uuid.UUID) -> Optional[User]:
+        cached = await get_cached_user(id)
+        if cached is not None:
+            user = User(**cached.model_dump())
+            make_transient_to_detached(user)
+            return user
+        user = await super().get(id)
+        if user is not None:
+            await cache_user(user)
+        return user
+
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User)
+
+
+async def get_cached_user_db(
+        session: AsyncSession = Depends(get_async_session)
+):
+    yield CachedUserDatabase(session, User)
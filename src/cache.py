@@ -0,0 +1,207 @@
+"""
+Кэширование ответов в Redis с инвалидацией по тегам.
+
+Ответ хранится уже сериализованным в JSON, при попадании в кэш он
+отдается без обращения к базе и без валидации pydantic. Каждый ключ
+записывается в множества своих тегов, invalidate удаляет все ключи тега.
+Redis используется тот же, что инициализирован для FastAPICache.
+При недоступности Redis ответ просто собирается заново.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from pydantic import TypeAdapter
+
+from src.config import config
+
+
+logger = logging.getLogger('root')
+
+# Тот же заголовок, что ставит декоратор fastapi_cache
+CACHE_STATUS_HEADER = 'X-FastAPI-Cache'
+ROLES_TAG = 'roles'
+SUMMARY_LIST_TAG = 'summary:list'
+
+# Удаляет ключи из множеств тегов и сами множества
+INVALIDATE_SCRIPT = """
+for _, tag in ipairs(KEYS) do
+    local keys = redis.call('SMEMBERS', tag)
+    for i = 1, #keys, 500 do
+        redis.call('DEL', unpack(keys, i, math.min(i + 499, #keys)))
+    end
+    redis.call('DEL', tag)
+end
+return 0
+"""
+
+
+def summary_tag(summary_id: UUID) -> str:
+    return f'summary:{summary_id}'
+
+
+def user_tag(user_id: UUID) -> str:
+    """
+    Тег ответов, в которые входят данные пользователя (например, username).
+    """
+    return f'user:{user_id}'
+
+
+def favorites_tag(user_id: UUID) -> str:
+    """
+    Тег ответов с отметкой is_favorited для пользователя.
+    """
+    return f'favorites:{user_id}'
+
+
+def get_redis():
+    return FastAPICache.get_backend().redis
+
+
+def make_key(namespace: str, **params: Any) -> str:
+    """
+    Ключ ответа по пространству имен и параметрам запроса.
+    """
+    params_hash = hashlib.md5(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'{FastAPICache.get_prefix()}:{namespace}:{params_hash}'
+
+
+def make_tag_key(tag: str) -> str:
+    return f'{FastAPICache.get_prefix()}:tag:{tag}'
+
+
+@lru_cache
+def get_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def json_response(content: str | bytes, cache_status: str) -> Response:
+    return Response(
+        content,
+        media_type='application/json',
+        headers={CACHE_STATUS_HEADER: cache_status},
+    )
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    ETag версии ресурса по значениям, от которых зависит ответ.
+    """
+    return '"{}"'.format(hashlib.md5(
+        ':'.join(map(str, parts)).encode()).hexdigest())
+
+
+def http_date(value: datetime) -> str:
+    """
+    Дата для Last-Modified. Время в базе хранится в UTC без пояса.
+    """
+    return format_datetime(
+        value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(
+        request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """
+    Можно ли ответить 304 на условный запрос.
+
+    If-None-Match сравнивается с ETag, слабые ETag (W/) как сильные.
+    If-Modified-Since учитывается, только если If-None-Match нет.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        tags = {tag.strip().removeprefix('W/')
+                for tag in if_none_match.split(',')}
+        return '*' in tags or etag in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(
+        tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """
+    Ответ 304 с теми же валидаторами и Cache-Control, что и полный ответ.
+    """
+    return Response(status_code=304, headers=headers)
+
+
+async def cached_response(
+        namespace: str,
+        params: dict[str, Any],
+        tags: list[str] | Callable[[Any], list[str]],
+        load: Callable[[], Awaitable[Any]],
+        response_model: Any,
+        expire: Optional[int] = None,
+) -> Response:
+    """
+    Отдает ответ из кэша или собирает его через load и кэширует.
+
+    :param namespace: пространство имен ключа
+    :param params: параметры, от которых зависит ответ
+    :param tags: теги, по которым ответ будет сброшен, или функция,
+        получающая их из данных ответа
+    :param load: корутина, возвращающая данные ответа
+    :param response_model: схема ответа, как в аннотации эндпоинта
+    :param expire: время жизни, по умолчанию config.CACHE_EXPIRE
+    """
+    expire = expire or config.CACHE_EXPIRE
+    redis, cached = None, None
+    if FastAPICache.get_enable():
+        try:
+            key = make_key(namespace, **params)
+            redis = get_redis()
+            cached = await redis.get(key)
+        except Exception:
+            logger.warning(f'Cache is unavailable, {namespace}', exc_info=True)
+            redis = None
+    if cached is not None:
+        return json_response(cached, 'HIT')
+
+    adapter = get_adapter(response_model)
+    data = adapter.validate_python(await load(), from_attributes=True)
+    content = adapter.dump_json(data)
+    if callable(tags):
+        tags = tags(data)
+    if redis is not None:
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, content, ex=expire)
+                for tag in tags:
+                    tag_key = make_tag_key(tag)
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, expire)
+                await pipe.execute()
+        except Exception:
+            logger.warning(f'Cache is unavailable, {namespace}', exc_info=True)
+    return json_response(content, 'MISS')
+
+
+async def invalidate(*tags: str) -> None:
+    """
+    Сбрасывает все ответы, помеченные любым из тегов.
+    Вызывается после коммита изменений.
+    """
+    try:
+        await get_redis().eval(
+            INVALIDATE_SCRIPT, len(tags), *map(make_tag_key, tags)
+        )
+    except Exception:
+        logger.warning(
+            f'Cache invalidation failed, tags {tags}', exc_info=True)
@@ -64,6 +64,26 @@ class TestPostgresDBSettings(BaseSettings):
 class AuthSettings(BaseSettings):
     SECRET_AUTH_KEY: str
     ROLE_DEFAULT: str = "user"
+    # Токены с правами пользователя, см. src/auth/tokens.py. Секунды
+    ACCESS_TOKEN_LIFETIME: int = 60 * 15
+    REFRESH_TOKEN_LIFETIME: int = 60 * 60 * 24 * 30
+    # Хеширование паролей в пуле процессов, см. src/auth/password.py.
+    # Число процессов (по умолчанию по числу ядер), сколько хешей может
+    # ждать и выполняться одновременно, стоимость bcrypt
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Ограничение частоты запросов к маршрутам входа и регистрации,
+    # см. src/auth/rate_limit.py. Маршрут (последний сегмент пути) ->
+    # тип ключа (ip, account) -> (запросов подряд, за сколько секунд
+    # восстанавливается весь запас)
+    RATE_LIMITS: dict[str, dict[str, tuple[int, int]]] = {
+        "login": {"ip": (30, 60), "account": (10, 300)},
+        "register": {"ip": (10, 3600)},
+        "forgot-password": {"ip": (10, 3600), "account": (3, 3600)},
+        "request-verify-token": {"ip": (10, 3600), "account": (3, 3600)},
+        "accept": {"ip": (30, 60)},
+    }
 
 
 class LoggerSettings(BaseSettings):
@@ -73,6 +93,19 @@ class LoggerSettings(BaseSettings):
     LOGGER_FILE_MAX_SIZE: int = 1024 * 1024 * 5
     LOGGER_FILE_MAX_BACKUP: int = 5
     LOGGER_FILE: str
+    LOGGER_QUEUE_SIZE: int = 10000
+    LOGGER_BATCH_SIZE: int = 500
+    LOGGER_FLUSH_INTERVAL: float = 1.0
+    # None - при переполнении очереди записи отбрасываются сразу
+    LOGGER_BLOCK_TIMEOUT: Optional[float] = None
+    # Сколько первых байт тела запроса и ответа попадает в журнал
+    LOGGER_MAX_BODY_SIZE: int = 2048
+    # Поля RequestJsonLogSchema, попадающие в журнал. None - все поля
+    LOGGER_FIELDS: Optional[list[str]] = None
+    # Доля журналируемых ответов по коду или классу кода: {"2xx": 0.01}
+    LOGGER_STATUS_SAMPLE_RATES: dict[str, float] = {}
+    # Доля журналируемых ответов по префиксу пути: {"/api/v1/auth": 0.1}
+    LOGGER_ROUTE_SAMPLE_RATES: dict[str, float] = {}
 
 
 class EmailSettings(BaseSettings):
@@ -86,11 +119,31 @@ class RedisSettings(BaseSettings):
     # REDIS_HOST: str
     # REDIS_PORT: int
     REDIS_URL: Optional[str] = None
+    # Время жизни закэшированных ответов, секунды
+    CACHE_EXPIRE: int = 60
+    CACHE_PREFIX: str = "fastapi-cache"
+    # Время жизни закэшированных подсказок поиска, секунды
+    SUGGEST_CACHE_EXPIRE: int = 30
+    # Кэш пользователей для аутентификации запросов, см. src/auth/cache.py.
+    # Время жизни в Redis и в памяти процесса, секунды
+    USER_CACHE_EXPIRE: int = 60
+    USER_CACHE_LOCAL_EXPIRE: float = 5
+    USER_CACHE_LOCAL_SIZE: int = 10000
+    # Сколько первых мест рейтинга популярных конспектов хранится в Redis
+    POPULAR_SUMMARIES_SIZE: int = 1000
 
 
 class FilesSettings(BaseSettings):
     ALLOWED_EXTENSIONS: set[str] = {'png', 'jpg', 'jpeg', 'gif', 'md'}
     MAX_CONTENT_LENGTH: int = 16 * 1000 * 1000
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_CONCURRENCY: int = 4
+    # Срок кэширования файлов хранилища клиентами, секунды
+    FILES_MAX_AGE: int = 60 * 60 * 24 * 365
+    # Префикс internal location nginx, например "/internal/".
+    # Если задан, /files отдает только заголовок X-Accel-Redirect,
+    # а сам файл отправляет nginx
+    FILES_ACCEL_REDIRECT_PREFIX: Optional[str] = None
 
 
 settings = [
@@ -7,7 +7,7 @@ from functools import wraps
 import json
 from typing import AsyncGenerator
 
-from sqlalchemy import MetaData
+from sqlalchemy import DDL, MetaData, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -62,6 +62,11 @@ convention = {
 
 metadata = MetaData(naming_convention=convention)
 Base: DeclarativeMeta = declarative_base(metadata=metadata)
+# Триграммные индексы подсказок поиска (src/search/logic.py).
+# В рабочей базе расширение создает миграция, здесь - для create_all
+event.listen(
+    metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
 
 
 # async def create_db_and_tables():
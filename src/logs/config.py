@@ -13,11 +13,17 @@ LOG_CONFIG = {
         }
     },
     'handlers': {
-        # Используем AsyncLogDispatcher для асинхронного вывода потока.
+        # Запись в файл пачками из фонового потока.
         'json': {
             'formatter': 'json',
-            'class': 'asynclog.AsyncLogDispatcher',
-            'func': 'src.logs.json_logger.write_log',
+            'class': 'src.logs.json_logger.BatchingFileHandler',
+            'filename': config.LOGGER_FILE,
+            'max_bytes': config.LOGGER_FILE_MAX_SIZE,
+            'backup_count': config.LOGGER_FILE_MAX_BACKUP,
+            'queue_size': config.LOGGER_QUEUE_SIZE,
+            'batch_size': config.LOGGER_BATCH_SIZE,
+            'flush_interval': config.LOGGER_FLUSH_INTERVAL,
+            'block_timeout': config.LOGGER_BLOCK_TIMEOUT,
         },
         'console': {
             'formatter': 'default',
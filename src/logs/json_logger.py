@@ -1,8 +1,11 @@
 import datetime
 import json
 import logging
-import traceback
 import os
+import queue
+import sys
+import threading
+import traceback
 
 from src.config import config
 from src.logs.schemas import BaseJsonLogSchema
@@ -77,42 +80,184 @@ class JSONLogFormatter(logging.Formatter):
         return json_log_object
 
 
-LOG_FILE = config.LOGGER_FILE
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-MAX_BACKUP_FILES = 5
+_STOP = object()
 
 
-def check_log_file_size() -> int:
+class BatchingFileHandler(logging.Handler):
     """
-    Проверка размера файла журнала.
+    Обработчик, пишущий журнал в файл пачками из фонового потока.
 
-    :return: Размер файла журнала в байтах
-    """
-    if os.path.exists(LOG_FILE):
-        return os.path.getsize(LOG_FILE)
-    return 0
+    emit только форматирует запись и кладет ее в ограниченную очередь.
+    Фоновый поток держит файл открытым, забирает записи пачками до
+    batch_size и сбрасывает буфер на диск раз в flush_interval секунд.
+    Размер файла считается в памяти, stat делается только при открытии.
 
+    Если очередь переполнена, запись ждет место не дольше block_timeout
+    секунд (None - не ждет), затем отбрасывается. Количество отброшенных
+    записей хранится в dropped и пишется в журнал отдельной записью.
 
-def rotate_log_files() -> None:
+    Ошибки записи в файл (нет места, не удалось переименовать при ротации)
+    не останавливают поток: пачка теряется, ошибка пишется в stderr,
+    файл открывается заново при следующей пачке.
     """
-    Повторное создание файлов журнала.
-    """
-    for i in range(MAX_BACKUP_FILES - 1, 0, -1):
-        if os.path.exists(f'{LOG_FILE}.{i}'):
-            os.replace(f'{LOG_FILE}.{i}', f'{LOG_FILE}.{i + 1}')
 
+    def __init__(
+            self,
+            filename: str,
+            max_bytes: int = 5 * 1024 * 1024,
+            backup_count: int = 5,
+            queue_size: int = 10000,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            buffer_size: int = 64 * 1024,
+            block_timeout: float | None = None,
+    ) -> None:
+        super().__init__()
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stream = None
+        self._size = 0
+        self._thread = threading.Thread(
+            target=self._run, name='json-log-writer', daemon=True
+        )
+        self._thread.start()
 
-def write_log(msg: str) -> None:
-    """
-    Запись сообщения в журнал.
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self._queue.put(
+                msg,
+                block=self.block_timeout is not None,
+                timeout=self.block_timeout
+            )
+        except queue.Full:
+            # emit вызывается под self.lock, счетчик меняется атомарно
+            self.dropped += 1
 
-    :param msg: Сообщение журнала
-    """
-    file_size = check_log_file_size()
+    def close(self) -> None:
+        """
+        Дописывает оставшиеся записи и закрывает файл.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        super().close()
 
-    if file_size + len(msg) > MAX_FILE_SIZE:
-        rotate_log_files()
-        os.replace(LOG_FILE, f'{LOG_FILE}.1')
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = self._next_batch()
+            if batch and batch[-1] is _STOP:
+                batch.pop()
+                running = False
+            if self.dropped != self._reported_dropped:
+                batch.append(self._dropped_message())
+            try:
+                if self._stream is None:
+                    self._open()
+                if batch:
+                    self._write(batch)
+                # Пачка забирается целиком или по таймауту flush_interval,
+                # поэтому буфер сбрасывается не реже раза в flush_interval
+                self._stream.flush()
+            except Exception:
+                self._report_error(len(batch))
+                self._close_stream()
+        self._close_stream()
 
-    with open(LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(msg + '\n')
+    def _report_error(self, lost: int) -> None:
+        """
+        Пишет ошибку записи в stderr, как logging.Handler.handleError.
+        """
+        if not logging.raiseExceptions:
+            return
+        try:
+            sys.stderr.write(
+                f'--- Ошибка записи журнала {self.filename}, '
+                f'потеряно записей: {lost} ---\n'
+            )
+            traceback.print_exc(file=sys.stderr)
+        except OSError:
+            pass
+
+    def _close_stream(self) -> None:
+        if self._stream is None:
+            return
+        try:
+            self._stream.close()
+        except OSError:
+            # Буфер не сбросился, файл все равно закрыт
+            pass
+        self._stream = None
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dropped_message(self) -> str:
+        dropped = self.dropped
+        now = datetime.datetime.now().astimezone().replace(microsecond=0)
+        message = json.dumps({
+            '@timestamp': now.isoformat(),
+            'level': logging.WARNING,
+            'level_name': 'WARNING',
+            'source': 'json-log-writer',
+            'message': (f'Очередь журнала переполнена, отброшено '
+                        f'{dropped - self._reported_dropped} записей'),
+            'dropped_total': dropped,
+        }, ensure_ascii=False)
+        self._reported_dropped = dropped
+        return message
+
+    def _write(self, batch: list[str]) -> None:
+        lines = []
+        size = self._size
+        for msg in batch:
+            line = (msg + '\n').encode('utf-8')
+            if size and size + len(line) > self.max_bytes:
+                self._stream.write(b''.join(lines))
+                self._rotate()
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+        self._stream.write(b''.join(lines))
+        self._size = size
+
+    def _open(self) -> None:
+        self._stream = open(self.filename, 'ab', buffering=self.buffer_size)
+        self._size = self._stream.tell()
+
+    def _rotate(self) -> None:
+        """
+        Повторное создание файлов журнала.
+        """
+        self._stream.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f'{self.filename}.{i}'):
+                    os.replace(f'{self.filename}.{i}',
+                               f'{self.filename}.{i + 1}')
+            os.replace(self.filename, f'{self.filename}.1')
+        else:
+            os.remove(self.filename)
+        self._open()
@@ -3,121 +3,211 @@ import json
 import math
 import time
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import RequestResponseEndpoint
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.config import config
-from src.logs.schemas import RequestJsonLogSchema
+from src.logs.policy import LoggingPolicy
 
 
 EMPTY_VALUE = "No Value"
 logger = logging.getLogger('root')
 
+# Тела с этими типами содержимого журналируются, остальные
+# (multipart, изображения, файлы) пропускаются целиком
+TEXT_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/problem+json',
+    'application/x-www-form-urlencoded',
+    'application/xml',
+)
+
+
+def is_text_content(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    return content_type.lower().startswith(TEXT_CONTENT_TYPES)
+
+
+class BodyPrefix:
+    """
+    Первые limit байт тела и его полный размер.
+    """
+
+    def __init__(self, limit: int, capture: bool = True) -> None:
+        self.limit = limit
+        self.capture = capture
+        self.size = 0
+        self.data = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.capture and len(self.data) < self.limit:
+            self.data += chunk[:self.limit - len(self.data)]
+
+    def text(self) -> str:
+        if not self.capture:
+            return EMPTY_VALUE
+        text = self.data.decode(errors='replace')
+        if self.size > len(self.data):
+            text += f'... ({self.size} байт)'
+        return text
+
 
 class LoggingMiddleware:
     """
     Middleware для обработки запросов и ответов с целью журналирования.
+
+    Работает на уровне ASGI: оборачивает receive и send и копирует
+    в журнал только первые config.LOGGER_MAX_BODY_SIZE байт текстовых тел.
+    Ответ не буферизуется и уходит клиенту по мере отправки приложением.
+    Что и когда журналировать, решает LoggingPolicy: если логгер
+    не пишет даже ошибки, запрос проходит без обертки, а поля записи
+    собираются только после решения о ее записи.
     """
+
+    def __init__(
+            self, app: ASGIApp,
+            max_body_size: int = config.LOGGER_MAX_BODY_SIZE,
+            policy: Optional[LoggingPolicy] = None
+    ) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+        self.policy = policy or LoggingPolicy.from_config(logger)
+
     @staticmethod
-    async def get_protocol(request: Request) -> str:
-        protocol = str(request.scope.get('type', ''))
-        http_version = str(request.scope.get('http_version', ''))
+    def get_protocol(scope: Scope) -> str:
+        protocol = str(scope.get('type', ''))
+        http_version = str(scope.get('http_version', ''))
         if protocol.lower() == 'http' and http_version:
             return f'{protocol.upper()}/{http_version}'
         return EMPTY_VALUE
 
-    @staticmethod
-    async def set_body(request: Request, body: bytes) -> None:
-        async def receive():
-            return {'type': 'http.request', 'body': body}
-
-        request._receive = receive
-
-    async def get_body(self, request: Request) -> bytes:
-        body = await request.body()
-        await self.set_body(request, body)
-        return body
-
     async def __call__(
-            self, request: Request, call_next: RequestResponseEndpoint,
-            *args, **kwargs
-    ):
+            self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http' or not self.policy.is_enabled():
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
         exception_object = None
-        # Request Side
-        try:
-            raw_request_body = await request.body()
-            # Последующие действия нужны,
-            # чтобы не перезатереть тело запроса
-            # и не уйти в зависание event-loop'a
-            # при последующем получении тела ответа
-            await self.set_body(request, raw_request_body)
-            raw_request_body = await self.get_body(request)
-            request_body = raw_request_body.decode()
-        except Exception:
-            request_body = EMPTY_VALUE
-
-        server: tuple = request.get(
-            'server', (config.POSTGRES_HOST, config.POSTGRES_PORT)
+        capture_body = self.policy.captures_body()
+        request_headers = Headers(scope=scope)
+        request_body = BodyPrefix(
+            self.max_body_size,
+            capture_body and is_text_content(
+                request_headers.get('content-type'))
         )
-        request_headers: dict = dict(request.headers.items())
-        # Response Side
+        response_body = BodyPrefix(self.max_body_size)
+        response_status_code = http.HTTPStatus.INTERNAL_SERVER_ERROR.real
+        response_headers = Headers()
+        response_started = False
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message['type'] == 'http.request':
+                request_body.feed(message.get('body', b''))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_status_code, response_headers, response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+                response_status_code = message['status']
+                response_headers = Headers(raw=message.get('headers', []))
+                response_body.capture = capture_body and is_text_content(
+                    response_headers.get('content-type'))
+            elif message['type'] == 'http.response.body':
+                response_body.feed(message.get('body', b''))
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive_wrapper, send_wrapper)
         except Exception as ex:
-            response_body = bytes(
-                http.HTTPStatus.INTERNAL_SERVER_ERROR.phrase.encode()
-            )
-            response = Response(
-                content=response_body,
-                status_code=http.HTTPStatus.INTERNAL_SERVER_ERROR.real,
-            )
             exception_object = ex
-            response_headers = {}
-        else:
-            response_headers = dict(response.headers.items())
-            response_body = b''
-            async for chunk in response.body_iterator:
-                response_body += chunk
-            response = Response(
-                content=response_body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
+            if response_started:
+                raise
+            await send_wrapper({
+                'type': 'http.response.start',
+                'status': http.HTTPStatus.INTERNAL_SERVER_ERROR.real,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send_wrapper({
+                'type': 'http.response.body',
+                'body': http.HTTPStatus.INTERNAL_SERVER_ERROR.phrase.encode(),
+            })
+        finally:
+            self.log(
+                scope, request_headers, request_body,
+                response_status_code, response_headers, response_body,
+                start_time, exception_object
             )
+
+    def log(
+            self,
+            scope: Scope,
+            request_headers: Headers,
+            request_body: BodyPrefix,
+            response_status_code: int,
+            response_headers: Headers,
+            response_body: BodyPrefix,
+            start_time: float,
+            exception_object: Exception | None
+    ) -> None:
+        level = self.policy.get_log_level(
+            scope['path'], response_status_code, exception_object)
+        if level is None:
+            return
+        request = Request(scope)
         duration: int = math.ceil((time.time() - start_time) * 1000)
-        # Инициализация и формирования полей для запроса-ответа
-        request_json_fields = RequestJsonLogSchema(
-            request_uri=str(request.url),
-            request_referer=request_headers.get('referer', EMPTY_VALUE),
-            request_protocol=await self.get_protocol(request),
-            request_method=request.method,
-            request_path=request.url.path,
-            request_host=f'{server[0]}:{server[1]}',
-            request_size=int(request_headers.get('content-length', 0)),
-            request_content_type=request_headers.get(
+        server: tuple = scope.get(
+            'server', (config.POSTGRES_HOST, config.POSTGRES_PORT)
+        ) or (EMPTY_VALUE, 0)
+        client: tuple = scope.get('client') or (EMPTY_VALUE, 0)
+        # Поля запроса-ответа вычисляются, только если попадают в журнал
+        getters: dict[str, Callable[[], Any]] = dict(
+            request_uri=lambda: str(request.url),
+            request_referer=lambda: request_headers.get(
+                'referer', EMPTY_VALUE),
+            request_protocol=lambda: self.get_protocol(scope),
+            request_method=lambda: request.method,
+            request_path=lambda: request.url.path,
+            request_host=lambda: f'{server[0]}:{server[1]}',
+            request_size=lambda: request_body.size or int(
+                request_headers.get('content-length', 0)),
+            request_content_type=lambda: request_headers.get(
                 'content-type', EMPTY_VALUE),
-            request_headers=json.dumps(request_headers),
-            request_body=request_body,
-            request_direction='in',
-            remote_ip=request.client[0],
-            remote_port=request.client[1],
-            response_status_code=response.status_code,
-            response_size=int(response_headers.get('content-length', 0)),
-            response_headers=json.dumps(response_headers),
-            response_body=response_body.decode(),
-            duration=duration
-        ).dict()
+            request_headers=lambda: json.dumps(dict(request_headers.items())),
+            request_body=request_body.text,
+            request_direction=lambda: 'in',
+            remote_ip=lambda: client[0],
+            remote_port=lambda: client[1],
+            response_status_code=lambda: response_status_code,
+            response_size=lambda: response_body.size,
+            response_headers=lambda: json.dumps(
+                dict(response_headers.items())),
+            response_body=response_body.text,
+            duration=lambda: duration,
+        )
+        request_json_fields = {
+            field: getters[field]() for field in self.policy.fields
+        }
         message = (
             '{} с кодом {} на запрос {} {}, за {} мс'
         ).format(
             "Ошибка" if exception_object else "Ответ",
-            response.status_code,
+            response_status_code,
             request.method,
             request.url,
             duration
         )
-        logger.info(
+        logger.log(
+            level,
             message,
             extra={
                 'request_json_fields': request_json_fields,
@@ -125,4 +215,3 @@ class LoggingMiddleware:
             },
             exc_info=exception_object,
         )
-        return response
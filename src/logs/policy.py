@@ -0,0 +1,96 @@
+import logging
+import random
+from typing import Optional
+
+from src.config import config
+from src.logs.schemas import RequestJsonLogSchema
+
+
+BODY_FIELDS = ('request_body', 'response_body')
+
+
+class LoggingPolicy:
+    """
+    Правила журналирования запросов.
+
+    Решает, нужно ли писать запись о запросе, с каким уровнем
+    и какие поля RequestJsonLogSchema в нее включать.
+    Доля записей задается по коду ответа (точный код важнее класса "5xx")
+    и по префиксу пути (самый длинный префикс), доли перемножаются.
+    Запросы, завершившиеся исключением, журналируются всегда.
+    """
+
+    def __init__(
+            self,
+            logger: logging.Logger,
+            fields: Optional[list[str]] = None,
+            status_sample_rates: Optional[dict[str, float]] = None,
+            route_sample_rates: Optional[dict[str, float]] = None,
+    ) -> None:
+        all_fields = list(RequestJsonLogSchema.model_fields)
+        unknown = set(fields or []) - set(all_fields)
+        if unknown:
+            raise ValueError(f'Неизвестные поля журнала: {sorted(unknown)}')
+        self.logger = logger
+        self.fields = fields if fields is not None else all_fields
+        self.status_sample_rates = status_sample_rates or {}
+        # Длинные префиксы проверяются первыми
+        self.route_sample_rates = sorted(
+            (route_sample_rates or {}).items(),
+            key=lambda item: len(item[0]), reverse=True
+        )
+
+    @classmethod
+    def from_config(cls, logger: logging.Logger) -> 'LoggingPolicy':
+        return cls(
+            logger,
+            fields=config.LOGGER_FIELDS,
+            status_sample_rates=config.LOGGER_STATUS_SAMPLE_RATES,
+            route_sample_rates=config.LOGGER_ROUTE_SAMPLE_RATES,
+        )
+
+    def is_enabled(self) -> bool:
+        """
+        Может ли вообще появиться запись о запросе.
+        """
+        return self.logger.isEnabledFor(logging.ERROR)
+
+    def captures_body(self) -> bool:
+        return any(field in self.fields for field in BODY_FIELDS)
+
+    @staticmethod
+    def get_level(
+            status_code: int, exception: Optional[Exception] = None
+    ) -> int:
+        if exception is not None or status_code >= 500:
+            return logging.ERROR
+        return logging.INFO
+
+    def get_sample_rate(self, path: str, status_code: int) -> float:
+        rate = self.status_sample_rates.get(
+            str(status_code),
+            self.status_sample_rates.get(f'{status_code // 100}xx', 1.0)
+        )
+        for prefix, route_rate in self.route_sample_rates:
+            if path.startswith(prefix):
+                return rate * route_rate
+        return rate
+
+    def get_log_level(
+            self,
+            path: str,
+            status_code: int,
+            exception: Optional[Exception] = None
+    ) -> Optional[int]:
+        """
+        Уровень записи о запросе или None, если запись не нужна.
+        """
+        level = self.get_level(status_code, exception)
+        if not self.logger.isEnabledFor(level):
+            return None
+        if exception is not None:
+            return level
+        rate = self.get_sample_rate(path, status_code)
+        if rate >= 1 or random.random() < rate:
+            return level
+        return None
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
 from logging.config import dictConfig
@@ -5,19 +6,24 @@ import time
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi.middleware.cors import CORSMiddleware
 from redis import asyncio as aioredis
 
 from src.auth.config import fastapi_users, current_active_user  # не убирать
+from src.auth.constants import PasswordHashQueueFullError
+from src.auth.password import password_hasher
 from src.auth.router import router_auth, router_roles, router_users
 from src.config import config, app_configs
 from src.logs.config import LOG_CONFIG
 from src.logs.middlewares import LoggingMiddleware
+from src.search.router import router_search
+from src.search.service import backfill_summary_content
 from src.tasks.router import router_tasks
 from src.tasks.tasks import celery  # не убирать
-from src.summary.router import router_summary
+from src.summary.router import router_files, router_summary
 
 
 dictConfig(LOG_CONFIG)
@@ -34,8 +40,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         encoding="utf8",
         decode_responses=True
     )
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    FastAPICache.init(RedisBackend(redis), prefix=config.CACHE_PREFIX)
+    backfill = asyncio.create_task(backfill_summary_content())
     yield
+    backfill.cancel()
+    password_hasher.shutdown()
     await redis.aclose()
 
 
@@ -43,9 +52,22 @@ app = FastAPI(
     **app_configs,
     lifespan=lifespan
 )
-app.middleware('http')(
-    LoggingMiddleware()
-)
+app.add_middleware(LoggingMiddleware)
+
+
+@app.exception_handler(PasswordHashQueueFullError)
+async def password_hash_queue_full(
+        request: Request, exc: PasswordHashQueueFullError
+) -> JSONResponse:
+    """
+    Пул хеширования паролей перегружен. Обрабатывается здесь, потому что
+    вход и регистрация - маршруты fastapi-users.
+    """
+    return JSONResponse(
+        status_code=PasswordHashQueueFullError.status_code,
+        content={"detail": PasswordHashQueueFullError.description},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.middleware("http")
@@ -82,3 +104,5 @@ app.include_router(router_users)
 app.include_router(router_roles)
 app.include_router(router_tasks)
 app.include_router(router_summary)
+app.include_router(router_files)
+app.include_router(router_search)
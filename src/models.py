@@ -1,10 +1,13 @@
 from typing import Any, Optional, Type, TypeVar
 
-from sqlalchemy import UUID, delete, func, select, update
+from sqlalchemy import UUID, delete, func, insert, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql import Select
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import ColumnElement, Select
 
 from src.constants import new_uuid
 from src.database import Base
@@ -20,6 +23,8 @@ class MixinID:
 
 class CRUDBase:
     table: Type[Table]
+    # Колонка владельца строки для операций *_owned
+    owner_field: str = "author_id"
 
     @classmethod
     async def create(cls, session: AsyncSession, **kwargs) -> Table:
@@ -30,6 +35,22 @@ class CRUDBase:
         await session.flush()
         return instance
 
+    @classmethod
+    async def create_many(
+        cls, session: AsyncSession, rows: list[dict[str, Any]]
+    ) -> list[Table]:
+        """
+        Создает несколько экземпляров одним INSERT ... RETURNING.
+        Коммит остается за вызывающим кодом.
+        """
+        created_rows = [
+            {k: v for k, v in row.items()
+             if getattr(cls.table, k, None) is not None}
+            for row in rows
+        ]
+        query = insert(cls.table).returning(cls.table)
+        return (await session.scalars(query, created_rows)).all()
+
     @classmethod
     async def get(cls, session: AsyncSession, field: str, value: Any) -> Table:
         query = select(cls.table).where(getattr(cls.table, field) == value)
@@ -38,14 +59,21 @@ class CRUDBase:
     @classmethod
     async def update(
         cls, session: AsyncSession, field: str, value: Any, **kwargs
-    ) -> None:
+    ) -> Optional[Table]:
+        """
+        Обновляет строки одним UPDATE ... RETURNING.
+        Возвращает обновленный экземпляр (первый, если строк несколько)
+        или None. Загруженный в сессию экземпляр обновляется на месте,
+        его загруженные связи сохраняются.
+        """
         updated_fields = {k: v for k, v in kwargs.items()
                           if getattr(cls.table, k, None) is not None}
         query = update(cls.table).where(
             getattr(cls.table, field) == value
-        ).values(**updated_fields)
-        await session.execute(query)
+        ).values(**updated_fields).returning(cls.table)
+        instance = (await session.scalars(query)).first()
         await session.flush()
+        return instance
 
     @classmethod
     async def delete(
@@ -55,6 +83,116 @@ class CRUDBase:
         await session.execute(query)
         await session.flush()
 
+    @classmethod
+    async def upsert(cls, session: AsyncSession, **kwargs) -> Optional[Table]:
+        """
+        INSERT ... ON CONFLICT (первичный ключ) DO NOTHING RETURNING.
+        Повторная вставка той же строки не приводит к IntegrityError,
+        в том числе при параллельных запросах.
+
+        :return: созданный экземпляр или None, если строка уже есть
+        """
+        created_fields = {k: v for k, v in kwargs.items()
+                          if getattr(cls.table, k, None) is not None}
+        primary_key = [column.name
+                       for column in cls.table.__table__.primary_key]
+        query = (pg_insert(cls.table)
+                 .values(**created_fields)
+                 .on_conflict_do_nothing(index_elements=primary_key)
+                 .returning(cls.table))
+        return (await session.scalars(query)).one_or_none()
+
+    @classmethod
+    async def delete_returning(
+        cls, session: AsyncSession, **filters
+    ) -> Optional[Table]:
+        """
+        DELETE ... WHERE <filters> RETURNING.
+        Подходит для таблиц связей с составным первичным ключом.
+
+        :return: удаленный экземпляр или None, если строки не было
+        """
+        query = delete(cls.table).filter_by(**filters).returning(cls.table)
+        return (await session.scalars(query)).one_or_none()
+
+    @classmethod
+    def owned_by(cls, owner_id: Any) -> ColumnElement[bool]:
+        """
+        Условие принадлежности строки владельцу.
+        Переопределяется, если владелец определяется через другую таблицу.
+        """
+        return getattr(cls.table, cls.owner_field) == owner_id
+
+    @classmethod
+    async def update_owned(
+        cls, session: AsyncSession, id: Any, owner_id: Any, **kwargs
+    ) -> Optional[Table]:
+        """
+        UPDATE ... WHERE id = ? AND <владелец> RETURNING.
+        Проверка прав и запись выполняются одним запросом, строка остается
+        заблокированной до конца транзакции.
+
+        :return: обновленный экземпляр или None, если строки нет
+            или она принадлежит другому пользователю
+        """
+        updated_fields = {k: v for k, v in kwargs.items()
+                          if getattr(cls.table, k, None) is not None}
+        query = (update(cls.table)
+                 .where(cls.table.id == id, cls.owned_by(owner_id))
+                 .values(**updated_fields)
+                 .returning(cls.table))
+        return (await session.scalars(query)).one_or_none()
+
+    @classmethod
+    async def delete_owned(
+        cls, session: AsyncSession, id: Any, owner_id: Any, *returning,
+        **filters
+    ) -> Optional[Row]:
+        """
+        DELETE ... WHERE id = ? AND <владелец> RETURNING.
+
+        :param returning: возвращаемые колонки, по умолчанию id
+        :param filters: дополнительные условия на равенство колонок
+        :return: строка с колонками returning или None, если строки нет
+            или она принадлежит другому пользователю
+        """
+        query = (delete(cls.table)
+                 .where(cls.table.id == id, cls.owned_by(owner_id))
+                 .filter_by(**filters)
+                 .returning(*(returning or (cls.table.id,))))
+        return (await session.execute(query)).first()
+
+
+def get_from_session(
+        session: AsyncSession, table: Type[Table], id: Any, *relations: str
+) -> Optional[Table]:
+    """
+    Возвращает объект из identity map сессии без запроса к базе.
+
+    Сессия живет один запрос, поэтому уже загруженный в запросе объект
+    повторно не читается. Если объекта нет, он устарел или у него
+    не загружены колонки или перечисленные связи, возвращает None.
+
+    :param session: асинхронная сессия
+    :param table: класс sqlalchemy (из файлов models.py)
+    :param id: значение первичного ключа
+    :param relations: связи, которые должны быть загружены
+    """
+    instance = session.identity_map.get(identity_key(table, id))
+    if instance is None:
+        return None
+    state = inspect(instance)
+    mapper = state.mapper
+    # Только колонки таблицы: query_expression загружается не всегда.
+    # Отложенные колонки (deferred) не загружаются никогда
+    columns = (mapper.get_property_by_column(column)
+               for column in mapper.local_table.columns)
+    required = {column.key for column in columns
+                if not column.deferred} | set(relations)
+    if state.expired or state.unloaded & required:
+        return None
+    return instance
+
 
 async def get_list(session: AsyncSession, query: Select) -> list[Table]:
     """
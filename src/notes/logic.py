@@ -1,14 +1,20 @@
 from uuid import UUID
 
 from pydantic import UUID4
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from src.notes.models import (
-    ImageNote as ImageNoteModel, ImageNoteCRUD, NoteCRUD, Note as NoteModel
+    ImageNote as ImageNoteModel, ImageNoteCRUD, NoteCRUD, Note as NoteModel,
+    NoteUser as NoteUserModel, NoteUserCRUD
 )
 
 from src.auth.models import User
-from src.models import get_list
+from src.models import exactly_one, get_list
+
+
+AUTHOR = joinedload(NoteModel.author, innerjoin=True).load_only(
+    User.id, User.username)
 
 
 class Note:
@@ -21,18 +27,26 @@ class Note:
 
     @classmethod
     async def get(cls, session: AsyncSession, note_id: UUID4) -> NoteModel:
-        return await cls.crud.get(session, "id", note_id)
+        query = (select(NoteModel)
+                 .where(NoteModel.id == note_id)
+                 .options(AUTHOR))
+        return await exactly_one(session, query)
 
     @classmethod
     async def get_list(
         cls, session: AsyncSession, user_id: UUID | None = None,
         is_public: bool | None = None, username: str | None = None
     ) -> list[NoteModel]:
-        query = select(NoteModel).order_by(NoteModel.created_at.desc())
+        query = (select(NoteModel)
+                 .options(AUTHOR)
+                 .order_by(NoteModel.created_at.desc()))
         if user_id:
             query = query.filter(NoteModel.author_id == user_id)
         if is_public is not None:
-            query = query.filter(NoteModel.is_public == is_public)
+            # Без параметра в условии, чтобы подходил частичный индекс
+            # по публичным записям
+            query = query.filter(
+                NoteModel.is_public if is_public else ~NoteModel.is_public)
         if username:
             query = query.join(User).filter(User.username == username)
         return await get_list(session, query)
@@ -41,6 +55,38 @@ class Note:
     async def delete(cls, session: AsyncSession, note_id: UUID4) -> None:
         await cls.crud.delete(session, "id", note_id)
 
+    @classmethod
+    async def change_favorite_count(
+        cls, session: AsyncSession, note_id: UUID, delta: int
+    ) -> None:
+        """
+        Атомарно меняет счетчик избранного на delta, не трогая updated_at.
+        """
+        await session.execute(
+            update(NoteModel)
+            .where(NoteModel.id == note_id)
+            .values(favorite_count=NoteModel.favorite_count + delta,
+                    updated_at=NoteModel.updated_at)
+        )
+
+    @classmethod
+    async def reconcile_favorite_count(cls, session: AsyncSession) -> int:
+        """
+        Исправляет счетчики, разошедшиеся с note_user.
+
+        :return: число исправленных заметок
+        """
+        count = (select(func.count())
+                 .where(NoteUserModel.note_id == NoteModel.id)
+                 .scalar_subquery())
+        result = await session.execute(
+            update(NoteModel)
+            .where(NoteModel.favorite_count != count)
+            .values(favorite_count=count, updated_at=NoteModel.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
     @classmethod
     async def update(
         cls, session: AsyncSession, note_id: UUID4, new_note
@@ -64,3 +110,37 @@ class ImageNote:
     @classmethod
     async def get(cls, session: AsyncSession, image_id: UUID4) -> ImageNoteModel:
         return await cls.crud.get(session, "id", image_id)
+
+
+class NoteUser:
+    crud = NoteUserCRUD
+
+    @classmethod
+    async def create(
+        cls, session: AsyncSession, note_id: UUID, user_id: UUID
+    ) -> NoteUserModel | None:
+        """
+        Добавление в избранное одним INSERT ... ON CONFLICT DO NOTHING.
+        Счетчик заметки увеличивается в той же транзакции.
+        None, если заметка уже в избранном.
+        """
+        favorite = await cls.crud.upsert(
+            session, note_id=note_id, user_id=user_id)
+        if favorite is not None:
+            await Note.change_favorite_count(session, note_id, 1)
+        return favorite
+
+    @classmethod
+    async def delete(
+        cls, session: AsyncSession, note_id: UUID, user_id: UUID
+    ) -> NoteUserModel | None:
+        """
+        Удаление из избранного одним DELETE ... RETURNING.
+        Счетчик заметки уменьшается в той же транзакции.
+        None, если заметки не было в избранном.
+        """
+        favorite = await cls.crud.delete_returning(
+            session, note_id=note_id, user_id=user_id)
+        if favorite is not None:
+            await Note.change_favorite_count(session, note_id, -1)
+        return favorite
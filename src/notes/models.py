@@ -1,13 +1,15 @@
 from datetime import datetime
 import uuid
 
-from sqlalchemy import (TIMESTAMP, UUID, Boolean, Column, ForeignKey,
-                        String, Table, text)
+from sqlalchemy import (TIMESTAMP, UUID, Boolean, Column, Computed,
+                        ForeignKey, Index, String, Table, text)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.constants import new_uuid
 from src.database import Base, metadata
 from src.models import CRUDBase
+from src.search.constants import SEARCH_CONFIG
 
 
 # user_notes = Table(
@@ -22,11 +24,15 @@ class NoteUser(Base):
     __tablename__ = "note_user"
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
-    note_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("note.id", ondelete="CASCADE"), primary_key=True)
+    note_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("note.id", ondelete="CASCADE"), primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    note = relationship("Note", back_populates="favorite_users", lazy=False)
-    user = relationship("User", back_populates="favorite_notes", lazy=False)
+    note = relationship("Note", back_populates="favorite_users", lazy="raise")
+    user = relationship("User", back_populates="favorite_notes", lazy="raise")
+
+
+class NoteUserCRUD(CRUDBase):
+    table = NoteUser
 
 
 class ImageNote(Base):
@@ -38,7 +44,7 @@ class ImageNote(Base):
     note_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("note.id",
                                                           ondelete="CASCADE"))
 
-    note = relationship("Note", back_populates="images", lazy=False)
+    note = relationship("Note", back_populates="images", lazy="raise")
 
 
 class ImageNoteCRUD(CRUDBase):
@@ -58,8 +64,22 @@ class Note(Base):
                                                  onupdate=datetime.utcnow)
     author_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id",
                                                             ondelete="CASCADE"))
+    # Число пользователей, добавивших заметку в избранное, см. Summary
+    favorite_count: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"))
+    # Полнотекстовый поиск, см. src/search/logic.py
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', intro), 'B') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', text), 'C')",
+            persisted=True
+        ),
+        deferred=True, deferred_raiseload=True
+    )
 
-    author = relationship("User", back_populates="notes", lazy=False)
+    author = relationship("User", back_populates="notes", lazy="raise")
     favorite_users= relationship(
         "NoteUser",
         back_populates="note",
@@ -76,5 +96,17 @@ class Note(Base):
         return f"Note id={self.id}, author_id={self.author_id}"
 
 
+Index("ix_note_created_at_id",
+      Note.created_at.desc(), Note.id.desc())
+Index("ix_note_author_id_created_at_id",
+      Note.author_id, Note.created_at.desc(), Note.id.desc())
+Index("ix_note_public_created_at_id",
+      Note.created_at.desc(), Note.id.desc(),
+      postgresql_where=Note.is_public)
+Index("ix_note_search_vector", Note.search_vector, postgresql_using="gin")
+Index("ix_note_user_user_id_created_at",
+      NoteUser.user_id, NoteUser.created_at.desc(), NoteUser.note_id.desc())
+
+
 class NoteCRUD(CRUDBase):
     table = Note
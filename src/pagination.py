@@ -0,0 +1,145 @@
+import base64
+import binascii
+from datetime import datetime
+import json
+from typing import Any, Generic, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(Exception):
+    status_code = 400
+    description = "Некорректный курсор пагинации"
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Страница списка.
+
+    next_cursor передается в следующий запрос, чтобы получить
+    продолжение списка. Если None, то страница последняя.
+    """
+    items: list[T]
+    next_cursor: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class Pagination(BaseModel):
+    cursor: tuple[datetime, UUID] | None = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+
+def encode_key(*values: Any) -> str:
+    """
+    Кодирует ключ последнего элемента страницы в непрозрачную
+    для клиента строку. Значения должны сериализоваться в JSON.
+    """
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_key(cursor: str) -> list:
+    """
+    Декодирует курсор обратно в список значений ключа.
+
+    Исключения:
+    InvalidCursorError - если курсор поврежден или подделан
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        raise InvalidCursorError
+    if not isinstance(values, list):
+        raise InvalidCursorError
+    return values
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """
+    Кодирует ключ (created_at, id) последнего элемента страницы.
+    """
+    return encode_key(created_at.isoformat(), str(id))
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Декодирует курсор обратно в ключ (created_at, id).
+
+    Исключения:
+    InvalidCursorError - если курсор поврежден или подделан
+    """
+    try:
+        created_at, id = decode_key(cursor)
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError
+
+
+async def pagination_params(
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> Pagination:
+    if cursor is None:
+        return Pagination(limit=limit)
+    try:
+        return Pagination(cursor=decode_cursor(cursor), limit=limit)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=InvalidCursorError.status_code,
+            detail=InvalidCursorError.description
+        )
+
+
+async def paginate(
+        session: AsyncSession,
+        query: Select,
+        pagination: Pagination,
+        created_at: InstrumentedAttribute,
+        id: InstrumentedAttribute
+) -> Page:
+    """
+    Keyset-пагинация по ключу (created_at, id) в порядке убывания.
+
+    В отличие от OFFSET, время получения страницы не зависит от ее
+    глубины: по индексу (created_at, id) сразу находится первая строка
+    после курсора.
+
+    :param session: сессия
+    :param query: запрос в формате sqlalchemy без сортировки и лимита
+    :param pagination: курсор и размер страницы
+    :param created_at: колонка времени, по которой сортируется список
+    :param id: колонка, разрешающая совпадения created_at
+    :return: страница с элементами и курсором на следующую
+    """
+    query = (query
+             .add_columns(created_at, id)
+             .order_by(None)
+             .order_by(created_at.desc(), id.desc()))
+    if pagination.cursor is not None:
+        query = query.where(tuple_(created_at, id) < tuple_(*pagination.cursor))
+    # Берем на одну строку больше, чтобы узнать, есть ли следующая страница
+    rows = (
+        await session.execute(query.limit(pagination.limit + 1))
+    ).unique().all()
+
+    next_cursor = None
+    if len(rows) > pagination.limit:
+        rows = rows[:pagination.limit]
+        _, last_created_at, last_id = rows[-1]
+        next_cursor = encode_cursor(last_created_at, last_id)
+    return Page(items=[row[0] for row in rows], next_cursor=next_cursor)
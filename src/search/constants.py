@@ -0,0 +1,28 @@
+from enum import Enum
+
+
+# Конфигурация полнотекстового поиска Postgres. Входит в выражения
+# генерируемых колонок search_vector: при замене нужна миграция
+SEARCH_CONFIG = "russian"
+# Сколько символов текста конспекта индексируется и хранится для
+# фрагментов. tsvector ограничен 1 МБ, а ts_headline разбирает текст
+# целиком при каждом запросе
+SEARCH_TEXT_MAX_LENGTH = 100_000
+# Маркеры совпадений в ts_headline. Текст не HTML, поэтому фрагмент
+# экранируется уже после поиска, а маркеры заменяются на <mark>
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter= … "
+)
+
+
+class SearchType(str, Enum):
+    SUMMARY = "summary"
+    NOTE = "note"
+
+
+# Подсказки (typeahead) по началу и части имени
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 20
@@ -0,0 +1,20 @@
+from fastapi import HTTPException, Query
+
+from src.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError, MAX_PAGE_SIZE
+from src.search.logic import SearchPagination, decode_search_cursor
+
+
+async def search_pagination_params(
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> SearchPagination:
+    if cursor is None:
+        return SearchPagination(limit=limit)
+    try:
+        return SearchPagination(
+            cursor=decode_search_cursor(cursor), limit=limit)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=InvalidCursorError.status_code,
+            detail=InvalidCursorError.description
+        )
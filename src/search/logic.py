@@ -0,0 +1,211 @@
+"""
+Полнотекстовый поиск по конспектам и заметкам.
+
+Документы индексируются генерируемыми колонками search_vector с GIN
+индексами: у конспекта - название (вес A) и текст файла без разметки (B),
+у заметки - title (A), intro (B) и text (C). Строка запроса разбирается
+websearch_to_tsquery, поэтому поддерживаются "фразы", OR и -исключения,
+а ошибок синтаксиса не бывает. Результаты сортируются по ts_rank,
+фрагменты ts_headline считаются только для строк страницы.
+
+Подсказки (typeahead) ищут по началу и части имени пользователя
+и названия публичного конспекта триграммными индексами pg_trgm.
+"""
+import html
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import and_, cast, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.models import User
+from src.notes.models import Note as NoteModel
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, InvalidCursorError, Page, decode_key, encode_key
+)
+from src.search.constants import (
+    HEADLINE_OPTIONS, HIGHLIGHT_START, HIGHLIGHT_STOP, SEARCH_CONFIG,
+    SearchType
+)
+from src.search.schemas import SearchHit, Suggestions
+from src.summary.models import Summary as SummaryModel
+
+
+# Ранг делится на 1 + логарифм длины документа, чтобы длинные конспекты
+# не вытесняли короткие заметки только за счет числа повторов
+RANK_NORMALIZATION = 1
+
+CONFIG = cast(literal(SEARCH_CONFIG), REGCONFIG)
+
+
+class SearchPagination(BaseModel):
+    cursor: tuple[float, UUID] | None = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+
+def encode_search_cursor(rank: float, id: UUID) -> str:
+    return encode_key(rank, str(id))
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+    """
+    Исключения:
+    InvalidCursorError - если курсор поврежден или подделан
+    """
+    try:
+        rank, id = decode_key(cursor)
+        return float(rank), UUID(id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError
+
+
+def make_snippet(headline: str) -> str:
+    """
+    Экранирует фрагмент ts_headline и заменяет маркеры совпадений
+    на <mark>.
+    """
+    snippet = html.escape(' '.join(headline.split()))
+    return (snippet
+            .replace(HIGHLIGHT_START, '<mark>')
+            .replace(HIGHLIGHT_STOP, '</mark>'))
+
+
+def hits_query(model, search_type: SearchType, tsquery, viewer_id: UUID):
+    """
+    Подходящие запросу документы одной таблицы, видимые пользователю:
+    публичные и свои.
+    """
+    return (select(literal(search_type.value).label("type"),
+                   model.id,
+                   func.ts_rank(model.search_vector, tsquery,
+                                RANK_NORMALIZATION).label("rank"))
+            .where(model.search_vector.bool_op("@@")(tsquery),
+                   or_(model.is_public, model.author_id == viewer_id)))
+
+
+async def search(
+        session: AsyncSession,
+        text: str,
+        viewer_id: UUID,
+        pagination: SearchPagination,
+        search_type: SearchType | None = None
+) -> Page[SearchHit]:
+    """
+    Страница результатов поиска по убыванию ранга.
+
+    Keyset-пагинация по ключу (rank, id): ранг считается для всех
+    найденных по индексу документов, но сортировка и фрагменты -
+    только для страницы.
+
+    :param text: строка запроса в синтаксисе websearch_to_tsquery
+    :param viewer_id: пользователь, которому видны свои приватные документы
+    :param search_type: искать только конспекты или только заметки
+    """
+    tsquery = func.websearch_to_tsquery(CONFIG, text)
+    parts = []
+    if search_type in (None, SearchType.SUMMARY):
+        parts.append(hits_query(
+            SummaryModel, SearchType.SUMMARY, tsquery, viewer_id))
+    if search_type in (None, SearchType.NOTE):
+        parts.append(hits_query(
+            NoteModel, SearchType.NOTE, tsquery, viewer_id))
+    hits = union_all(*parts).subquery()
+
+    page = select(hits).order_by(hits.c.rank.desc(), hits.c.id.desc())
+    if pagination.cursor is not None:
+        page = page.where(
+            tuple_(hits.c.rank, hits.c.id) < tuple_(*pagination.cursor))
+    # На одну строку больше, чтобы узнать, есть ли следующая страница
+    page = page.limit(pagination.limit + 1).subquery()
+
+    summary = and_(page.c.type == SearchType.SUMMARY.value,
+                   SummaryModel.id == page.c.id)
+    note = and_(page.c.type == SearchType.NOTE.value,
+                NoteModel.id == page.c.id)
+    document = func.coalesce(
+        SummaryModel.content, NoteModel.intro + "\n" + NoteModel.text, "")
+    query = (
+        select(page.c.type, page.c.id, page.c.rank,
+               func.coalesce(SummaryModel.name, NoteModel.title)
+               .label("title"),
+               func.coalesce(SummaryModel.created_at, NoteModel.created_at)
+               .label("created_at"),
+               func.ts_headline(CONFIG, document, tsquery, HEADLINE_OPTIONS)
+               .label("headline"),
+               User.id.label("author_id"), User.username)
+        .select_from(page)
+        .outerjoin(SummaryModel, summary)
+        .outerjoin(NoteModel, note)
+        .join(User, User.id == func.coalesce(
+            SummaryModel.author_id, NoteModel.author_id))
+        .order_by(page.c.rank.desc(), page.c.id.desc())
+    )
+    rows = (await session.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > pagination.limit:
+        rows = rows[:pagination.limit]
+        next_cursor = encode_search_cursor(rows[-1].rank, rows[-1].id)
+    items = [
+        SearchHit(
+            type=row.type, id=row.id, title=row.title,
+            snippet=make_snippet(row.headline), created_at=row.created_at,
+            author=dict(id=row.author_id, username=row.username)
+        )
+        for row in rows
+    ]
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def normalize_suggest_text(text: str) -> str:
+    """
+    Строка подсказки без лишних пробелов и регистра: одинаковые
+    по смыслу запросы попадают в один ключ кэша.
+    """
+    return ' '.join(text.lower().split())
+
+
+def escape_like(text: str) -> str:
+    return (text.replace('\\', '\\\\')
+            .replace('%', '\\%')
+            .replace('_', '\\_'))
+
+
+def suggest_query(kind: str, id, column, text: str, limit: int, *where):
+    """
+    Подсказки по одной колонке: имена, начинающиеся с text, и имена
+    со словом, похожим на text (word_similarity). Оба условия проверяются
+    по триграммному GIN индексу колонки, регистр не учитывается.
+    """
+    starts_with = column.ilike(escape_like(text) + '%')
+    score = func.word_similarity(text, column)
+    return (select(literal(kind).label("kind"), id.label("id"),
+                   column.label("name"), starts_with.label("starts_with"),
+                   score.label("score"))
+            .where(or_(starts_with, literal(text).bool_op("<%")(column)),
+                   *where)
+            .order_by(starts_with.desc(), score.desc(), column)
+            .limit(limit))
+
+
+async def suggest(session: AsyncSession, text: str, limit: int) -> Suggestions:
+    """
+    Подсказки пользователей и публичных конспектов одним запросом.
+    Сначала имена, начинающиеся с text, затем по убыванию похожести.
+
+    :param text: нормализованная строка, см. normalize_suggest_text
+    """
+    query = union_all(
+        suggest_query("user", User.id, User.username, text, limit),
+        suggest_query("summary", SummaryModel.id, SummaryModel.name, text,
+                      limit, SummaryModel.is_public),
+    )
+    rows = sorted((await session.execute(query)).all(),
+                  key=lambda row: (not row.starts_with, -row.score, row.name))
+    return Suggestions(
+        users=[dict(id=row.id, username=row.name)
+               for row in rows if row.kind == "user"],
+        summaries=[dict(id=row.id, name=row.name)
+                   for row in rows if row.kind == "summary"],
+    )
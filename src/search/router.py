@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.config import current_active_verified_user
+from src.auth.models import User
+from src.cache import cached_response
+from src.config import config
+from src.database import get_async_session
+from src.pagination import Page
+from src.search.constants import MAX_SUGGEST_LIMIT, SUGGEST_LIMIT, SearchType
+from src.search.dependencies import search_pagination_params
+from src.search.logic import (
+    SearchPagination, normalize_suggest_text, search, suggest
+)
+from src.search.schemas import SearchHit, Suggestions
+
+
+router_search = APIRouter(prefix='/search', tags=['search'])
+
+
+@router_search.get('')
+async def search_documents(
+    q: str = Query(min_length=1, max_length=256),
+    type: SearchType | None = None,
+    pagination: SearchPagination = Depends(search_pagination_params),
+    user: User = Depends(current_active_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Page[SearchHit]:
+    """
+    Полнотекстовый поиск по публичным и своим конспектам и заметкам.
+
+    Запрос: слова, "фраза", слово OR слово, -слово. Результаты
+    отсортированы по релевантности, у каждого есть фрагменты текста
+    с совпадениями в <mark>. Следующая страница - по next_cursor.
+    """
+    return await search(session, q, user.id, pagination, type)
+
+
+@router_search.get('/suggest')
+async def suggest_names(
+    q: str = Query(min_length=1, max_length=64),
+    limit: int = Query(SUGGEST_LIMIT, ge=1, le=MAX_SUGGEST_LIMIT),
+    user: User = Depends(current_active_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Suggestions:
+    """
+    Подсказки при вводе: пользователи и публичные конспекты, имя которых
+    начинается с q или содержит похожее слово. Ответ одинаков для всех
+    пользователей и кэшируется на config.SUGGEST_CACHE_EXPIRE секунд,
+    поэтому частые префиксы не доходят до базы.
+    """
+    text = normalize_suggest_text(q)
+    if not text:
+        return Suggestions(users=[], summaries=[])
+    return await cached_response(
+        'search:suggest', dict(q=text, limit=limit), [],
+        lambda: suggest(session, text, limit),
+        Suggestions,
+        expire=config.SUGGEST_CACHE_EXPIRE
+    )
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from pydantic import UUID4, BaseModel
+
+from src.auth.schemas import ShortUser
+from src.search.constants import SearchType
+
+
+class SearchHit(BaseModel):
+    """
+    Результат поиска: конспект или заметка.
+
+    snippet - фрагменты текста, совпадения выделены тегом <mark>,
+    остальной текст экранирован.
+    """
+    type: SearchType
+    id: UUID4
+    title: str
+    snippet: str
+    created_at: datetime
+    author: ShortUser
+
+
+class SummarySuggestion(BaseModel):
+    id: UUID4
+    name: str
+
+
+class Suggestions(BaseModel):
+    users: list[ShortUser]
+    summaries: list[SummarySuggestion]
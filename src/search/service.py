@@ -0,0 +1,30 @@
+import logging
+
+from src.database import async_session
+from src.summary.logic import BACKFILL_BATCH_SIZE, Summary
+
+
+logger = logging.getLogger('root')
+
+
+async def backfill_summary_content() -> None:
+    """
+    Индексирует для поиска конспекты, загруженные до его появления.
+
+    Запускается в фоне при старте приложения: файлы конспектов лежат
+    в static/ процесса приложения. Обрабатывает конспекты пачками
+    по BACKFILL_BATCH_SIZE, пока они не кончатся.
+    """
+    total = 0
+    try:
+        while True:
+            async with async_session() as session:
+                count = await Summary.backfill_content(session)
+                await session.commit()
+            total += count
+            if count < BACKFILL_BATCH_SIZE:
+                break
+    except Exception:
+        logger.exception('Summary search backfill failed')
+    if total:
+        logger.info(f'Summary search backfill: {total} summaries indexed')
@@ -0,0 +1,8 @@
+class FileTooLargeError(Exception):
+    status_code = 413
+    description = "Файл превышает допустимый размер"
+
+
+class RangeNotSatisfiableError(Exception):
+    status_code = 416
+    description = "Запрошенный диапазон за пределами файла"
@@ -0,0 +1,114 @@
+from collections import Counter
+from datetime import datetime
+import logging
+import os
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.storage.models import Blob as BlobModel, BlobCRUD
+from src.storage.utils import (
+    BLOBS_DIR, StagedFile, delete_blob_file, get_absolute_path, get_blob_path
+)
+
+
+logger = logging.getLogger('root')
+
+PURGE_BATCH_SIZE = 500
+
+
+class Blob:
+    crud = BlobCRUD
+
+    @classmethod
+    async def acquire(
+        cls, session: AsyncSession, staged: list[StagedFile]
+    ) -> None:
+        """
+        Добавляет ссылки на blob'ы одним INSERT ... ON CONFLICT.
+
+        Новые хеши создаются со счетчиком ссылок, у существующих
+        счетчик увеличивается. Строки блокируются до конца транзакции.
+        """
+        counts = Counter(file.hash for file in staged)
+        sizes = {file.hash: file.size for file in staged}
+        now = datetime.utcnow()
+        # Хеши сортируются, чтобы параллельные загрузки брали блокировки
+        # в одном порядке и не попадали в deadlock
+        query = insert(BlobModel).values([
+            dict(hash=hash, path=get_blob_path(hash), size=sizes[hash],
+                 ref_count=count, created_at=now, updated_at=now)
+            for hash, count in sorted(counts.items())
+        ])
+        query = query.on_conflict_do_update(
+            index_elements=[BlobModel.hash],
+            set_=dict(
+                ref_count=BlobModel.ref_count + query.excluded.ref_count,
+                updated_at=now
+            )
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def release(
+        cls, session: AsyncSession, hashes: list[str | None]
+    ) -> None:
+        """
+        Убирает ссылки на blob'ы.
+
+        Файлы не удаляются сразу: blob без ссылок может снова
+        понадобиться параллельной загрузке, удаление делает purge_unused.
+        Пустые хеши (файлы, загруженные до появления хранилища)
+        пропускаются.
+        """
+        counts = Counter(hash for hash in hashes if hash)
+        for hash, count in sorted(counts.items()):
+            await session.execute(
+                update(BlobModel)
+                .where(BlobModel.hash == hash)
+                .values(ref_count=BlobModel.ref_count - count)
+            )
+
+    @classmethod
+    async def purge_unused(
+        cls, session: AsyncSession, after: str | None = None,
+        batch_size: int = PURGE_BATCH_SIZE
+    ) -> tuple[int, str | None]:
+        """
+        Удаляет blob'ы без ссылок вместе с файлами.
+
+        Строки блокируются FOR UPDATE SKIP LOCKED: blob, на который
+        прямо сейчас ссылается загрузка, пропускается. Файл удаляется
+        под блокировкой, до коммита, поэтому загрузка того же содержимого
+        дождется коммита и разместит файл заново.
+
+        Строка удаляется, только если файла больше нет на диске. Blob,
+        файл которого удалить не удалось, остается до следующего запуска.
+        Если папки хранилища нет (процесс не видит файлы приложения),
+        ничего не удаляется.
+
+        :param after: хеш, после которого продолжить обход
+        :return: количество удаленных blob'ов и последний просмотренный
+            хеш (None, если просматривать больше нечего)
+        """
+        if not os.path.isdir(get_absolute_path(BLOBS_DIR)):
+            logger.error(f"Blob storage {BLOBS_DIR} not found, purge skipped")
+            return 0, None
+        query = (select(BlobModel)
+                 .where(BlobModel.ref_count == 0)
+                 .order_by(BlobModel.hash)
+                 .limit(batch_size)
+                 .with_for_update(skip_locked=True))
+        if after is not None:
+            query = query.where(BlobModel.hash > after)
+        blobs = (await session.scalars(query)).all()
+        if not blobs:
+            return 0, None
+        deleted = [blob.hash for blob in blobs
+                   if await delete_blob_file(blob.path)]
+        if deleted:
+            await session.execute(
+                delete(BlobModel).where(BlobModel.hash.in_(deleted)))
+            logger.info(f"Purged {len(deleted)} unused blobs")
+        return len(deleted), blobs[-1].hash
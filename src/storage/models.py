@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+from src.models import CRUDBase
+
+
+class Blob(Base):
+    """
+    Файл хранилища, адресуемый по sha256 содержимого.
+
+    Одинаковые файлы хранятся на диске один раз, ref_count - число строк
+    (конспектов, изображений), которые ссылаются на файл.
+    Файлы без ссылок удаляет периодическая задача purge_unused_blobs.
+    """
+    __tablename__ = "blob"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    path: Mapped[str] = mapped_column(String, unique=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Blob(hash={self.hash!r}, ref_count={self.ref_count!r})"
+
+
+Index("ix_blob_unused", Blob.hash, postgresql_where=Blob.ref_count == 0)
+
+
+class BlobCRUD(CRUDBase):
+    table = Blob
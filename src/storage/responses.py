@@ -0,0 +1,220 @@
+"""
+Ответы с содержимым файлов хранилища.
+"""
+from datetime import datetime
+import os
+import re
+from urllib.parse import quote
+
+import aiofiles.os
+import anyio
+from fastapi import Request, Response
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from src.cache import is_not_modified, not_modified
+from src.config import config
+from src.storage.constants import RangeNotSatisfiableError
+from src.storage.utils import get_absolute_path
+
+
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+def parse_range(
+        range_header: str | None, size: int
+) -> tuple[int, int] | None:
+    """
+    Диапазон байт из заголовка Range.
+
+    Поддерживается один диапазон: "bytes=0-499", "bytes=500-",
+    "bytes=-500". Несколько диапазонов и некорректный заголовок
+    игнорируются, файл отдается целиком - это допускает RFC 9110.
+
+    :return: (первый, последний) байт включительно или None
+    Исключения:
+    RangeNotSatisfiableError - если диапазон за пределами файла
+    """
+    if not range_header:
+        return None
+    match = RANGE_PATTERN.fullmatch(range_header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Последние end байт
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiableError
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse с поддержкой запросов Range и If-Range.
+
+    На запрос части файла отвечает 206 и читает с диска только эту часть,
+    на диапазон за пределами файла - 416. Файл целиком, если сервер
+    поддерживает расширение ASGI pathsend (Granian, NGINX Unit), отдается
+    самим сервером без чтения в Python. В Starlette это появилось только
+    в 0.37, поэтому расширение обрабатывается здесь.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            self.stat_result = await anyio.to_thread.run_sync(
+                os.stat, self.path)
+            self.set_stat_headers(self.stat_result)
+        size = self.stat_result.st_size
+        self.headers['accept-ranges'] = 'bytes'
+
+        request_headers = Headers(scope=scope)
+        byte_range = None
+        if self.range_applies(request_headers.get('if-range')):
+            try:
+                byte_range = parse_range(request_headers.get('range'), size)
+            except RangeNotSatisfiableError:
+                await self.send_unsatisfiable(send, size)
+                return
+        if byte_range is None:
+            if ('http.response.pathsend' in scope.get('extensions', {})
+                    and scope['method'].upper() != 'HEAD'):
+                await self.send_path(send)
+            else:
+                await super().__call__(scope, receive, send)
+            return
+
+        start, end = byte_range
+        self.status_code = 206
+        self.headers['content-range'] = f'bytes {start}-{end}/{size}'
+        self.headers['content-length'] = str(end - start + 1)
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers,
+        })
+        if scope['method'].upper() == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+        else:
+            await self.send_range(send, start, end)
+        if self.background is not None:
+            await self.background()
+
+    def range_applies(self, if_range: str | None) -> bool:
+        """
+        If-Range: часть файла отдается, только если файл не изменился
+        с тех пор, как клиент получил его начало.
+        """
+        if if_range is None:
+            return True
+        return if_range in (self.headers.get('etag'),
+                            self.headers.get('last-modified'))
+
+    async def send_path(self, send: Send) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers,
+        })
+        await send({'type': 'http.response.pathsend', 'path': str(self.path)})
+        if self.background is not None:
+            await self.background()
+
+    async def send_range(self, send: Send, start: int, end: int) -> None:
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode='rb') as file:
+            await file.seek(start)
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': bool(remaining),
+                })
+        if remaining:
+            # Файл укоротился во время отдачи
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_unsatisfiable(self, send: Send, size: int) -> None:
+        headers = [
+            (b'content-range', f'bytes */{size}'.encode()),
+            (b'content-length', b'0'),
+        ]
+        await send({
+            'type': 'http.response.start',
+            'status': RangeNotSatisfiableError.status_code,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def accel_redirect_response(
+        path: str, headers: dict[str, str], media_type: str,
+        filename: str | None = None
+) -> Response:
+    """
+    Пустой ответ с X-Accel-Redirect: файл по внутреннему адресу
+    config.FILES_ACCEL_REDIRECT_PREFIX + path отправит nginx (sendfile,
+    Range и условные запросы). Content-Type, Content-Disposition и
+    Cache-Control nginx берет из этого ответа.
+    """
+    headers = {
+        **headers,
+        'X-Accel-Redirect':
+            config.FILES_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(path),
+    }
+    if filename is not None:
+        headers['Content-Disposition'] = \
+            f"inline; filename*=utf-8''{quote(filename)}"
+    return Response(headers=headers, media_type=media_type)
+
+
+async def file_response(
+        request: Request, path: str, headers: dict[str, str],
+        media_type: str, filename: str | None = None
+) -> Response:
+    """
+    Ответ с файлом хранилища без чтения файла в обработчике.
+
+    Если задан config.FILES_ACCEL_REDIRECT_PREFIX, файл отдает nginx,
+    иначе RangeFileResponse. Если в headers есть ETag (у blob'а - его
+    sha256), условный запрос проверяется до обращения к диску, иначе -
+    по ETag из времени изменения и размера файла и Last-Modified.
+
+    :param path: путь к файлу относительно корня проекта
+    Исключения:
+    FileNotFoundError - если файла нет на диске
+    """
+    etag = headers.get('ETag')
+    if etag is not None and is_not_modified(request, etag):
+        return not_modified(headers)
+    if config.FILES_ACCEL_REDIRECT_PREFIX:
+        return accel_redirect_response(path, headers, media_type, filename)
+
+    absolute_path = get_absolute_path(path)
+    stat_result = await aiofiles.os.stat(absolute_path)
+    response = RangeFileResponse(
+        absolute_path, headers=headers, stat_result=stat_result,
+        media_type=media_type, filename=filename,
+        content_disposition_type='inline'
+    )
+    last_modified = datetime.utcfromtimestamp(stat_result.st_mtime)
+    if is_not_modified(request, response.headers['etag'], last_modified):
+        return not_modified({
+            **headers,
+            'ETag': response.headers['etag'],
+            'Last-Modified': response.headers['last-modified'],
+        })
+    return response
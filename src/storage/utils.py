@@ -0,0 +1,228 @@
+import asyncio
+from contextlib import suppress
+import glob
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import NamedTuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+
+from src.config import config
+from src.constants import get_project_root, new_uuid
+from src.storage.constants import FileTooLargeError
+
+
+logger = logging.getLogger('root')
+
+BLOBS_DIR = os.path.join("static", "blobs")
+STAGING_DIR = os.path.join(BLOBS_DIR, "tmp")
+BLOB_HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+# Сигнатуры форматов изображений из config.ALLOWED_EXTENSIONS:
+# у blob'ов нет расширения, тип определяется по первым байтам
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'image/png',
+    b'\xff\xd8\xff': 'image/jpeg',
+    b'GIF87a': 'image/gif',
+    b'GIF89a': 'image/gif',
+}
+
+
+class StagedFile(NamedTuple):
+    """Загруженный во временный файл, но еще не размещенный blob."""
+    hash: str
+    size: int
+    tmp_path: str
+
+
+def get_absolute_path(path: str) -> str:
+    """
+    Возвращает абсолютный путь по пути относительно корня проекта.
+    """
+    return os.path.join(get_project_root(), path)
+
+
+def get_blob_path(hash: str) -> str:
+    """
+    Возвращает относительный путь к файлу по sha256 его содержимого.
+
+    Файлы раскладываются по подпапкам по первым двум символам хеша,
+    чтобы в одной папке не копились сотни тысяч файлов.
+    """
+    return os.path.join(BLOBS_DIR, hash[:2], hash)
+
+
+def get_blob_hash(path: str) -> str | None:
+    """
+    sha256 содержимого по относительному пути blob'а.
+    None, если путь не из хранилища (файлы, загруженные до него).
+    """
+    directory, name = os.path.split(path)
+    if (BLOB_HASH_PATTERN.fullmatch(name)
+            and directory == os.path.join(BLOBS_DIR, name[:2])):
+        return name
+    return None
+
+
+async def guess_image_type(path: str) -> str:
+    """
+    MIME-тип изображения по расширению, а для blob'ов - по содержимому.
+
+    Исключения:
+    FileNotFoundError - если файла нет на диске
+    """
+    media_type = mimetypes.guess_type(path)[0]
+    if media_type is not None:
+        return media_type
+    async with aiofiles.open(get_absolute_path(path), 'rb') as f:
+        head = await f.read(8)
+    for signature, media_type in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return media_type
+    return 'application/octet-stream'
+
+
+async def stage_file(file: UploadFile) -> StagedFile:
+    """
+    Копирует загруженный файл во временный файл хранилища.
+
+    Файл копируется частями по config.UPLOAD_CHUNK_SIZE, поэтому в памяти
+    не держится весь файл. sha256 считается по ходу копирования.
+
+    Исключения:
+    FileTooLargeError - если файл больше config.MAX_CONTENT_LENGTH
+    """
+    if file.size is not None and file.size > config.MAX_CONTENT_LENGTH:
+        raise FileTooLargeError(file.filename)
+
+    await aiofiles.os.makedirs(get_absolute_path(STAGING_DIR), exist_ok=True)
+    tmp_path = get_absolute_path(
+        os.path.join(STAGING_DIR, f"{new_uuid()}.part"))
+    content_hash = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            while chunk := await file.read(config.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > config.MAX_CONTENT_LENGTH:
+                    raise FileTooLargeError(file.filename)
+                content_hash.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            await aiofiles.os.remove(tmp_path)
+        raise
+    return StagedFile(content_hash.hexdigest(), size, tmp_path)
+
+
+async def stage_files(files: list[UploadFile]) -> list[StagedFile]:
+    """
+    Копирует несколько файлов во временные файлы параллельно,
+    не больше config.UPLOAD_CONCURRENCY одновременно.
+
+    Если хотя бы один файл не скопировался, уже скопированные удаляются,
+    а ошибка пробрасывается дальше.
+    """
+    semaphore = asyncio.Semaphore(config.UPLOAD_CONCURRENCY)
+
+    async def stage(file: UploadFile) -> StagedFile:
+        async with semaphore:
+            return await stage_file(file)
+
+    results = await asyncio.gather(
+        *(stage(file) for file in files), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        await discard_staged(
+            [r for r in results if not isinstance(r, BaseException)])
+        raise errors[0]
+    return results
+
+
+async def place_blobs(staged: list[StagedFile]) -> list[str]:
+    """
+    Переносит временные файлы на место blob'ов.
+
+    Вызывать только после Blob.acquire в той же транзакции: блокировка
+    строки blob не дает purge_unused_blobs удалить файл одновременно с
+    размещением. Если файл с таким содержимым уже есть, временный
+    файл просто удаляется.
+
+    Если транзакция не закоммитится, размещенные файлы нужно удалить
+    discard_placed: строк blob для них не останется, и purge_unused_blobs
+    их не найдет.
+
+    :return: абсолютные пути файлов, размещенных этим вызовом
+    """
+    placed = []
+    try:
+        for file in staged:
+            path = get_absolute_path(get_blob_path(file.hash))
+            if await aiofiles.os.path.exists(path):
+                with suppress(FileNotFoundError):
+                    await aiofiles.os.remove(file.tmp_path)
+                continue
+            await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+            await aiofiles.os.replace(file.tmp_path, path)
+            placed.append(path)
+    except BaseException:
+        await discard_placed(placed)
+        raise
+    return placed
+
+
+async def discard_placed(placed: list[str]) -> None:
+    """Удаляет файлы, размещенные place_blobs в откаченной транзакции."""
+    for path in placed:
+        with suppress(FileNotFoundError):
+            await aiofiles.os.remove(path)
+
+
+async def discard_staged(staged: list[StagedFile]) -> None:
+    """Удаляет оставшиеся временные файлы."""
+    for file in staged:
+        with suppress(FileNotFoundError):
+            await aiofiles.os.remove(file.tmp_path)
+
+
+async def delete_derived_files(path: str) -> None:
+    """
+    Удаляет производные файлы, которые хранятся рядом с файлом
+    под именами <path>.* (например, результат рендеринга конспекта).
+    """
+    pattern = glob.escape(get_absolute_path(path)) + '.*'
+    for derived in await asyncio.to_thread(glob.glob, pattern):
+        with suppress(FileNotFoundError):
+            await aiofiles.os.remove(derived)
+
+
+async def delete_blob_file(path: str) -> bool:
+    """
+    Удаляет файл blob'а вместе с производными файлами.
+
+    :return: True, если файла больше нет на диске (удален или его
+        не было), False, если удалить не удалось
+    """
+    try:
+        await aiofiles.os.remove(get_absolute_path(path))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Ошибка при удалении blob {path}: {e}")
+        return False
+    await delete_derived_files(path)
+    return True
+
+
+async def delete_file(path: str) -> None:
+    try:
+        await aiofiles.os.remove(get_absolute_path(path))
+    except Exception as e:
+        logger.warning(
+            f"Ошибка при удалении файла {path.split('/')[-1]}: {e}"
+        )
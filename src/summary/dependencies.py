@@ -10,8 +10,7 @@ from src.auth.models import User
 from src.database import get_async_session
 from src.exceptions import ObjectNotFoundError
 from src.models import get_by_id
-from src.summary.constants import ImageNotFoundError, SummaryNotFoundError
-from src.summary.logic import Summary as SummaryLogic, SummaryImage as SummaryImageLogic
+from src.summary.constants import SummaryNotFoundError
 
 
 logger = logging.getLogger('root')
@@ -61,65 +60,3 @@ async def valid_user_id(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
-
-
-async def valid_summary_id(
-        summary_id: UUID4,
-        session: AsyncSession = Depends(get_async_session)
-) -> Mapping:
-    try:
-        summary = await SummaryLogic.get(session, summary_id)
-        return summary.id
-    except ObjectNotFoundError:
-        logger.info(f"Summary with id {summary_id} not found")
-        raise HTTPException(
-            status_code=SummaryNotFoundError.status_code,
-            detail=SummaryNotFoundError.description
-        )
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-
-
-async def valid_summary_id_obj(
-        summary_id: UUID4,
-        session: AsyncSession = Depends(get_async_session)
-) -> Mapping:
-    try:
-        return await SummaryLogic.get(session, summary_id)
-    except ObjectNotFoundError:
-        logger.info(f"Summary with id {summary_id} not found")
-        raise HTTPException(
-            status_code=SummaryNotFoundError.status_code,
-            detail=SummaryNotFoundError.description
-        )
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-
-
-async def valid_image_id_obj(
-        image_id: UUID4,
-        session: AsyncSession = Depends(get_async_session)
-) -> Mapping:
-    try:
-        image = await SummaryImageLogic.get(session, image_id)
-        return image
-    except ObjectNotFoundError:
-        logger.info(f"Image with id {image_id} not found")
-        raise HTTPException(
-            status_code=ImageNotFoundError.status_code,
-            detail=ImageNotFoundError.description
-        )
-    except Exception as e:
-        logger.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
\ No newline at end of file
@@ -1,11 +1,26 @@
+import asyncio
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import UUID4
-from sqlalchemy import delete, select
+from sqlalchemy import (
+    delete, exists, func, literal, select, union_all, update
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    joinedload, load_only, selectinload, with_expression
+)
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.auth.models import User
-from src.models import exactly_one, get_list
+from src.exceptions import ObjectNotFoundError
+from src.models import exactly_one, get_from_session, get_list
+from src.pagination import Page, Pagination, paginate
+from src.storage.logic import Blob
+from src.storage.utils import get_absolute_path, get_blob_path
+from src.summary.render import extract_search_text
 from src.summary.models import (
     SummaryCRUD, Summary as SummaryModel,
     SummaryImageCRUD, SummaryImage as SummaryImageModel, SummaryUserCRUD,
@@ -13,6 +28,37 @@ from src.summary.models import (
 )
 
 
+BACKFILL_BATCH_SIZE = 100
+
+# Профили загрузки связей под схемы ответов
+AUTHOR = joinedload(SummaryModel.author, innerjoin=True).load_only(
+    User.id, User.username)
+# Схема Summary: автор и изображения
+SUMMARY_DETAIL = (AUTHOR, selectinload(SummaryModel.images))
+# Схема ShortSummary: только нужные колонки и автор
+SHORT_SUMMARY = (
+    load_only(SummaryModel.id, SummaryModel.name, SummaryModel.summary_path),
+    AUTHOR,
+)
+# Схема PopularSummary: ShortSummary и счетчик избранного
+POPULAR_SUMMARY = (
+    load_only(SummaryModel.id, SummaryModel.name, SummaryModel.summary_path,
+              SummaryModel.favorite_count),
+    AUTHOR,
+)
+
+
+def is_favorited_by(user_id: UUID):
+    """
+    EXISTS по первичному ключу summary_user (user_id, summary_id):
+    в избранном ли конспект у пользователя.
+    """
+    return exists().where(
+        SummaryUserModel.user_id == user_id,
+        SummaryUserModel.summary_id == SummaryModel.id
+    )
+
+
 class Summary:
     crud = SummaryCRUD
 
@@ -21,37 +67,328 @@ class Summary:
         created_fields = dict(**kwargs)
         return await cls.crud.create(session, **created_fields)
 
+    @classmethod
+    async def create_many(
+        cls, session: AsyncSession, summaries: list[dict]
+    ) -> list[SummaryModel]:
+        return await cls.crud.create_many(session, summaries)
+
     @classmethod
     async def get(
           cls, session: AsyncSession, summary_id: UUID4) -> SummaryModel:
+        """
+        Конспект с автором и изображениями.
+        Загруженный в этом запросе конспект повторно не читается.
+        """
+        summary = get_from_session(
+            session, SummaryModel, summary_id, "author", "images")
+        if summary is not None:
+            return summary
+        query = (select(SummaryModel)
+                 .where(SummaryModel.id == summary_id)
+                 .options(*SUMMARY_DETAIL))
+        return await exactly_one(session, query)
+
+    @classmethod
+    async def get_plain(
+          cls, session: AsyncSession, summary_id: UUID4) -> SummaryModel:
+        """
+        Конспект без связей.
+        """
+        summary = get_from_session(session, SummaryModel, summary_id)
+        if summary is not None:
+            return summary
         return await cls.crud.get(session, "id", summary_id)
 
+    @classmethod
+    async def get_version(
+          cls, session: AsyncSession, summary_id: UUID4) -> Row:
+        """
+        Все, от чего зависит версия ответа Summary: updated_at, хеш файла
+        и username автора. Один запрос по первичному ключу, для ETag и
+        Last-Modified без сборки схемы.
+
+        Исключения:
+        ObjectNotFoundError - если конспекта нет
+        """
+        query = (select(SummaryModel.updated_at, SummaryModel.blob_hash,
+                        User.username)
+                 .join(User, User.id == SummaryModel.author_id)
+                 .where(SummaryModel.id == summary_id))
+        version = (await session.execute(query)).first()
+        if version is None:
+            raise ObjectNotFoundError
+        return version
+
+    @classmethod
+    async def get_file_access(
+          cls, session: AsyncSession, path: str, user_id: UUID | None
+    ) -> Row | None:
+        """
+        Права на файл по пути из summary_path или SummaryImage.path.
+
+        Одинаковый файл хранится один раз и может принадлежать нескольким
+        конспектам и изображениям: он публичный, если публичен хотя бы
+        один из ссылающихся конспектов, и свой, если пользователь - автор
+        хотя бы одного из них.
+
+        :return: строка (is_summary, is_public, is_owner) или None,
+            если файла нет ни у одного конспекта и изображения
+        """
+        is_owner = (SummaryModel.author_id == user_id
+                    if user_id is not None else literal(False))
+        files = union_all(
+            select(literal(True).label("is_summary"),
+                   SummaryModel.is_public,
+                   is_owner.label("is_owner"))
+            .where(SummaryModel.summary_path == path),
+            select(literal(False), SummaryModel.is_public, is_owner)
+            .join(SummaryImageModel,
+                  SummaryImageModel.summary_id == SummaryModel.id)
+            .where(SummaryImageModel.path == path),
+        ).subquery()
+        query = select(
+            func.bool_or(files.c.is_summary).label("is_summary"),
+            func.bool_or(files.c.is_public).label("is_public"),
+            func.bool_or(files.c.is_owner).label("is_owner"),
+        )
+        access = (await session.execute(query)).one()
+        return access if access.is_summary is not None else None
+
+    @classmethod
+    async def get_id(cls, session: AsyncSession, summary_id: UUID4) -> UUID:
+        """
+        Проверка существования конспекта по индексу первичного ключа.
+        """
+        if get_from_session(session, SummaryModel, summary_id) is not None:
+            return summary_id
+        query = select(SummaryModel.id).where(SummaryModel.id == summary_id)
+        return await exactly_one(session, query)
+
     @classmethod
     async def get_list(
-        cls, session: AsyncSession, user_id: UUID | None = None,
-        is_public: bool | None = None, username: str | None = None
-    ) -> list[SummaryModel]:
-        query = select(SummaryModel).order_by(SummaryModel.created_at.desc())
+        cls, session: AsyncSession, pagination: Pagination,
+        user_id: UUID | None = None, is_public: bool | None = None,
+        username: str | None = None, viewer_id: UUID | None = None
+    ) -> Page:
+        """
+        Страница конспектов с автором и изображениями.
+
+        :param viewer_id: если передан, у конспектов заполняется
+            is_favorited для этого пользователя подзапросом в том же SELECT
+        """
+        query = select(SummaryModel).options(*SUMMARY_DETAIL)
+        if viewer_id:
+            query = query.options(with_expression(
+                SummaryModel.is_favorited, is_favorited_by(viewer_id)))
         if user_id:
             query = query.filter(SummaryModel.author_id == user_id)
         if is_public is not None:
-            query = query.filter(SummaryModel.is_public == is_public)
+            # Без параметра в условии, чтобы подходил частичный индекс
+            # по публичным записям
+            query = query.filter(
+                SummaryModel.is_public if is_public else ~SummaryModel.is_public)
         if username:
             query = query.join(User).filter(User.username == username)
+        return await paginate(
+            session, query, pagination,
+            SummaryModel.created_at, SummaryModel.id
+        )
+
+    @classmethod
+    async def get_public_many(
+        cls, session: AsyncSession, ids: list[UUID]
+    ) -> list[SummaryModel]:
+        """
+        Публичные конспекты по списку id в порядке списка.
+        Удаленные и ставшие приватными конспекты пропускаются.
+        """
+        query = (select(SummaryModel)
+                 .where(SummaryModel.id.in_(ids), SummaryModel.is_public)
+                 .options(*POPULAR_SUMMARY))
+        summaries = {
+            summary.id: summary for summary in await get_list(session, query)
+        }
+        return [summaries[id] for id in ids if id in summaries]
+
+    @classmethod
+    def popular_query(cls, limit: int):
+        # Порядок совпадает с индексом ix_summary_public_favorite_count_id
+        return (select(SummaryModel)
+                .where(SummaryModel.is_public,
+                       SummaryModel.favorite_count > 0)
+                .order_by(SummaryModel.favorite_count.desc(),
+                          SummaryModel.id.desc())
+                .limit(limit))
+
+    @classmethod
+    async def get_popular(
+        cls, session: AsyncSession, limit: int
+    ) -> list[SummaryModel]:
+        """
+        Самые популярные публичные конспекты по данным базы.
+        """
+        query = cls.popular_query(limit).options(*POPULAR_SUMMARY)
         return await get_list(session, query)
 
     @classmethod
-    async def delete(cls, session: AsyncSession, summary_id: UUID4) -> None:
-        await cls.crud.delete(session, "id", summary_id)
+    async def get_popular_scores(
+        cls, session: AsyncSession, limit: int
+    ) -> list[tuple[UUID, int]]:
+        """
+        Пары (id, favorite_count) для пересборки рейтинга в Redis.
+        """
+        query = cls.popular_query(limit).with_only_columns(
+            SummaryModel.id, SummaryModel.favorite_count)
+        return [tuple(row) for row in await session.execute(query)]
 
     @classmethod
-    async def update(
-        cls, session: AsyncSession, summary_id: UUID4, new_summary
-    ) -> None:
+    async def change_favorite_count(
+        cls, session: AsyncSession, summary_ids: list[UUID], delta: int
+    ) -> list[Row]:
+        """
+        Атомарно меняет счетчики избранного конспектов на delta.
+        updated_at не меняется: сами конспекты не изменились.
+
+        :return: строки с id, новыми favorite_count и is_public
+        """
+        if not summary_ids:
+            return []
+        query = (update(SummaryModel)
+                 .where(SummaryModel.id.in_(summary_ids))
+                 .values(favorite_count=SummaryModel.favorite_count + delta,
+                         updated_at=SummaryModel.updated_at)
+                 .returning(SummaryModel.id, SummaryModel.favorite_count,
+                            SummaryModel.is_public))
+        return (await session.execute(query)).all()
+
+    @classmethod
+    async def reconcile_favorite_count(cls, session: AsyncSession) -> int:
+        """
+        Исправляет счетчики, разошедшиеся с summary_user (например, после
+        каскадного удаления пользователя).
+
+        :return: число исправленных конспектов
+        """
+        count = (select(func.count())
+                 .where(SummaryUserModel.summary_id == SummaryModel.id)
+                 .scalar_subquery())
+        result = await session.execute(
+            update(SummaryModel)
+            .where(SummaryModel.favorite_count != count)
+            .values(favorite_count=count, updated_at=SummaryModel.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @classmethod
+    async def backfill_content(
+        cls, session: AsyncSession, batch_size: int = BACKFILL_BATCH_SIZE
+    ) -> int:
+        """
+        Извлекает текст для поиска у конспектов, загруженных до его
+        появления. Строки блокируются FOR UPDATE SKIP LOCKED: несколько
+        процессов приложения не обрабатывают один конспект дважды.
+        Конспект без файла получает пустой текст. updated_at не меняется.
+
+        :return: число обработанных конспектов
+        """
+        rows = (await session.execute(
+            select(SummaryModel.id, SummaryModel.summary_path)
+            .where(SummaryModel.content.is_(None))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )).all()
+        for summary_id, summary_path in rows:
+            try:
+                content = await asyncio.to_thread(
+                    extract_search_text, get_absolute_path(summary_path))
+            except FileNotFoundError:
+                content = ''
+            await session.execute(
+                update(SummaryModel)
+                .where(SummaryModel.id == summary_id)
+                .values(content=content, updated_at=SummaryModel.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        return len(rows)
+
+    @classmethod
+    async def delete_owned(
+        cls, session: AsyncSession, summary_id: UUID4, author_id: UUID
+    ) -> Row | None:
+        """
+        Удаление конспекта его автором одним запросом.
+
+        :return: строка с blob_hash удаленного конспекта или None,
+            если конспекта нет или автор другой
+        """
+        # Изображения удаляются каскадно в базе, их ссылки на файлы
+        # нужно снять вместе со ссылкой самого конспекта
+        image_hashes = (await session.scalars(
+            select(SummaryImageModel.blob_hash)
+            .where(SummaryImageModel.summary_id == summary_id)
+        )).all()
+        summary = await cls.crud.delete_owned(
+            session, summary_id, author_id, SummaryModel.blob_hash)
+        if summary is not None:
+            await Blob.release(session, [summary.blob_hash, *image_hashes])
+        return summary
+
+    @staticmethod
+    def get_updated_fields(new_summary) -> dict:
         updated_fields = new_summary.model_dump(exclude_unset=True)
         updated_fields["name"] = updated_fields["name"] + ".md"
-        return await cls.crud.update(
-            session, "id", summary_id, **updated_fields)
+        return updated_fields
+
+    @classmethod
+    async def update_owned(
+        cls, session: AsyncSession, summary_id: UUID4, author_id: UUID,
+        new_summary
+    ) -> SummaryModel | None:
+        """
+        Обновление конспекта его автором одним запросом.
+        None, если конспекта нет или автор другой.
+        """
+        return await cls.crud.update_owned(
+            session, summary_id, author_id,
+            **cls.get_updated_fields(new_summary)
+        )
+
+    @classmethod
+    async def touch_owned(
+        cls, session: AsyncSession, summary_id: UUID4, author_id: UUID
+    ) -> SummaryModel | None:
+        """
+        Обновляет updated_at конспекта автора. Строка блокируется
+        до конца транзакции, конспект не удалят параллельно.
+        None, если конспекта нет или автор другой.
+        """
+        return await cls.crud.update_owned(
+            session, summary_id, author_id, updated_at=datetime.utcnow())
+
+    @classmethod
+    async def load_detail(
+        cls, session: AsyncSession, summary: SummaryModel
+    ) -> SummaryModel:
+        """
+        Догружает автора и изображения конспекта для схемы Summary.
+        Автор берется из базы по author_id: пользователь запроса может
+        быть собран из токена доступа без профиля.
+        """
+        author = get_from_session(session, User, summary.author_id)
+        if author is None:
+            author = await session.scalar(
+                select(User).options(load_only(User.id, User.username))
+                .where(User.id == summary.author_id)
+            )
+        images = (await session.scalars(
+            select(SummaryImageModel)
+            .where(SummaryImageModel.summary_id == summary.id)
+        )).all()
+        set_committed_value(summary, "author", author)
+        set_committed_value(summary, "images", list(images))
+        return summary
 
 
 class SummaryImage:
@@ -65,12 +402,59 @@ class SummaryImage:
             session, path=file_path, summary_id=summary_id)
 
     @classmethod
-    async def get(cls, session: AsyncSession, image_id) -> SummaryImageModel:
-        return await cls.crud.get(session, "id", image_id)
+    async def create_many(
+        cls, session: AsyncSession, summary_id, hashes: list[str]
+    ) -> list[SummaryImageModel]:
+        images = await cls.crud.create_many(session, [
+            dict(path=get_blob_path(hash), blob_hash=hash,
+                 summary_id=summary_id)
+            for hash in hashes
+        ])
+        # Загруженный в этом запросе конспект видит новые изображения
+        # без повторного чтения
+        summary = get_from_session(
+            session, SummaryModel, summary_id, "images")
+        if summary is not None:
+            set_committed_value(summary, "images", [*summary.images, *images])
+        return images
+
+    @classmethod
+    async def get(
+        cls, session: AsyncSession, image_id, summary_id=None
+    ) -> SummaryImageModel:
+        """
+        Изображение с автором конспекта для проверки прав.
+        Если передан summary_id, изображение должно принадлежать конспекту.
+        """
+        query = select(SummaryImageModel).where(
+            SummaryImageModel.id == image_id)
+        if summary_id is not None:
+            query = query.where(SummaryImageModel.summary_id == summary_id)
+        query = (query
+                 .options(
+                     joinedload(SummaryImageModel.summary, innerjoin=True)
+                     .load_only(SummaryModel.author_id)))
+        return await exactly_one(session, query)
 
     @classmethod
-    async def delete(cls, session: AsyncSession, image_id) -> None:
-        await cls.crud.delete(session, "id", image_id)
+    async def delete_owned(
+        cls, session: AsyncSession, image_id: UUID, summary_id: UUID,
+        author_id: UUID
+    ) -> Row | None:
+        """
+        Удаление изображения конспекта его автором одним запросом.
+
+        :return: строка с path и blob_hash удаленного изображения или None,
+            если изображения нет в конспекте или автор другой
+        """
+        image = await cls.crud.delete_owned(
+            session, image_id, author_id,
+            SummaryImageModel.path, SummaryImageModel.blob_hash,
+            summary_id=summary_id
+        )
+        if image is not None:
+            await Blob.release(session, [image.blob_hash])
+        return image
 
 
 class SummaryUser:
@@ -79,27 +463,91 @@ class SummaryUser:
     @classmethod
     async def create(
         cls, session: AsyncSession, summary_id: UUID, user_id: UUID
-    ) -> SummaryUserModel | None:
-        query = (select(SummaryUserModel)
-                 .where((SummaryUserModel.user_id == user_id) &
-                        (SummaryUserModel.summary_id == summary_id)))
+    ) -> tuple[SummaryUserModel | None, Row | None]:
+        """
+        Добавление в избранное одним INSERT ... ON CONFLICT DO NOTHING.
+        Счетчик конспекта увеличивается в той же транзакции,
+        только если строка действительно добавлена.
 
-        favorite_instance = (await session.execute(query)).first()
-        if favorite_instance:
-            return None
-        return await cls.crud.create(
+        :return: запись избранного и строка счетчика
+            (см. Summary.change_favorite_count) или (None, None),
+            если конспект уже в избранном
+
+        Исключения:
+        IntegrityError - если конспекта нет
+        """
+        favorite = await cls.crud.upsert(
             session, summary_id=summary_id, user_id=user_id)
+        if favorite is None:
+            return None, None
+        counters = await Summary.change_favorite_count(
+            session, [summary_id], 1)
+        return favorite, counters[0]
 
     @classmethod
     async def delete(
         cls, session: AsyncSession, summary_id: UUID, user_id: UUID
-    ) -> None:
-        query = delete(SummaryUserModel).where(
-            (SummaryUserModel.user_id == user_id) &
-            (SummaryUserModel.summary_id == summary_id)
-        )
-        await session.execute(query)
-        await session.flush()
+    ) -> tuple[SummaryUserModel | None, Row | None]:
+        """
+        Удаление из избранного одним DELETE ... RETURNING.
+        Счетчик конспекта уменьшается в той же транзакции.
+
+        :return: удаленная запись и строка счетчика или (None, None),
+            если конспекта не было в избранном
+        """
+        favorite = await cls.crud.delete_returning(
+            session, summary_id=summary_id, user_id=user_id)
+        if favorite is None:
+            return None, None
+        counters = await Summary.change_favorite_count(
+            session, [summary_id], -1)
+        return favorite, counters[0]
+
+    @classmethod
+    async def create_many(
+        cls, session: AsyncSession, summary_ids: list[UUID], user_id: UUID
+    ) -> list[Row]:
+        """
+        Добавление нескольких конспектов в избранное одним
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+        Несуществующие и уже добавленные конспекты пропускаются.
+
+        :return: строки счетчиков добавленных конспектов
+            (см. Summary.change_favorite_count)
+        """
+        if not summary_ids:
+            return []
+        rows = (select(SummaryModel.id,
+                       literal(user_id, SummaryUserModel.user_id.type),
+                       literal(datetime.utcnow(),
+                               SummaryUserModel.created_at.type))
+                .where(SummaryModel.id.in_(summary_ids)))
+        query = (pg_insert(SummaryUserModel)
+                 .from_select(["summary_id", "user_id", "created_at"], rows)
+                 .on_conflict_do_nothing(
+                     index_elements=["user_id", "summary_id"])
+                 .returning(SummaryUserModel.summary_id))
+        added = (await session.scalars(query)).all()
+        return await Summary.change_favorite_count(session, added, 1)
+
+    @classmethod
+    async def delete_many(
+        cls, session: AsyncSession, summary_ids: list[UUID], user_id: UUID
+    ) -> list[Row]:
+        """
+        Удаление нескольких конспектов из избранного одним
+        DELETE ... RETURNING. Конспекты не из избранного пропускаются.
+
+        :return: строки счетчиков удаленных конспектов
+        """
+        if not summary_ids:
+            return []
+        query = (delete(SummaryUserModel)
+                 .where(SummaryUserModel.user_id == user_id,
+                        SummaryUserModel.summary_id.in_(summary_ids))
+                 .returning(SummaryUserModel.summary_id))
+        removed = (await session.scalars(query)).all()
+        return await Summary.change_favorite_count(session, removed, -1)
 
     @classmethod
     async def get(
@@ -113,11 +561,14 @@ class SummaryUser:
 
     @classmethod
     async def get_list(
-        cls, session: AsyncSession, user_id: UUID
-    ) -> list[SummaryModel]:
+        cls, session: AsyncSession, user_id: UUID, pagination: Pagination
+    ) -> Page:
         query = (select(SummaryModel)
                  .join(SummaryUserModel,
                        SummaryUserModel.summary_id == SummaryModel.id)
                  .where(SummaryUserModel.user_id == user_id)
-        ).order_by(SummaryUserModel.created_at.desc())
-        return await get_list(session, query)
\ No newline at end of file
+                 .options(*SHORT_SUMMARY))
+        return await paginate(
+            session, query, pagination,
+            SummaryUserModel.created_at, SummaryUserModel.summary_id
+        )
\ No newline at end of file
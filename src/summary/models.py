@@ -1,13 +1,18 @@
 from datetime import datetime
 import uuid
 
-from sqlalchemy import (TIMESTAMP, UUID, Boolean, Column, ForeignKey,
-                        String, Table, text)
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (TIMESTAMP, UUID, Boolean, Column, Computed,
+                        ForeignKey, Index, String, Table, Text, exists, text)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import (
+    Mapped, mapped_column, query_expression, relationship
+)
 
 from src.constants import new_uuid
 from src.database import Base, metadata
 from src.models import CRUDBase, MixinID
+from src.search.constants import SEARCH_CONFIG
+from src.storage.models import Blob
 
 
 # summary_users = Table(
@@ -22,14 +27,17 @@ class SummaryUser(Base):
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    # Отдельный индекс для подсчета избранного по конспекту:
+    # первичный ключ начинается с user_id
     summary_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("summary.id", ondelete="CASCADE"), primary_key=True)
+        ForeignKey("summary.id", ondelete="CASCADE"), primary_key=True,
+        index=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     summary = relationship(
-        "Summary", back_populates="favorite_users", lazy=False)
+        "Summary", back_populates="favorite_users", lazy="raise")
     user = relationship(
-        "User", back_populates="favorite_summaries", lazy=False)
+        "User", back_populates="favorite_summaries", lazy="raise")
 
 
 class SummaryUserCRUD(CRUDBase):
@@ -40,13 +48,16 @@ class SummaryImage(Base):
     __tablename__ = "summary_image"
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=new_uuid)
-    path: Mapped[str] = mapped_column(unique=True)
+    # Индекс для проверки доступа к файлу по пути (маршрут /files)
+    path: Mapped[str] = mapped_column(index=True)
+    blob_hash: Mapped[str | None] = mapped_column(
+        ForeignKey(Blob.hash, ondelete="RESTRICT"), index=True)
     created_at: Mapped[datetime] = mapped_column(
         default=datetime.utcnow)
     summary_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("summary.id", ondelete="CASCADE"))
+        ForeignKey("summary.id", ondelete="CASCADE"), index=True)
 
-    summary = relationship("Summary", back_populates="images", lazy=False)
+    summary = relationship("Summary", back_populates="images", lazy="raise")
 
     def __str__(self):
         return f"SummaryImage(path={self.path})"
@@ -61,17 +72,29 @@ class SummaryImage(Base):
 class SummaryImageCRUD(CRUDBase):
     table = SummaryImage
 
+    @classmethod
+    def owned_by(cls, owner_id):
+        # Изображение принадлежит автору конспекта
+        return exists().where(
+            Summary.id == SummaryImage.summary_id,
+            Summary.author_id == owner_id
+        )
+
 
 class Summary(Base):
     __tablename__ = "summary"
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=new_uuid)
     name: Mapped[str] = mapped_column(String(256), default='Not name')
-    summary_path: Mapped[str] = mapped_column(String, unique=True)
+    summary_path: Mapped[str] = mapped_column(String, index=True)
+    blob_hash: Mapped[str | None] = mapped_column(
+        ForeignKey(Blob.hash, ondelete="RESTRICT"), index=True)
+    # Связи не загружаются неявно (lazy="raise"): что подгрузить,
+    # каждый запрос указывает сам, см. профили загрузки в logic.py
     images: Mapped[list[SummaryImage] | None] = relationship(
         back_populates="summary",
         cascade="all, delete-orphan",
-        lazy=False
+        lazy="raise"
     )
     is_public: Mapped[bool] = mapped_column(default=False)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
@@ -79,13 +102,63 @@ class Summary(Base):
         default=datetime.utcnow, onupdate=datetime.utcnow)
     author_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("user.id",
                                                             ondelete="CASCADE"))
+    # Число пользователей, добавивших конспект в избранное.
+    # Меняется вместе с summary_user, расхождения исправляет
+    # задача reconcile_favorite_counts
+    favorite_count: Mapped[int] = mapped_column(
+        default=0, server_default=text("0"))
+    # В избранном ли конспект у текущего пользователя. Не колонка:
+    # вычисляется в запросе списка, см. Summary.get_list в logic.py
+    is_favorited: Mapped[bool | None] = query_expression()
+    # Текст конспекта без разметки для поиска, заполняется при загрузке
+    # (сам файл на диске). Большой, поэтому не загружается в объект
+    content: Mapped[str | None] = mapped_column(
+        Text, deferred=True, deferred_raiseload=True)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+            "coalesce(content, '')), 'B')",
+            persisted=True
+        ),
+        deferred=True, deferred_raiseload=True
+    )
 
-    author = relationship("User", back_populates="summaries", lazy=False)
+    author = relationship("User", back_populates="summaries", lazy="raise")
     favorite_users = relationship(
         "SummaryUser",
         back_populates="summary"
     )
 
 
+# Индексы под keyset-пагинацию списков (см. src/pagination.py):
+# сортировка по (created_at, id) берется из индекса без Sort.
+Index("ix_summary_created_at_id",
+      Summary.created_at.desc(), Summary.id.desc())
+Index("ix_summary_author_id_created_at_id",
+      Summary.author_id, Summary.created_at.desc(), Summary.id.desc())
+Index("ix_summary_public_created_at_id",
+      Summary.created_at.desc(), Summary.id.desc(),
+      postgresql_where=Summary.is_public)
+# Рейтинг популярных публичных конспектов, если он не взят из Redis
+Index("ix_summary_public_favorite_count_id",
+      Summary.favorite_count.desc(), Summary.id.desc(),
+      postgresql_where=Summary.is_public)
+# Полнотекстовый поиск, см. src/search/logic.py
+Index("ix_summary_search_vector", Summary.search_vector,
+      postgresql_using="gin")
+# Подсказки по части названия публичного конспекта
+Index("ix_summary_public_name_trgm", Summary.name, postgresql_using="gin",
+      postgresql_ops={"name": "gin_trgm_ops"},
+      postgresql_where=Summary.is_public)
+# Конспекты, текст которых еще не извлечен, см. Summary.backfill_content
+Index("ix_summary_content_missing", Summary.id,
+      postgresql_where=Summary.content.is_(None))
+Index("ix_summary_user_user_id_created_at",
+      SummaryUser.user_id, SummaryUser.created_at.desc(),
+      SummaryUser.summary_id.desc())
+
+
 class SummaryCRUD(CRUDBase):
     table = Summary
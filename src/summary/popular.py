@@ -0,0 +1,89 @@
+"""
+Рейтинг публичных конспектов по числу добавлений в избранное.
+
+Рейтинг хранится в Redis в сортированном множестве: элемент - id
+конспекта, счет - его favorite_count. После коммита изменений избранного
+или самого конспекта в множество записывается значение счетчика из базы,
+а не приращение, поэтому повторы и пропуски не накапливаются. Хранятся
+только первые config.POPULAR_SUMMARIES_SIZE мест. Полностью множество
+пересобирает задача reconcile_favorite_counts.
+При недоступности Redis запись пропускается, а чтение возвращает пустой
+список - рейтинг берется из базы.
+"""
+import logging
+from typing import Iterable
+from uuid import UUID
+
+from fastapi_cache import FastAPICache
+
+from src.cache import get_redis
+from src.config import config
+
+
+logger = logging.getLogger('root')
+
+
+def make_popular_key() -> str:
+    return f'{FastAPICache.get_prefix()}:summary:popular'
+
+
+async def update_scores(rows: Iterable[tuple[UUID, int, bool]]) -> None:
+    """
+    Записывает в рейтинг текущие счетчики конспектов одной транзакцией.
+    Приватные конспекты и конспекты без избранного из рейтинга убираются.
+
+    :param rows: тройки (id, favorite_count, is_public)
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    try:
+        key = make_popular_key()
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for summary_id, favorite_count, is_public in rows:
+                if is_public and favorite_count > 0:
+                    pipe.zadd(key, {str(summary_id): favorite_count})
+                else:
+                    pipe.zrem(key, str(summary_id))
+            pipe.zremrangebyrank(key, 0, -config.POPULAR_SUMMARIES_SIZE - 1)
+            await pipe.execute()
+    except Exception:
+        logger.warning('Popular summaries update failed', exc_info=True)
+
+
+async def update_score(
+        summary_id: UUID, favorite_count: int, is_public: bool
+) -> None:
+    await update_scores([(summary_id, favorite_count, is_public)])
+
+
+async def remove(summary_id: UUID) -> None:
+    await update_score(summary_id, 0, False)
+
+
+async def get_top(limit: int) -> list[UUID]:
+    """
+    id первых limit конспектов рейтинга.
+    Пустой список, если рейтинг еще не собран или Redis недоступен.
+    """
+    try:
+        ids = await get_redis().zrevrange(make_popular_key(), 0, limit - 1)
+    except Exception:
+        logger.warning('Popular summaries are unavailable', exc_info=True)
+        return []
+    return [UUID(id) for id in ids]
+
+
+async def rebuild(scores: Iterable[tuple[UUID, int]]) -> None:
+    """
+    Заменяет рейтинг целиком одной транзакцией Redis.
+
+    :param scores: пары (id, favorite_count) первых мест рейтинга
+    """
+    key = make_popular_key()
+    mapping = {str(id): count for id, count in scores}
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        if mapping:
+            pipe.zadd(key, mapping)
+        await pipe.execute()
@@ -0,0 +1,216 @@
+"""
+Рендеринг конспектов из Markdown в HTML.
+
+Результат (очищенный HTML, оглавление и отрывок) один раз считается
+при загрузке и хранится рядом с исходным файлом в JSON. Файлы конспектов
+неизменяемы (имя blob'а - sha256 содержимого), поэтому результат
+рендеринга не устаревает. При изменении вывода нужно увеличить
+RENDERER_VERSION: старые результаты перестанут находиться и будут
+посчитаны заново при первом запросе.
+"""
+import asyncio
+from contextlib import suppress
+import hashlib
+import json
+import logging
+import os
+import re
+
+import aiofiles
+import aiofiles.os
+from markdown_it import MarkdownIt
+import nh3
+
+from src.constants import new_uuid
+from src.search.constants import SEARCH_TEXT_MAX_LENGTH
+from src.storage.utils import get_absolute_path
+
+
+logger = logging.getLogger('root')
+
+RENDERER_VERSION = 1
+EXCERPT_LENGTH = 300
+
+# Сырой HTML в Markdown не пропускается парсером, nh3 дополнительно
+# оставляет только перечисленные теги, атрибуты и схемы ссылок
+ALLOWED_TAGS = {
+    'a', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 's', 'strong',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    **{f'h{level}': {'id'} for level in range(1, 7)},
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'code': {'class'},
+    'ol': {'start'},
+    'td': {'style'},
+    'th': {'style'},
+}
+URL_SCHEMES = {'http', 'https', 'mailto'}
+
+markdown = (MarkdownIt('commonmark', {'html': False})
+            .enable('table')
+            .enable('strikethrough'))
+
+
+def get_rendered_path(source_path: str) -> str:
+    """
+    Относительный путь к результату рендеринга рядом с исходным файлом.
+    """
+    return f'{source_path}.r{RENDERER_VERSION}.json'
+
+
+def make_rendered_etag(source_hash: str) -> str:
+    return f'"{source_hash}.r{RENDERER_VERSION}"'
+
+
+def make_slug(title: str, used: dict[str, int]) -> str:
+    """
+    id заголовка для ссылок из оглавления, уникальный в пределах документа.
+    """
+    slug = re.sub(r'[^\w\s-]', '', title.lower()).strip()
+    slug = re.sub(r'[\s-]+', '-', slug) or 'section'
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return slug if not count else f'{slug}-{count}'
+
+
+def make_excerpt(text: str) -> str:
+    text = ' '.join(text.split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH].rsplit(' ', 1)[0]
+    return cut + '…'
+
+
+def render_markdown(text: str) -> dict:
+    """
+    Рендерит Markdown в очищенный HTML.
+
+    :return: словарь с html, оглавлением toc (level, id, title)
+        и текстовым отрывком excerpt из первых абзацев
+    """
+    tokens = markdown.parse(text)
+    toc, used, paragraphs = [], {}, []
+    excerpt_length = 0
+    for i, token in enumerate(tokens):
+        if token.type == 'heading_open':
+            title = tokens[i + 1].content
+            slug = make_slug(title, used)
+            token.attrSet('id', slug)
+            toc.append(dict(level=int(token.tag[1]), id=slug, title=title))
+        elif (token.type == 'paragraph_open'
+                and excerpt_length <= EXCERPT_LENGTH):
+            content = ''.join(
+                child.content for child in tokens[i + 1].children or []
+                if child.type in ('text', 'code_inline')
+            )
+            paragraphs.append(content)
+            excerpt_length += len(content)
+    html = nh3.clean(
+        markdown.renderer.render(tokens, markdown.options, {}),
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=URL_SCHEMES,
+    )
+    return dict(html=html, toc=toc, excerpt=make_excerpt(' '.join(paragraphs)))
+
+
+def markdown_to_text(text: str) -> str:
+    """
+    Текст Markdown без разметки: заголовки, абзацы, ячейки таблиц,
+    подписи изображений и блоки кода, каждый с новой строки.
+    """
+    parts = []
+    for token in markdown.parse(text):
+        if token.type == 'inline':
+            parts.append(''.join(
+                child.content for child in token.children or []
+                if child.type in ('text', 'code_inline', 'image')
+            ))
+        elif token.type in ('fence', 'code_block'):
+            parts.append(token.content)
+    return '\n'.join(part for part in parts if part)
+
+
+def extract_search_text(path: str) -> str:
+    """
+    Текст файла конспекта для поиска, не длиннее
+    SEARCH_TEXT_MAX_LENGTH символов.
+    Синхронная функция, вызывать в отдельном потоке.
+
+    :param path: абсолютный путь к файлу
+    """
+    with open(path, 'rb') as f:
+        # В UTF-8 символ занимает не больше 4 байт
+        source = f.read(SEARCH_TEXT_MAX_LENGTH * 4)
+    text = markdown_to_text(source.decode('utf-8', errors='ignore'))
+    # NUL недопустим в строках Postgres
+    return text[:SEARCH_TEXT_MAX_LENGTH].replace('\x00', '')
+
+
+def render_file(source_path: str, source_hash: str | None = None) -> bytes:
+    """
+    Рендерит файл конспекта и сохраняет результат рядом с ним.
+    Синхронная функция, вызывать в отдельном потоке.
+
+    :param source_path: относительный путь к файлу конспекта
+    :param source_hash: sha256 содержимого, если известен
+    :return: JSON результата
+    """
+    with open(get_absolute_path(source_path), 'rb') as f:
+        source = f.read()
+    rendered = render_markdown(source.decode('utf-8', errors='replace'))
+    content = json.dumps(dict(
+        source_hash=source_hash or hashlib.sha256(source).hexdigest(),
+        **rendered
+    ), ensure_ascii=False).encode()
+
+    # Запись через временный файл: параллельный читатель не увидит
+    # недописанный результат
+    path = get_absolute_path(get_rendered_path(source_path))
+    tmp_path = f'{path}.{new_uuid()}.part'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return content
+
+
+async def get_rendered(
+        source_path: str, source_hash: str | None = None
+) -> bytes:
+    """
+    Сохраненный результат рендеринга или новый, если его еще нет
+    (конспекты, загруженные до появления рендеринга).
+    """
+    try:
+        async with aiofiles.open(
+                get_absolute_path(get_rendered_path(source_path)), 'rb'
+        ) as f:
+            return await f.read()
+    except FileNotFoundError:
+        return await asyncio.to_thread(render_file, source_path, source_hash)
+
+
+async def render_many(sources: list[tuple[str, str | None]]) -> None:
+    """
+    Рендерит загруженные конспекты в фоне после ответа на загрузку.
+    Ошибки только журналируются: при запросе результат будет
+    посчитан заново.
+
+    :param sources: пары (путь к файлу, sha256 содержимого)
+    """
+    for source_path, source_hash in dict(sources).items():
+        rendered_path = get_absolute_path(get_rendered_path(source_path))
+        if await aiofiles.os.path.exists(rendered_path):
+            continue
+        try:
+            await asyncio.to_thread(render_file, source_path, source_hash)
+        except Exception:
+            logger.exception(f'Render failed, {source_path}')
@@ -1,40 +1,63 @@
+import asyncio
+import json
 import logging
-from typing import Mapping
+from typing import Mapping, NoReturn
 from uuid import UUID
 
 from fastapi import (
-    APIRouter, Depends, HTTPException, Request, Response, status,
-    UploadFile, File
+    APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request,
+    Response, status, UploadFile, File
 )
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.auth.config import current_active_verified_user
+from src.auth.config import (
+    current_active_verified_user, current_optional_verified_user
+)
 from src.auth.models import User
 from src.auth.logic import User as UserLogic
+from src.config import config
+from src.cache import (
+    SUMMARY_LIST_TAG, cached_response, favorites_tag, http_date, invalidate,
+    is_not_modified, make_etag, not_modified, summary_tag, user_tag
+)
 from src.exceptions import ObjectNotFoundError
-from src.summary.utils import (
-    allowed_file, allowed_type_image, allowed_type_summary, delete_file,
-    get_file_path, get_filename,
-    save_file, secure_filename
+from src.summary.utils import allowed_type_image, allowed_type_summary
+from src.database import commit, get_async_session
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page, Pagination, pagination_params
+)
+from src.summary.constants import (
+    FilesNotFoundError, ImageNotFoundError, SummaryNotFoundError,
+    SummaryUserNotFoundError
 )
-from src.database import get_async_session
-from src.summary.constants import FilesNotFoundError, SummaryNotFoundError, SummaryUserNotFoundError
-from src.summary.dependencies import (
-    valid_image_id_obj, valid_summary_id, valid_summary_id_obj,
-    valid_user_id, valid_username
+from src.summary.dependencies import valid_user_id, valid_username
+from src.summary import popular
+from src.summary.render import (
+    extract_search_text, get_rendered, make_rendered_etag, render_many
 )
 from src.summary.logic import (
     Summary, SummaryImage,
     SummaryUser
 )
+from src.storage.constants import FileTooLargeError
+from src.storage.logic import Blob
+from src.storage.responses import file_response
+from src.storage.utils import (
+    StagedFile, delete_file, discard_placed, discard_staged, get_blob_hash,
+    get_blob_path, guess_image_type, place_blobs, stage_files
+)
 from src.summary.schemas import (
-    ShortSummary, Summary as SummarySchema, SummaryUpdate, SummaryUser as SummaryUserSchema
+    FavoritesBatch, FavoritesBatchResult, PopularSummary, RenderedSummary,
+    ShortSummary, Summary as SummarySchema, SummaryItem, SummaryUpdate,
+    SummaryUser as SummaryUserSchema
 )
 
 
 logger = logging.getLogger('root')
 
 router_summary = APIRouter(prefix='/summary', tags=['summary'])
+router_files = APIRouter(prefix='/files', tags=['files'])
 
 
 # TODO: файл сохраняется с новым названием
@@ -43,8 +66,48 @@ router_summary = APIRouter(prefix='/summary', tags=['summary'])
 # TODO: путь к новому файлу(включая новое название + относительный главной папке путь) сохраняем в таблицу File в поле path
 
 
+async def raise_not_owned_summary(
+    session: AsyncSession, summary_id: UUID, user: User
+) -> NoReturn:
+    """
+    Запись с проверкой автора не затронула ни одной строки:
+    404, если конспекта нет, иначе 403.
+    """
+    try:
+        await Summary.get_id(session, summary_id)
+    except ObjectNotFoundError:
+        raise HTTPException(
+            status_code=SummaryNotFoundError.status_code,
+            detail=SummaryNotFoundError.description
+        )
+    logger.warning(f"User {user.id} is not author of summary {summary_id}")
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN
+    )
+
+
+async def stage_uploads(files: list[UploadFile]) -> list[StagedFile]:
+    """
+    Копирует загруженные файлы во временные файлы хранилища.
+    """
+    try:
+        return await stage_files(files)
+    except FileTooLargeError as e:
+        raise HTTPException(
+            status_code=FileTooLargeError.status_code,
+            detail=f'{FileTooLargeError.description} {e}'
+        )
+    except Exception as e:
+        logger.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router_summary.post('/upload')
 async def upload_summary(
+    background_tasks: BackgroundTasks,
     files: list[UploadFile] = File(...),
     all_public: bool = False,
     user: User = Depends(current_active_verified_user),
@@ -52,7 +115,10 @@ async def upload_summary(
 ):
     """
     Создание экземпляра и загрузка конспектов.
-    Файлы загружаются в папку id_пользователя/summary/.
+    Файлы сохраняются в static/blobs/ под именем sha256 содержимого,
+    одинаковые файлы хранятся на диске один раз. Текст без разметки
+    сохраняется в базе для поиска.
+    После ответа конспекты рендерятся в HTML в фоне.
     """
     for file in files:
         if not allowed_type_summary(file.filename):
@@ -60,77 +126,206 @@ async def upload_summary(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f'Недопустимый формат конспекта {file.filename}'
             )
-    for file in files:
-        safe_filename = secure_filename(file.filename)
-        filename = get_filename(safe_filename, user.id, 'summary')
-        file_path = get_file_path(filename, user.id, 'summary')
-        try:
-            new_summary = await Summary.create(
-                session,
-                name=file.filename,
-                summary_path=file_path,
-                author_id=user.id,
-                is_public=all_public
-            )
-            await session.commit()
-            # Если в бд был создан экземпляр
-            await Summary.get(session, new_summary.id)
-            # загружаем файл
-            await save_file(file, filename, user.id, 'summary')
-
-        except Exception as e:
-            logger.exception(e)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=str(e)
-            )
+    staged = await stage_uploads(files)
+    placed = []
+    try:
+        # Текст для поиска извлекается из временных файлов до транзакции
+        contents = await asyncio.gather(*(
+            asyncio.to_thread(extract_search_text, file.tmp_path)
+            for file in staged
+        ))
+        # Все экземпляры создаются одним INSERT в одной транзакции.
+        # Файлы размещаются под блокировкой строк blob и до коммита,
+        # при ошибке транзакция откатывается, а размещенные файлы
+        # удаляются.
+        async with commit(session):
+            await Blob.acquire(session, staged)
+            await Summary.create_many(session, [
+                dict(
+                    name=file.filename,
+                    summary_path=get_blob_path(staged_file.hash),
+                    blob_hash=staged_file.hash,
+                    content=content,
+                    author_id=user.id,
+                    is_public=all_public
+                )
+                for file, staged_file, content in zip(files, staged, contents)
+            ])
+            placed = await place_blobs(staged)
+    except Exception as e:
+        await discard_placed(placed)
+        logger.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    finally:
+        await discard_staged(staged)
 
+    await invalidate(SUMMARY_LIST_TAG)
+    background_tasks.add_task(render_many, [
+        (get_blob_path(file.hash), file.hash) for file in staged
+    ])
     return {'message': 'Файлы успешно загружены'}
 
 
 @router_summary.get('/favorites')
 async def get_favorite_summaries(
+    pagination: Pagination = Depends(pagination_params),
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
-) -> list[ShortSummary]:
+) -> Page[ShortSummary]:
     """
     Вывод избранных конспектов текущего пользователя.
+
+    Список отсортирован по времени добавления в избранное. Для получения
+    следующей страницы передать next_cursor в параметр cursor.
     """
-    summaries = await SummaryUser.get_list(session, user.id)
-    return summaries
+    return await SummaryUser.get_list(session, user.id, pagination)
+
+
+@router_summary.post('/favorites:batch')
+async def batch_favorites(
+    batch: FavoritesBatch,
+    user: User = Depends(current_active_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> FavoritesBatchResult:
+    """
+    Добавление и удаление нескольких конспектов в избранное
+    одним запросом.
+
+    Добавление выполняется одним INSERT, удаление одним DELETE,
+    все в одной транзакции. Несуществующие, уже добавленные и
+    отсутствующие в избранном конспекты пропускаются, в ответе только
+    конспекты, у которых избранное изменилось.
+    """
+    async with commit(session):
+        added = await SummaryUser.create_many(session, batch.add, user.id)
+        removed = await SummaryUser.delete_many(
+            session, batch.remove, user.id)
+    await invalidate(favorites_tag(user.id))
+    await popular.update_scores([*added, *removed])
+    return FavoritesBatchResult(
+        added=[row.id for row in added],
+        removed=[row.id for row in removed]
+    )
 
 
 @router_summary.get('/me')
 async def get_summary_me(
     user: User = Depends(current_active_verified_user),
     is_public: bool | None = None,
+    pagination: Pagination = Depends(pagination_params),
     session: AsyncSession = Depends(get_async_session)
-) -> list[SummarySchema]:
+) -> Page[SummaryItem]:
     """
     Получение всех конспектов текущего пользователя.
 
     Дополнительно можно отфильтровать по is_public.
+    Для получения следующей страницы передать next_cursor в параметр cursor.
     """
-    return await Summary.get_list(session, user.id, is_public)
+    return await Summary.get_list(
+        session, pagination, user.id, is_public, viewer_id=user.id)
+
+
+@router_summary.get('/popular')
+async def get_popular_summaries(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session)
+) -> list[PopularSummary]:
+    """
+    Самые популярные публичные конспекты по числу добавлений в избранное.
+
+    Доступно без авторизации, возвращаются только публичные конспекты.
+    Порядок берется из рейтинга в Redis, сами конспекты читаются
+    по первичному ключу. Если рейтинг пуст или Redis недоступен,
+    рейтинг строится по индексу в базе.
+    """
+    ids = await popular.get_top(limit)
+    if ids:
+        return await Summary.get_public_many(session, ids)
+    return await Summary.get_popular(session, limit)
 
 
 @router_summary.get('/{summary_id}')
 async def get_summary_by_id(
     summary_id: UUID,
+    request: Request,
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> SummarySchema:
     """
     Получение конспекта по id.
+
+    ETag и Last-Modified строятся из updated_at, хеша файла и username
+    автора. На условный запрос с той же версией возвращается 304 после
+    одного запроса по первичному ключу, без сборки ответа.
+    Ответ кэшируется в Redis по версии до изменения конспекта или
+    его автора.
     """
     try:
-        summary = await Summary.get(session, summary_id)
-        return summary
+        version = await Summary.get_version(session, summary_id)
     except ObjectNotFoundError:
         raise HTTPException(
             status_code=SummaryNotFoundError.status_code,
             detail=SummaryNotFoundError.description
         )
+    headers = {
+        'ETag': make_etag(summary_id, version.updated_at.isoformat(),
+                          version.blob_hash, version.username),
+        'Last-Modified': http_date(version.updated_at),
+        'Cache-Control': 'private, no-cache',
+    }
+    if is_not_modified(request, headers['ETag'], version.updated_at):
+        return not_modified(headers)
+    response = await cached_response(
+        'summary', dict(summary_id=summary_id, etag=headers['ETag']),
+        lambda summary: [summary_tag(summary.id),
+                         user_tag(summary.author.id)],
+        lambda: Summary.get(session, summary_id),
+        SummarySchema
+    )
+    response.headers.update(headers)
+    return response
+
+
+@router_summary.get('/{summary_id}/file')
+async def get_summary_file(
+    summary_id: UUID,
+    request: Request,
+    user: User = Depends(current_active_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    """
+    Содержимое файла конспекта (Markdown).
+
+    Доступно автору и всем для публичных конспектов. Поддерживаются
+    условные запросы и Range. ETag файла из хранилища - его sha256,
+    304 возвращается без обращения к диску.
+    """
+    try:
+        summary = await Summary.get_plain(session, summary_id)
+    except ObjectNotFoundError:
+        raise HTTPException(
+            status_code=SummaryNotFoundError.status_code,
+            detail=SummaryNotFoundError.description
+        )
+    if not summary.is_public and summary.author_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    headers = {'Cache-Control': 'private, no-cache'}
+    if summary.blob_hash is not None:
+        headers['ETag'] = f'"{summary.blob_hash}"'
+    try:
+        return await file_response(
+            request, summary.summary_path, headers,
+            media_type='text/markdown; charset=utf-8', filename=summary.name
+        )
+    except FileNotFoundError:
+        logger.error(f"Summary file {summary.summary_path} not found")
+        raise HTTPException(
+            status_code=FilesNotFoundError.status_code,
+            detail=FilesNotFoundError.description
+        )
 
 
 @router_summary.get('/')
@@ -138,9 +333,10 @@ async def get_summary(
     username: Mapping | None = Depends(valid_username),
     user_id: Mapping | None = Depends(valid_user_id),
     is_public: bool | None = None,
+    pagination: Pagination = Depends(pagination_params),
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
-) -> list[SummarySchema]:
+) -> Page[SummaryItem]:
     """
     Получение конспектов.
 
@@ -152,159 +348,310 @@ async def get_summary(
     Если указан параметр is_public, то возвращаются все конспекты с указанным
     параметром.
     Можно комбинировать.
+
+    Конспекты возвращаются страницами не больше limit элементов.
+    Для получения следующей страницы передать next_cursor в параметр cursor.
+
+    is_favorited отмечает конспекты из избранного текущего пользователя.
+
+    Страницы кэшируются в Redis для каждого пользователя до любого
+    изменения конспектов или его избранного.
     """
-    summaries = await Summary.get_list(
-        session, user_id, is_public, username
+    async def load() -> Page:
+        summaries = await Summary.get_list(
+            session, pagination, user_id, is_public, username,
+            viewer_id=user.id
+        )
+        if not summaries.items:
+            raise HTTPException(
+                status_code=SummaryNotFoundError.status_code,
+                detail=SummaryNotFoundError.description
+            )
+        return summaries
+
+    return await cached_response(
+        'summary:list',
+        dict(
+            username=username, user_id=user_id, is_public=is_public,
+            cursor=pagination.cursor, limit=pagination.limit,
+            viewer_id=user.id
+        ),
+        [SUMMARY_LIST_TAG, favorites_tag(user.id)],
+        load,
+        Page[SummaryItem]
     )
-    if not summaries:
+
+
+@router_summary.get('/{summary_id}/rendered', response_model=RenderedSummary)
+async def get_rendered_summary(
+    summary_id: UUID,
+    request: Request,
+    user: User = Depends(current_active_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    """
+    Конспект, отрендеренный в очищенный HTML, с оглавлением и отрывком.
+    Доступен автору и всем для публичных конспектов.
+
+    ETag ответа строится из sha256 файла конспекта. Если он совпадает
+    с If-None-Match, возвращается 304 без чтения файлов.
+    """
+    try:
+        summary = await Summary.get_plain(session, summary_id)
+    except ObjectNotFoundError:
         raise HTTPException(
             status_code=SummaryNotFoundError.status_code,
             detail=SummaryNotFoundError.description
         )
-    return summaries
+    if not summary.is_public and summary.author_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    headers = {'Cache-Control': 'private, no-cache'}
+    if summary.blob_hash is not None:
+        headers['ETag'] = make_rendered_etag(summary.blob_hash)
+        if is_not_modified(request, headers['ETag']):
+            return not_modified(headers)
+    try:
+        content = await get_rendered(summary.summary_path, summary.blob_hash)
+    except FileNotFoundError:
+        logger.error(f"Summary file {summary.summary_path} not found")
+        raise HTTPException(
+            status_code=FilesNotFoundError.status_code,
+            detail=FilesNotFoundError.description
+        )
+    if summary.blob_hash is None:
+        # Старые файлы без blob: хеш известен только из результата
+        headers['ETag'] = make_rendered_etag(
+            json.loads(content)['source_hash'])
+        if is_not_modified(request, headers['ETag']):
+            return not_modified(headers)
+    return Response(content, media_type='application/json', headers=headers)
 
 
 @router_summary.delete('/{summary_id}',
                        status_code=status.HTTP_204_NO_CONTENT)
 async def delete_summary(
-    summary_id: Mapping = Depends(valid_summary_id),
+    summary_id: UUID,
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ):
     """
     Удаление конспекта по id.
+    Права автора проверяются в том же DELETE.
     """
-    await Summary.delete(session, summary_id)
+    summary = await Summary.delete_owned(session, summary_id, user.id)
+    if summary is None:
+        await raise_not_owned_summary(session, summary_id, user)
     await session.commit()
+    await invalidate(summary_tag(summary_id), SUMMARY_LIST_TAG)
+    await popular.remove(summary_id)
 
 
 @router_summary.patch('/{summary_id}')
 async def update_summary(
+    summary_id: UUID,
     new_summary: SummaryUpdate,
-    summary: Mapping = Depends(valid_summary_id_obj),
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> SummarySchema:
     """
     Обновление конспекта по id.
+    Права автора проверяются в том же UPDATE.
     """
-    if summary.author_id != user.id:
-        logger.warning(
-            f"User {user.id} tried to update summary {summary.id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN
-        )
-    await Summary.update(session, summary.id, new_summary)
+    summary = await Summary.update_owned(
+        session, summary_id, user.id, new_summary)
+    if summary is None:
+        await raise_not_owned_summary(session, summary_id, user)
     await session.commit()
-    updated_summary = await Summary.get(session, summary.id)
-    return updated_summary
+    await invalidate(summary_tag(summary.id), SUMMARY_LIST_TAG)
+    # Конспект мог стать приватным или публичным
+    await popular.update_score(
+        summary.id, summary.favorite_count, summary.is_public)
+    return await Summary.load_detail(session, summary)
 
 
 @router_summary.post('/{summary_id}/images')
 async def add_images_to_summary(
-    summary: Mapping = Depends(valid_summary_id_obj),
+    summary_id: UUID,
     files: list[UploadFile] = File(...),
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> SummarySchema:
     """
     Добавление изображений в конспект.
+    Права автора проверяются UPDATE конспекта, который блокирует его
+    строку до конца транзакции.
     """
-    if summary.author_id != user.id:
-        logger.warning(
-            f"User {user.id} tried to add images to summary {summary.id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN
-        )
     for file in files:
         if not allowed_type_image(file.filename):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f'Invalid image format {file.filename}'
             )
-    for file in files:
-        safe_filename = secure_filename(file.filename)
-        filename = get_filename(safe_filename, user.id, 'image')
-        file_path = get_file_path(filename, user.id, 'image')
-        try:
-            new_image = await SummaryImage.create(
-                session, summary.id, file_path
-            )
-            await session.commit()
-            await SummaryImage.get(session, new_image.id)
-            await save_file(file, filename, user.id, 'image')
-        except Exception as e:
-            logger.exception(e)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=str(e)
+    staged = await stage_uploads(files)
+    placed = []
+    try:
+        async with commit(session):
+            summary = await Summary.touch_owned(session, summary_id, user.id)
+            if summary is None:
+                await raise_not_owned_summary(session, summary_id, user)
+            await Blob.acquire(session, staged)
+            await SummaryImage.create_many(
+                session, summary.id, [file.hash for file in staged]
             )
+            placed = await place_blobs(staged)
+    except HTTPException:
+        raise
+    except Exception as e:
+        await discard_placed(placed)
+        logger.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    finally:
+        await discard_staged(staged)
 
-    return await Summary.get(session, summary.id)
+    await invalidate(summary_tag(summary.id), SUMMARY_LIST_TAG)
+    return await Summary.load_detail(session, summary)
 
 
 @router_summary.delete('/{summary_id}/images/{image_id}',
                        status_code=status.HTTP_204_NO_CONTENT)
 async def delete_image_from_summary(
-    summary_id: Mapping = Depends(valid_summary_id),
-    image: Mapping = Depends(valid_image_id_obj),
+    summary_id: UUID,
+    image_id: UUID,
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> None:
     """
     Удаление изображения из конспекта.
+    Права автора проверяются в том же DELETE.
+    updated_at конспекта обновляется.
     """
-    if image.summary.author_id != user.id:
-        logger.warning(f"User {user.id} not owner of image {image.id}")
+    image = await SummaryImage.delete_owned(
+        session, image_id, summary_id, user.id)
+    if image is None:
+        try:
+            await SummaryImage.get(session, image_id, summary_id)
+        except ObjectNotFoundError:
+            raise HTTPException(
+                status_code=ImageNotFoundError.status_code,
+                detail=ImageNotFoundError.description
+            )
+        logger.warning(f"User {user.id} not owner of image {image_id}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN
         )
-    await SummaryImage.delete(session, image.id)
+    # Состав изображений входит в версию конспекта (ETag)
+    await Summary.touch_owned(session, summary_id, user.id)
     await session.commit()
-    await delete_file(image.path)
+    await invalidate(summary_tag(summary_id), SUMMARY_LIST_TAG)
+    # Файлы из хранилища удаляет purge_unused_blobs, когда на них
+    # не останется ссылок. Старые файлы без blob удаляются сразу.
+    if image.blob_hash is None:
+        await delete_file(image.path)
 
 
 @router_summary.get('/{summary_id}/favorite')
 async def add_summary_to_favorite(
-    summary_id: Mapping = Depends(valid_summary_id),
+    summary_id: UUID,
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> SummaryUserSchema:
     """
     Добавление конспекта в избранное.
+
+    Запрос идемпотентен: повторное добавление возвращает
+    уже существующую запись, счетчик избранного не меняется.
     """
-    new_favorite = await SummaryUser.create(
-        session, summary_id, user.id
-    )
-    if new_favorite is None:
+    try:
+        favorite, counter = await SummaryUser.create(
+            session, summary_id, user.id)
+    except IntegrityError:
+        # Внешний ключ: конспекта нет
+        await session.rollback()
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Конспект уже добавлен в избранное"
+            status_code=SummaryNotFoundError.status_code,
+            detail=SummaryNotFoundError.description
         )
+    if favorite is None:
+        return await SummaryUser.get(session, summary_id, user.id)
     await session.commit()
-    return new_favorite
+    await invalidate(favorites_tag(user.id))
+    await popular.update_scores([counter])
+    return favorite
 
 
 @router_summary.delete('/{summary_id}/favorite',
                        status_code=status.HTTP_204_NO_CONTENT)
 async def delete_summary_from_favorite(
-    summary_id: Mapping = Depends(valid_summary_id),
+    summary_id: UUID,
     user: User = Depends(current_active_verified_user),
     session: AsyncSession = Depends(get_async_session)
 ) -> None:
     """
     Удаление конспекта из избранного.
     """
-    try:
-        await SummaryUser.get(session, summary_id, user.id)
-    except ObjectNotFoundError:
+    favorite, counter = await SummaryUser.delete(
+        session, summary_id, user.id)
+    if favorite is None:
         raise HTTPException(
             status_code=SummaryUserNotFoundError.status_code,
             detail=SummaryUserNotFoundError.description
         )
-    await SummaryUser.delete(
-        session, summary_id, user.id
-    )
     await session.commit()
+    await invalidate(favorites_tag(user.id))
+    await popular.update_scores([counter])
+
+
+@router_files.get('/{path:path}')
+async def get_file(
+    path: str,
+    request: Request,
+    user: User | None = Depends(current_optional_verified_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    """
+    Файл конспекта или изображения по пути из summary_path или
+    images[].path.
+
+    Доступен всем, если хотя бы один конспект с этим файлом публичный,
+    иначе только автору. Файлы из static/blobs/ не меняются (имя - sha256
+    содержимого), поэтому кэшируются клиентами на config.FILES_MAX_AGE.
+    Тело отдается без чтения в обработчике, см. file_response.
+    """
+    access = await Summary.get_file_access(
+        session, path, user.id if user is not None else None)
+    if access is None:
+        raise HTTPException(
+            status_code=FilesNotFoundError.status_code,
+            detail=FilesNotFoundError.description
+        )
+    if not access.is_public and not access.is_owner:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if user is not None
+            else status.HTTP_401_UNAUTHORIZED
+        )
+    blob_hash = get_blob_hash(path)
+    if blob_hash is not None:
+        # Публичный файл кэшируется и прокси: если конспект станет
+        # приватным, их копии живут до истечения max-age
+        cache_scope = 'public' if access.is_public else 'private'
+        headers = {
+            'ETag': f'"{blob_hash}"',
+            'Cache-Control':
+                f'{cache_scope}, max-age={config.FILES_MAX_AGE}, immutable',
+        }
+    else:
+        headers = {'Cache-Control': 'private, no-cache'}
+    headers['X-Content-Type-Options'] = 'nosniff'
+    try:
+        media_type = ('text/markdown; charset=utf-8' if access.is_summary
+                      else await guess_image_type(path))
+        return await file_response(request, path, headers, media_type)
+    except FileNotFoundError:
+        logger.error(f"File {path} not found")
+        raise HTTPException(
+            status_code=FilesNotFoundError.status_code,
+            detail=FilesNotFoundError.description
+        )
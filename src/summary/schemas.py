@@ -1,8 +1,9 @@
 from datetime import datetime
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, ValidationInfo, field_validator
 
 from src.auth.schemas import ShortUser
+from src.pagination import MAX_PAGE_SIZE
 
 
 class SummaryImage(BaseModel):
@@ -46,3 +47,43 @@ class SummaryUser(BaseModel):
     summary_id: UUID4
     user_id: UUID4
     created_at: datetime
+
+
+class PopularSummary(ShortSummary):
+    favorite_count: int
+
+
+class SummaryItem(Summary):
+    # None, если отметка не вычислялась
+    is_favorited: bool | None = None
+
+
+class FavoritesBatch(BaseModel):
+    add: list[UUID4] = Field(default=[], max_length=MAX_PAGE_SIZE)
+    remove: list[UUID4] = Field(default=[], max_length=MAX_PAGE_SIZE)
+
+    @field_validator("remove")
+    def check_intersection(cls, v, values: ValidationInfo):
+        if set(v) & set(values.data.get("add", [])):
+            raise ValueError("Конспект не может быть в add и remove")
+        return v
+
+
+class FavoritesBatchResult(BaseModel):
+    # Только конспекты, у которых избранное действительно изменилось
+    added: list[UUID4]
+    removed: list[UUID4]
+
+
+class TocItem(BaseModel):
+    level: int
+    id: str
+    title: str
+
+
+class RenderedSummary(BaseModel):
+    # sha256 исходного файла
+    source_hash: str
+    html: str
+    toc: list[TocItem]
+    excerpt: str
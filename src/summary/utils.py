@@ -2,9 +2,6 @@ import logging
 import os
 import re
 from uuid import UUID
-import aiofiles
-
-from fastapi import UploadFile
 
 from src.config import config
 from src.constants import get_project_root
@@ -72,53 +69,3 @@ def allowed_type_image(filename: str) -> bool:
     """Проверяет, является ли формат изображения допустимым."""
     return ('.' in filename and filename.rsplit('.', 1)[1].lower()
             in {'png', 'jpg', 'jpeg', 'gif', 'svg'})
-
-
-def get_filename(filename: str, user_id: UUID, type: str = "other") -> str:
-    """
-    Проверяет уникальность имени файла.
-    Если имя уже существует, то добавляет к нему цифру.
-    """
-    counter = 1
-    while True:
-        if os.path.exists(get_absolute_file_path(filename, user_id, type)):
-            _filename = filename.rsplit(".")
-            filename = f'{_filename[0]}_{counter}.{_filename[1]}'
-            counter += 1
-        else:
-            break
-
-    return filename
-
-
-async def save_file(
-        file: UploadFile, filename: str, user_id: UUID,
-        type: str = "other"
-) -> None:
-    """
-    Сохраняет файл в директорию пользователя.
-
-    :param file: Загруженный файл.
-    :param filename: Безопасное имя файла.
-    :param user_id: Идентификатор пользователя.
-    :param type: Тип файла (модель).
-    :return: None
-
-    Создает директорию если ее нет.
-    """
-    dir_path = get_dir_path(user_id, type)
-
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-    async with aiofiles.open(get_absolute_file_path(filename, user_id, type), 'wb') as f:
-        await f.write(await file.read())
-
-
-async def delete_file(file_path):
-    try:
-        path = os.path.join(get_project_root(), file_path)
-        os.remove(path)
-    except Exception as e:
-        logger.warning(
-            f"Ошибка при удалении файла {file_path.split('/')[-1]}: {e}"
-        )
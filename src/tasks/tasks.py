@@ -1,8 +1,19 @@
+import asyncio
 import smtplib
 
 from celery import Celery
+from celery.schedules import crontab
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 
+from src.auth.logic import UserTokenVerify
 from src.config import config
+from src.database import async_session, commit, engine
+from src.notes.logic import Note
+from src.storage.logic import Blob
+from src.summary import popular
+from src.summary.logic import Summary
 from src.tasks.templates import (
     get_email_template_verify, get_email_template_register
 )
@@ -15,6 +26,35 @@ celery = Celery(
     broker_connection_retry_on_startup=True,
     backend=config.REDIS_URL + '/0'
 )
+celery.conf.beat_schedule = {
+    'purge-unused-blobs': {
+        'task': 'src.tasks.tasks.purge_unused_blobs',
+        'schedule': crontab(minute=0),
+    },
+    'purge-expired-verify-tokens': {
+        'task': 'src.tasks.tasks.purge_expired_verify_tokens',
+        'schedule': crontab(minute=30),
+    },
+    'reconcile-favorite-counts': {
+        'task': 'src.tasks.tasks.reconcile_favorite_counts',
+        'schedule': crontab(minute='*/10'),
+    },
+}
+
+
+def run_async(coroutine):
+    """
+    Запуск корутины из синхронной задачи celery.
+    Соединения закрываются после выполнения, т.к. каждый запуск
+    идет в новом event loop.
+    """
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
 
 
 @celery.task
@@ -37,3 +77,73 @@ def send_email_verify(username: str, user_email: str, token: str) -> None:
     with smtplib.SMTP_SSL(config.EMAIL_HOST, config.EMAIL_PORT) as server:
         server.login(config.SMTP_USER, config.SMTP_PASSWORD)
         server.send_message(email)
+
+
+async def _purge_unused_blobs() -> int:
+    purged = 0
+    after = None
+    async with async_session() as session:
+        while True:
+            async with commit(session):
+                count, after = await Blob.purge_unused(session, after)
+            purged += count
+            if after is None:
+                return purged
+
+
+@celery.task
+def purge_unused_blobs() -> int:
+    """
+    Удаление файлов хранилища, на которые не осталось ссылок.
+    Worker должен видеть папку static приложения, см. docker-compose.yml.
+    """
+    return run_async(_purge_unused_blobs())
+
+
+async def _purge_expired_verify_tokens() -> int:
+    purged = 0
+    async with async_session() as session:
+        while True:
+            async with commit(session):
+                count = await UserTokenVerify.purge_expired(session)
+            purged += count
+            if not count:
+                return purged
+
+
+@celery.task
+def purge_expired_verify_tokens() -> int:
+    """
+    Удаление токенов подтверждения с истекшим сроком.
+    """
+    return run_async(_purge_expired_verify_tokens())
+
+
+async def _reconcile_favorite_counts() -> int:
+    redis = aioredis.from_url(
+        config.REDIS_URL,
+        encoding="utf8",
+        decode_responses=True
+    )
+    # Рейтинг лежит в том же Redis и под тем же префиксом, что и в API
+    FastAPICache.init(RedisBackend(redis), prefix=config.CACHE_PREFIX)
+    try:
+        async with async_session() as session:
+            async with commit(session):
+                fixed = await Summary.reconcile_favorite_count(session)
+                fixed += await Note.reconcile_favorite_count(session)
+            scores = await Summary.get_popular_scores(
+                session, config.POPULAR_SUMMARIES_SIZE)
+        await popular.rebuild(scores)
+    finally:
+        await redis.aclose()
+    return fixed
+
+
+@celery.task
+def reconcile_favorite_counts() -> int:
+    """
+    Сверка счетчиков избранного с таблицами избранного
+    и пересборка рейтинга популярных конспектов в Redis.
+    """
+    return run_async(_reconcile_favorite_counts())
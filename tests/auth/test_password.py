@@ -0,0 +1,38 @@
+from passlib.context import CryptContext
+import pytest
+
+from src.auth.constants import PasswordHashQueueFullError
+from src.auth.password import PasswordHasher, password_hasher
+
+
+class TestPasswordHasher:
+
+    async def test_hash(self) -> None:
+        hashed = await password_hasher.hash("password")
+        assert await password_hasher.verify_and_update(
+            "password", hashed) == (True, None)
+        assert (await password_hasher.verify_and_update(
+            "wrong", hashed))[0] is False
+
+    async def test_upgrade(self) -> None:
+        """Хеш с меньшей стоимостью пересчитывается при проверке."""
+        old_hash = CryptContext(
+            schemes=["bcrypt"], bcrypt__default_rounds=4).hash("password")
+        verified, new_hash = await password_hasher.verify_and_update(
+            "password", old_hash)
+        assert verified
+        assert new_hash is not None
+        assert await password_hasher.verify_and_update(
+            "password", new_hash) == (True, None)
+
+    async def test_queue_full(self) -> None:
+        hasher = PasswordHasher(workers=1, queue_size=1)
+        try:
+            assert await hasher.run(pow, 2, 10) == 1024
+            hasher.stats.in_flight = 1
+            with pytest.raises(PasswordHashQueueFullError):
+                await hasher.run(pow, 2, 10)
+            assert hasher.stats.completed == 1
+            assert hasher.stats.rejected == 1
+        finally:
+            hasher.shutdown()
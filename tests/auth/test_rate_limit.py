@@ -0,0 +1,47 @@
+from fastapi import status
+from httpx import AsyncClient
+import pytest
+
+from src.auth.models import User
+from src.config import config
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+)
+
+
+class TestRateLimit:
+    api_version = "api/v1"
+    url_login = f"{api_version}/auth/login"
+    url_forgot = f"{api_version}/auth/forgot-password"
+
+    async def test_login_account(
+            self, ac: AsyncClient, verif_user: User,
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Подбор пароля к аккаунту ограничивается, другой аккаунт - нет."""
+        monkeypatch.setitem(
+            config.RATE_LIMITS, "login", {"ip": (10, 60), "account": (2, 60)})
+        data = {"username": verif_user.email, "password": "wrong"}
+        for _ in range(2):
+            response = await ac.post(self.url_login, data=data)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = await ac.post(self.url_login, data=data)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["retry-after"]) > 0
+
+        response = await ac.post(
+            self.url_login,
+            data={"username": "other@example.com", "password": "wrong"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_forgot_password_ip(
+            self, ac: AsyncClient, verif_user: User,
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setitem(config.RATE_LIMITS, "forgot-password", {"ip": (1, 60)})
+        response = await ac.post(self.url_forgot, json={"email": verif_user.email})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        response = await ac.post(
+            self.url_forgot, json={"email": "other@example.com"})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
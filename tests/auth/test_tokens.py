@@ -0,0 +1,106 @@
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    create_summary
+)
+
+
+class TestClaimsTokens:
+    api_version = "api/v1"
+    url_login = f"{api_version}/auth/token/login"
+    url_logout = f"{api_version}/auth/token/logout"
+    url_refresh = f"{api_version}/auth/token/refresh"
+    url_users = f"{api_version}/users"
+    url_summary = f"{api_version}/summary"
+    url_summary_me = f"{api_version}/summary/me"
+
+    async def login(self, ac: AsyncClient, user: User) -> dict:
+        response = await ac.post(
+            self.url_login,
+            data={"username": user.email, "password": "user_password"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    @staticmethod
+    def bearer(tokens: dict) -> dict:
+        return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    async def test_refresh(self, ac: AsyncClient, verif_user: User) -> None:
+        """Токен обновления выдает новую пару и повторно не принимается."""
+        tokens = await self.login(ac, verif_user)
+        response = await ac.get(self.url_summary_me, headers=self.bearer(tokens))
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await ac.post(
+            self.url_refresh, json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_200_OK
+        new_tokens = response.json()
+        response = await ac.get(
+            self.url_summary_me, headers=self.bearer(new_tokens))
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await ac.post(
+            self.url_refresh, json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_logout(self, ac: AsyncClient, verif_user: User) -> None:
+        """После выхода отозваны оба токена пары."""
+        tokens = await self.login(ac, verif_user)
+        response = await ac.post(self.url_logout, headers=self.bearer(tokens))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = await ac.get(self.url_summary_me, headers=self.bearer(tokens))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = await ac.post(
+            self.url_refresh, json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_revoked_on_update(
+            self, ac: AsyncClient, verif_user: User,
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Заблокированный пользователь теряет доступ и не обновляет токены."""
+        _, superuser_headers = auth_superuser
+        # Иначе запросы пойдут с cookie суперюзера
+        ac.cookies.clear()
+        tokens = await self.login(ac, verif_user)
+        response = await ac.patch(
+            f"{self.url_users}/{verif_user.id}",
+            json={"is_active": False},
+            headers=superuser_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await ac.get(self.url_summary_me, headers=self.bearer(tokens))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = await ac.post(
+            self.url_refresh, json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_summary_author(
+            self, ac: AsyncClient, verif_user: User
+    ) -> None:
+        """Автор в ответе читается из базы, а не из токена доступа."""
+        tokens = await self.login(ac, verif_user)
+        summary = await create_summary(verif_user, with_image=True)
+        response = await ac.patch(
+            f"{self.url_summary}/{summary.id}",
+            json={"name": "renamed", "is_public": True},
+            headers=self.bearer(tokens)
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["author"]["username"] == verif_user.username
+
+        response = await ac.post(
+            f"{self.url_summary}/{summary.id}/images",
+            files={"files": ("image.png", b"png", "image/png")},
+            headers=self.bearer(tokens)
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["author"]["username"] == verif_user.username
+        assert len(data["images"]) == 2
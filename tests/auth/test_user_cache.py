@@ -0,0 +1,73 @@
+import time
+
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.cache import LocalCache, get_cached_user, local_cache
+from src.auth.models import User
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+)
+
+
+class TestLocalCache:
+
+    def test_lru(self) -> None:
+        """Вытесняется давно не использованная запись."""
+        cache = LocalCache(size=2, expire=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expire(self, monkeypatch) -> None:
+        cache = LocalCache(size=2, expire=5)
+        cache.set("a", 1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+        assert cache.get("a") is None
+        assert not cache.items
+
+
+class TestUserCache:
+    api_version = "api/v1"
+    url_users = f"{api_version}/users"
+    url_summary_me = f"{api_version}/summary/me"
+
+    async def test_cached(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Пользователь запроса кэшируется без хеша пароля."""
+        user, headers = auth_verif_user
+        response = await ac.get(self.url_summary_me, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        cached = await get_cached_user(user.id)
+        assert cached.username == user.username
+        assert "hashed_password" not in cached.model_dump()
+
+        # Из Redis, когда в памяти процесса записи уже нет
+        local_cache.clear()
+        assert await get_cached_user(user.id) == cached
+
+    async def test_invalidated_on_update(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Заблокированный пользователь сразу теряет доступ."""
+        user, headers = auth_verif_user
+        _, superuser_headers = auth_superuser
+        response = await ac.get(self.url_summary_me, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await ac.patch(
+            f"{self.url_users}/{user.id}",
+            json={"is_active": False},
+            headers=superuser_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert await get_cached_user(user.id) is None
+        response = await ac.get(self.url_summary_me, headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
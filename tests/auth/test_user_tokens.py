@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.auth.logic import UserTokenVerify
+from src.auth.models import User
+from src.exceptions import ObjectNotFoundError
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    get_async_session_context
+)
+
+
+class TestUserTokenVerify:
+
+    async def test_replaced(self, user: User) -> None:
+        """Новый токен пользователя заменяет прежний в той же строке."""
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+        async with get_async_session_context() as session:
+            first = await UserTokenVerify.get_or_create(
+                session, user.id, "first", expires_at)
+            second = await UserTokenVerify.get_or_create(
+                session, user.id, "second", expires_at)
+            await session.commit()
+            assert second.id == first.id
+            assert (await UserTokenVerify.get(session, "second")).id == first.id
+            with pytest.raises(ObjectNotFoundError):
+                await UserTokenVerify.get(session, "first")
+
+    async def test_purge_expired(self, user: User, verif_user: User) -> None:
+        """Просроченный токен не находится и удаляется задачей."""
+        now = datetime.utcnow()
+        async with get_async_session_context() as session:
+            await UserTokenVerify.get_or_create(
+                session, user.id, "expired", now - timedelta(minutes=1))
+            await UserTokenVerify.get_or_create(
+                session, verif_user.id, "valid", now + timedelta(hours=1))
+            await session.commit()
+            with pytest.raises(ObjectNotFoundError):
+                await UserTokenVerify.get(session, "expired")
+
+            assert await UserTokenVerify.purge_expired(session) == 1
+            await session.commit()
+            assert await UserTokenVerify.purge_expired(session) == 0
+            assert await UserTokenVerify.get(session, "valid")
@@ -1,5 +1,6 @@
 import asyncio
 from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import AsyncGenerator
 
 from fastapi import status
@@ -8,16 +9,19 @@ from fastapi_cache.backends.redis import RedisBackend
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 import pytest
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from redis import asyncio as aioredis
 
+from src.auth.cache import local_cache as user_local_cache
 from src.auth.models import Permission, Role, User
 from src.config import config
 from src.database import (
     custom_serializer, get_async_session, metadata
 )
 from src.constants import new_uuid
+from src.summary.models import Summary, SummaryImage, SummaryUser
 from src.tasks.tasks import celery  # не убирать
 from src.main import app
 
@@ -94,8 +98,11 @@ async def redis() -> AsyncGenerator[aioredis.Redis, None]:
 
 
 @pytest.fixture(autouse=True, scope="function")
-def fastapi_cache(redis):
+async def fastapi_cache(redis):
     FastAPICache.init(RedisBackend(redis), prefix="test-cache")
+    # База пересоздается на каждый тест, кэш ответов тоже
+    await FastAPICache.clear()
+    user_local_cache.clear()
 
 
 get_async_session_context = asynccontextmanager(override_get_async_session)
@@ -103,6 +110,23 @@ get_user_db_context = asynccontextmanager(get_user_db)
 get_user_manager_context = asynccontextmanager(get_user_manager)
 
 
+@asynccontextmanager
+async def captured_queries() -> AsyncGenerator[list[tuple], None]:
+    """Собирает SELECT-запросы, отправленные в тестовую базу."""
+    queries = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append((statement, parameters))
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", listener)
+    try:
+        yield queries
+    finally:
+        event.remove(
+            engine_test.sync_engine, "before_cursor_execute", listener)
+
+
 async def create_user(
         email: str,
         password: str,
@@ -203,6 +227,38 @@ async def superuser(roles) -> User:
     )
 
 
+async def create_summary(
+        user: User,
+        name: str = "summary.md",
+        is_public: bool = True,
+        with_image: bool = False,
+        favorite: bool = False
+) -> Summary:
+    """
+    Создание конспекта программно для тестов.
+
+    :param with_image: добавить изображение, оно будет в summary.images
+    :param favorite: добавить конспект в избранное автора
+    """
+    async with get_async_session_context() as session:
+        summary = Summary(
+            name=name,
+            summary_path=f"static/{user.id}/summary/{name}",
+            author_id=user.id,
+            is_public=is_public,
+            images=[SummaryImage(path="static/image.png")]
+            if with_image else [],
+        )
+        session.add(summary)
+        if favorite:
+            await session.flush()
+            session.add(SummaryUser(
+                user_id=user.id, summary_id=summary.id,
+                created_at=datetime.utcnow()))
+        await session.commit()
+        return summary
+
+
 async def get_auth_headers(ac, data):
     response = await ac.post("api/v1/auth/login", data=data)
     assert response.status_code == status.HTTP_204_NO_CONTENT
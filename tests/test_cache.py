@@ -0,0 +1,115 @@
+from httpx import AsyncClient
+
+from fastapi import status
+
+from src.auth.models import User
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    create_summary
+)
+
+
+class TestResponseCache:
+    url = "api/v1/summary/"
+
+    async def test_list_is_cached(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Повторный запрос страницы отдается из кэша."""
+        user, headers = auth_verif_user
+        await create_summary(user)
+        first = await ac.get(self.url, headers=headers)
+        second = await ac.get(self.url, headers=headers)
+        assert first.headers["X-FastAPI-Cache"] == "MISS"
+        assert second.headers["X-FastAPI-Cache"] == "HIT"
+        assert first.json() == second.json()
+
+    async def test_query_params_in_key(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Страницы с разными параметрами кэшируются отдельно."""
+        user, headers = auth_verif_user
+        await create_summary(user, "first.md")
+        await create_summary(user, "second.md")
+        await ac.get(self.url, headers=headers)
+        response = await ac.get(
+            self.url, params={"limit": 1}, headers=headers
+        )
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+        assert len(response.json()["items"]) == 1
+
+    async def test_update_invalidates(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """После изменения конспекта кэш конспекта и списков сброшен."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        await ac.get(self.url, headers=headers)
+        await ac.get(f"{self.url}{summary.id}", headers=headers)
+        response = await ac.patch(
+            f"{self.url}{summary.id}",
+            json={"name": "renamed", "is_public": True},
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await ac.get(f"{self.url}{summary.id}", headers=headers)
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+        assert response.json()["name"] == "renamed.md"
+        response = await ac.get(self.url, headers=headers)
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+        assert response.json()["items"][0]["name"] == "renamed.md"
+
+    async def test_delete_invalidates(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Удаленный конспект не отдается из кэша."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        await ac.get(f"{self.url}{summary.id}", headers=headers)
+        response = await ac.delete(
+            f"{self.url}{summary.id}", headers=headers
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = await ac.get(f"{self.url}{summary.id}", headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestConditionalRequests:
+    url = "api/v1/summary/"
+
+    async def test_summary_not_modified(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Та же версия конспекта - 304, после изменения - новый ETag."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        url = f"{self.url}{summary.id}"
+        response = await ac.get(url, headers=headers)
+        etag = response.headers["etag"]
+        assert response.headers["last-modified"]
+
+        response = await ac.get(
+            url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["etag"] == etag
+
+        await ac.patch(url, json={"name": "renamed", "is_public": True},
+                       headers=headers)
+        response = await ac.get(
+            url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] != etag
+        assert response.json()["name"] == "renamed.md"
+
+    async def test_summary_file_private(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Файл приватного конспекта недоступен другим пользователям."""
+        user, _ = auth_verif_user
+        _, other_headers = auth_superuser
+        summary = await create_summary(user, "private.md", is_public=False)
+        response = await ac.get(
+            f"{self.url}{summary.id}/file", headers=other_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,203 @@
+import asyncio
+from uuid import uuid4
+
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from src.summary import popular
+from src.summary.logic import Summary as SummaryLogic
+from src.summary.models import SummaryUser
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    create_summary, get_async_session_context
+)
+
+
+class TestFavorites:
+    url = "api/v1/summary/"
+
+    async def test_add_is_idempotent(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Повторное добавление возвращает ту же запись."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        url = f"{self.url}{summary.id}/favorite"
+        first = await ac.get(url, headers=headers)
+        second = await ac.get(url, headers=headers)
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.json() == second.json()
+
+    async def test_concurrent_add(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Параллельные добавления не приводят к ошибке 500."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        url = f"{self.url}{summary.id}/favorite"
+        responses = await asyncio.gather(
+            *(ac.get(url, headers=headers) for _ in range(5)))
+        assert {response.status_code for response in responses} == {
+            status.HTTP_200_OK}
+
+    async def test_add_not_found(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Несуществующий конспект не добавляется."""
+        _, headers = auth_verif_user
+        response = await ac.get(
+            f"{self.url}{uuid4()}/favorite", headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_delete(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Удаление из избранного, повторное удаление - 404."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        url = f"{self.url}{summary.id}/favorite"
+        await ac.get(url, headers=headers)
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_favorite_count(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Счетчик меняется только при реальном добавлении и удалении."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        url = f"{self.url}{summary.id}/favorite"
+        await ac.get(url, headers=headers)
+        await ac.get(url, headers=headers)
+        async with get_async_session_context() as session:
+            assert (await SummaryLogic.get_plain(
+                session, summary.id)).favorite_count == 1
+        await ac.delete(url, headers=headers)
+        await ac.delete(url, headers=headers)
+        async with get_async_session_context() as session:
+            assert (await SummaryLogic.get_plain(
+                session, summary.id)).favorite_count == 0
+
+
+class TestPopular:
+    url = "api/v1/summary/"
+
+    async def test_popular(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """В рейтинге только публичные конспекты из избранного."""
+        user, headers = auth_verif_user
+        public = await create_summary(user)
+        private = await create_summary(user, is_public=False)
+        await create_summary(user)
+        for summary in (public, private):
+            await ac.get(f"{self.url}{summary.id}/favorite", headers=headers)
+
+        assert await popular.get_top(10) == [public.id]
+        response = await ac.get(f"{self.url}popular")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["id"] for item in data] == [str(public.id)]
+        assert data[0]["favorite_count"] == 1
+
+        await ac.delete(f"{self.url}{public.id}/favorite", headers=headers)
+        assert await popular.get_top(10) == []
+
+    async def test_popular_without_redis(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Если рейтинга в Redis нет, он строится по базе."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user)
+        await ac.get(f"{self.url}{summary.id}/favorite", headers=headers)
+        await popular.rebuild([])
+
+        response = await ac.get(f"{self.url}popular", params={"limit": 5})
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.json()] == [str(summary.id)]
+
+    async def test_reconcile(self, verif_user: User) -> None:
+        """Сверка исправляет счетчики и пересобирает рейтинг."""
+        summary = await create_summary(verif_user)
+        async with get_async_session_context() as session:
+            # Строка добавлена в обход счетчика
+            session.add(SummaryUser(
+                summary_id=summary.id, user_id=verif_user.id))
+            await session.commit()
+            assert await SummaryLogic.reconcile_favorite_count(session) == 1
+            await session.commit()
+            scores = await SummaryLogic.get_popular_scores(session, 10)
+        assert scores == [(summary.id, 1)]
+        await popular.rebuild(scores)
+        assert await popular.get_top(10) == [summary.id]
+
+
+class TestFavoritesBatch:
+    url = "api/v1/summary/"
+
+    async def test_batch(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Пакетное добавление и удаление, лишние id пропускаются."""
+        user, headers = auth_verif_user
+        first, second, third = [await create_summary(user) for _ in range(3)]
+        await ac.get(f"{self.url}{third.id}/favorite", headers=headers)
+
+        response = await ac.post(
+            f"{self.url}favorites:batch",
+            json={"add": [str(first.id), str(second.id), str(uuid4())],
+                  "remove": [str(third.id), str(uuid4())]},
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert set(data["added"]) == {str(first.id), str(second.id)}
+        assert data["removed"] == [str(third.id)]
+
+        # Повтор ничего не меняет
+        response = await ac.post(
+            f"{self.url}favorites:batch",
+            json={"add": [str(first.id)], "remove": [str(third.id)]},
+            headers=headers
+        )
+        assert response.json() == {"added": [], "removed": []}
+        async with get_async_session_context() as session:
+            counts = {
+                summary.id: (await SummaryLogic.get_plain(
+                    session, summary.id)).favorite_count
+                for summary in (first, second, third)
+            }
+        assert counts == {first.id: 1, second.id: 1, third.id: 0}
+
+    async def test_batch_intersection(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Один конспект нельзя одновременно добавить и удалить."""
+        _, headers = auth_verif_user
+        id = str(uuid4())
+        response = await ac.post(
+            f"{self.url}favorites:batch",
+            json={"add": [id], "remove": [id]}, headers=headers
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_is_favorited(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Списки отмечают избранное, кэш сбрасывается при его изменении."""
+        user, headers = auth_verif_user
+        favorite = await create_summary(user)
+        other = await create_summary(user)
+        response = await ac.get(self.url, headers=headers)
+        assert {item["is_favorited"] for item in response.json()["items"]} \
+            == {False}
+
+        await ac.get(f"{self.url}{favorite.id}/favorite", headers=headers)
+        for url in (self.url, f"{self.url}me"):
+            response = await ac.get(url, headers=headers)
+            flags = {item["id"]: item["is_favorited"]
+                     for item in response.json()["items"]}
+            assert flags == {str(favorite.id): True, str(other.id): False}
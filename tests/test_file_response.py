@@ -0,0 +1,188 @@
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import FastAPI, Request, status
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from src.cache import http_date, is_not_modified
+from src.config import config
+from src.storage.constants import RangeNotSatisfiableError
+from src.storage.responses import (
+    RangeFileResponse, file_response, parse_range
+)
+from src.storage.utils import get_blob_hash, get_blob_path, guess_image_type
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def file_app(tmp_path: Path) -> FastAPI:
+    path = tmp_path / "file.bin"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def get_file() -> RangeFileResponse:
+        return RangeFileResponse(path)
+
+    @app.get("/check")
+    async def check(request: Request) -> dict:
+        return {"not_modified": is_not_modified(
+            request, '"v1"', datetime(2024, 4, 1, 12, 0, 0))}
+
+    return app
+
+
+async def get(app: FastAPI, url: str, **headers: str):
+    async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        return await ac.get(url, headers=headers)
+
+
+class TestParseRange:
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=9-1", None),
+    ])
+    def test_parse(self, header, expected) -> None:
+        assert parse_range(header, 100) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+    def test_unsatisfiable(self, header) -> None:
+        with pytest.raises(RangeNotSatisfiableError):
+            parse_range(header, 100)
+
+
+class TestRangeFileResponse:
+
+    async def test_full(self, file_app: FastAPI) -> None:
+        response = await get(file_app, "/file")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+
+    async def test_range(self, file_app: FastAPI) -> None:
+        response = await get(file_app, "/file", range="bytes=100-299")
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == CONTENT[100:300]
+        assert response.headers["content-range"] \
+            == f"bytes 100-299/{len(CONTENT)}"
+        assert response.headers["content-length"] == "200"
+
+    async def test_unsatisfiable(self, file_app: FastAPI) -> None:
+        response = await get(file_app, "/file", range="bytes=5000-")
+        assert response.status_code \
+            == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    async def test_if_range(self, file_app: FastAPI) -> None:
+        """Если файл изменился, вместо части отдается файл целиком."""
+        etag = (await get(file_app, "/file")).headers["etag"]
+        response = await get(
+            file_app, "/file", range="bytes=0-9", **{"if-range": etag})
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        response = await get(
+            file_app, "/file", range="bytes=0-9", **{"if-range": '"old"'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == CONTENT
+
+
+class TestConditional:
+
+    @pytest.mark.parametrize("headers, expected", [
+        ({}, False),
+        ({"if-none-match": '"v1"'}, True),
+        ({"if-none-match": 'W/"v1", "v2"'}, True),
+        ({"if-none-match": '"v2"'}, False),
+        ({"if-none-match": "*"}, True),
+        ({"if-modified-since": "Mon, 01 Apr 2024 12:00:00 GMT"}, True),
+        ({"if-modified-since": "Mon, 01 Apr 2024 11:59:59 GMT"}, False),
+        ({"if-modified-since": "not a date"}, False),
+        # If-None-Match важнее If-Modified-Since
+        ({"if-none-match": '"v2"',
+          "if-modified-since": "Mon, 01 Apr 2024 12:00:00 GMT"}, False),
+    ])
+    async def test_is_not_modified(
+            self, file_app: FastAPI, headers: dict, expected: bool
+    ) -> None:
+        response = await get(file_app, "/check", **headers)
+        assert response.json() == {"not_modified": expected}
+
+    def test_http_date(self) -> None:
+        assert http_date(datetime(2024, 4, 1, 12, 0, 0, 123)) \
+            == "Mon, 01 Apr 2024 12:00:00 GMT"
+
+
+class TestFileResponse:
+
+    async def test_pathsend(self, tmp_path: Path) -> None:
+        """Если сервер поддерживает pathsend, файл отдает сервер."""
+        path = tmp_path / "file.bin"
+        path.write_bytes(CONTENT)
+        messages = []
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "headers": [],
+                 "extensions": {"http.response.pathsend": {}}}
+        await RangeFileResponse(path)(scope, None, send)
+        assert messages[0]["status"] == status.HTTP_200_OK
+        assert messages[1] == {"type": "http.response.pathsend",
+                               "path": str(path)}
+
+    async def test_accel_redirect(
+            self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """С префиксом nginx отдается только X-Accel-Redirect."""
+        monkeypatch.setattr(config, "FILES_ACCEL_REDIRECT_PREFIX", "/internal/")
+        app = FastAPI()
+
+        @app.get("/file")
+        async def get_file(request: Request):
+            return await file_response(
+                request, "static/blobs/ab/abc", {"ETag": '"abc"'},
+                media_type="image/png", filename="картинка.png"
+            )
+
+        response = await get(app, "/file")
+        assert response.content == b""
+        assert response.headers["x-accel-redirect"] \
+            == "/internal/static/blobs/ab/abc"
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["content-disposition"].startswith("inline;")
+        response = await get(app, "/file", **{"if-none-match": '"abc"'})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+class TestStorageUtils:
+
+    def test_get_blob_hash(self) -> None:
+        hash = "ab" + "0" * 62
+        assert get_blob_hash(get_blob_path(hash)) == hash
+        assert get_blob_hash(f"static/blobs/cd/{hash}") is None
+        assert get_blob_hash("static/user/summary/file.md") is None
+
+    @pytest.mark.parametrize("content, expected", [
+        (b"\x89PNG\r\n\x1a\n....", "image/png"),
+        (b"\xff\xd8\xff\xe0....", "image/jpeg"),
+        (b"GIF89a....", "image/gif"),
+        (b"<svg></svg>", "application/octet-stream"),
+    ])
+    async def test_guess_image_type(
+            self, tmp_path: Path, content: bytes, expected: str
+    ) -> None:
+        path = tmp_path / ("ab" + "0" * 62)
+        path.write_bytes(content)
+        assert await guess_image_type(str(path)) == expected
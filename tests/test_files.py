@@ -0,0 +1,93 @@
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from src.storage.utils import delete_derived_files, delete_file
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+)
+
+
+CONTENT = b"# Files\n\nText of the summary"
+
+
+async def upload_summary(
+        ac: AsyncClient, headers: dict, all_public: bool
+) -> dict:
+    response = await ac.post(
+        "api/v1/summary/upload",
+        params={"all_public": all_public},
+        files=[("files", ("files.md", CONTENT, "text/markdown"))],
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return (await ac.get(
+        "api/v1/summary/me", headers=headers)).json()["items"][0]
+
+
+class TestFiles:
+    url = "api/v1/files/"
+
+    async def test_public_file(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Публичный файл доступен без входа и кэшируется надолго."""
+        _, headers = auth_verif_user
+        summary = await upload_summary(ac, headers, all_public=True)
+        try:
+            ac.cookies.clear()
+            response = await ac.get(f"{self.url}{summary['summary_path']}")
+            assert response.status_code == status.HTTP_200_OK
+            assert response.content == CONTENT
+            assert response.headers["content-type"] \
+                == "text/markdown; charset=utf-8"
+            assert "immutable" in response.headers["cache-control"]
+            assert response.headers["cache-control"].startswith("public")
+            etag = response.headers["etag"]
+
+            response = await ac.get(
+                f"{self.url}{summary['summary_path']}",
+                headers={"If-None-Match": etag, "Range": "bytes=0-6"}
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+            response = await ac.get(
+                f"{self.url}{summary['summary_path']}",
+                headers={"Range": "bytes=0-6"}
+            )
+            assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+            assert response.content == CONTENT[:7]
+        finally:
+            await delete_file(summary["summary_path"])
+            await delete_derived_files(summary["summary_path"])
+
+    async def test_private_file(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Файл приватного конспекта доступен только автору."""
+        _, headers = auth_verif_user
+        _, other_headers = auth_superuser
+        summary = await upload_summary(ac, headers, all_public=False)
+        url = f"{self.url}{summary['summary_path']}"
+        try:
+            ac.cookies.clear()
+            response = await ac.get(url, headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers["cache-control"].startswith("private")
+
+            ac.cookies.clear()
+            response = await ac.get(url, headers=other_headers)
+            assert response.status_code == status.HTTP_403_FORBIDDEN
+
+            ac.cookies.clear()
+            response = await ac.get(url)
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        finally:
+            await delete_file(summary["summary_path"])
+            await delete_derived_files(summary["summary_path"])
+
+    async def test_unknown_file(self, ac: AsyncClient) -> None:
+        """Файлы, которых нет у конспектов, не отдаются."""
+        response = await ac.get(f"{self.url}static/blobs/ab/{'ab' * 32}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,104 @@
+import logging
+import os
+from pathlib import Path
+import time
+
+import pytest
+
+from src.logs.json_logger import BatchingFileHandler
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class TestBatchingFileHandler:
+
+    def test_writes_all_records(self, tmp_path: Path) -> None:
+        """После закрытия в файле все записи, по одной на строку."""
+        filename = str(tmp_path / "app.log")
+        handler = BatchingFileHandler(filename, flush_interval=0.05)
+        logger = make_logger("tests.json_logger.write", handler)
+        for i in range(100):
+            logger.info("record %d", i)
+        handler.close()
+
+        with open(filename, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert lines == [f"record {i}" for i in range(100)]
+
+    def test_rotation(self, tmp_path: Path) -> None:
+        """Файлы не превышают max_bytes, старые копии не копятся."""
+        filename = str(tmp_path / "app.log")
+        handler = BatchingFileHandler(
+            filename, max_bytes=1000, backup_count=2, flush_interval=0.05
+        )
+        logger = make_logger("tests.json_logger.rotate", handler)
+        for i in range(500):
+            logger.info("record %03d", i)
+        handler.close()
+
+        files = sorted(os.listdir(tmp_path))
+        assert files == ["app.log", "app.log.1", "app.log.2"]
+        for name in files:
+            assert os.path.getsize(tmp_path / name) <= 1000
+        with open(filename, encoding="utf-8") as f:
+            assert f.read().splitlines()[-1] == "record 499"
+
+    def test_overflow_is_counted(self, tmp_path: Path) -> None:
+        """При переполнении очереди записи отбрасываются и считаются."""
+        filename = str(tmp_path / "app.log")
+        handler = BatchingFileHandler(
+            filename, queue_size=1, batch_size=1, flush_interval=0.05
+        )
+        logger = make_logger("tests.json_logger.overflow", handler)
+        for i in range(10000):
+            logger.info("record %d", i)
+        handler.close()
+
+        with open(filename, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert handler.dropped > 0
+        assert len([line for line in lines if line.startswith("record")]) \
+            == 10000 - handler.dropped
+        assert any('"dropped_total"' in line for line in lines)
+
+    def test_write_error(
+            self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+            capsys: pytest.CaptureFixture
+    ) -> None:
+        """Ошибка записи теряет пачку, но поток продолжает писать."""
+        filename = str(tmp_path / "app.log")
+        handler = BatchingFileHandler(
+            filename, max_bytes=100, backup_count=1, flush_interval=0.05
+        )
+        rotate = handler._rotate
+        failures = [OSError("rename failed")]
+
+        def failing_rotate() -> None:
+            if failures:
+                raise failures.pop()
+            rotate()
+
+        monkeypatch.setattr(handler, "_rotate", failing_rotate)
+        logger = make_logger("tests.json_logger.error", handler)
+        for i in range(20):
+            logger.info("lost %d", i)
+        deadline = time.monotonic() + 5
+        while failures and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not failures
+        assert handler._thread.is_alive()
+
+        for i in range(3):
+            logger.info("record %d", i)
+        handler.close()
+
+        with open(filename, encoding="utf-8") as f:
+            assert f.read().splitlines()[-3:] == [
+                f"record {i}" for i in range(3)]
+        assert "rename failed" in capsys.readouterr().err
@@ -0,0 +1,88 @@
+"""
+Профили загрузки связей: каждый запрос тянет только то, что ему нужно.
+"""
+from src.auth.models import User
+from src.pagination import Pagination
+from src.summary.logic import Summary, SummaryImage, SummaryUser
+from src.summary.schemas import SummaryUpdate
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    captured_queries, create_summary, get_async_session_context
+)
+
+
+class TestLoadingProfiles:
+
+    async def test_existence_check(self, verif_user: User) -> None:
+        """Проверка существования выбирает только id без join."""
+        summary = await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            async with captured_queries() as queries:
+                assert await Summary.get_id(session, summary.id) == summary.id
+        [(statement, _)] = queries
+        assert "JOIN" not in statement
+        assert "summary.name" not in statement
+
+    async def test_detail(self, verif_user: User) -> None:
+        """Конспект по id загружается с автором и изображениями."""
+        summary = await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            summary = await Summary.get(session, summary.id)
+            assert summary.author.username == verif_user.username
+            assert [image.path for image in summary.images] == [
+                "static/image.png"]
+
+    async def test_short_summary_projection(self, verif_user: User) -> None:
+        """Для ShortSummary выбираются только нужные колонки и username."""
+        await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            async with captured_queries() as queries:
+                page = await SummaryUser.get_list(
+                    session, verif_user.id, Pagination())
+        [(statement, _)] = queries
+        assert "summary.is_public" not in statement
+        assert "hashed_password" not in statement
+        assert "summary_image" not in statement
+        assert page.items[0].author.username == verif_user.username
+
+    async def test_image_owner(self, verif_user: User) -> None:
+        """Для проверки прав на изображение загружается автор конспекта."""
+        summary = await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            image_id = (await Summary.get(session, summary.id)).images[0].id
+        async with get_async_session_context() as session:
+            image = await SummaryImage.get(session, image_id)
+            assert image.summary.author_id == verif_user.id
+
+    async def test_identity_cache(self, verif_user: User) -> None:
+        """Загруженный в запросе конспект повторно не читается."""
+        summary = await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            loaded = await Summary.get(session, summary.id)
+            async with captured_queries() as queries:
+                assert await Summary.get(session, summary.id) is loaded
+                assert await Summary.get_plain(session, summary.id) is loaded
+                assert await Summary.get_id(session, summary.id) == summary.id
+            assert not queries
+
+    async def test_update_returning(self, verif_user: User) -> None:
+        """Обновление возвращает строку без повторного SELECT."""
+        summary = await create_summary(
+            verif_user, with_image=True, favorite=True)
+        async with get_async_session_context() as session:
+            loaded = await Summary.get(session, summary.id)
+            async with captured_queries() as queries:
+                updated = await Summary.update_owned(
+                    session, summary.id, verif_user.id,
+                    SummaryUpdate(name="renamed", is_public=True)
+                )
+            assert not queries
+            assert updated is loaded
+            assert updated.name == "renamed.md"
+            assert updated.updated_at > summary.updated_at
+            assert len(updated.images) == 1
@@ -0,0 +1,134 @@
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from src.logs.middlewares import LoggingMiddleware
+from src.logs.policy import LoggingPolicy
+
+
+@pytest.fixture
+def records() -> list[logging.LogRecord]:
+    captured = []
+
+    class Handler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            if hasattr(record, 'request_json_fields'):
+                captured.append(record)
+
+    handler = Handler()
+    logger = logging.getLogger('root')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield captured
+    logger.removeHandler(handler)
+
+
+def make_app(policy: LoggingPolicy | None = None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        LoggingMiddleware, max_body_size=10,
+        policy=policy or LoggingPolicy(logging.getLogger('root'))
+    )
+
+    @app.post('/echo')
+    async def echo(request: Request) -> StreamingResponse:
+        body = await request.body()
+
+        async def chunks():
+            for _ in range(3):
+                yield body
+
+        return StreamingResponse(chunks(), media_type='text/plain')
+
+    @app.get('/fail')
+    async def fail() -> None:
+        raise ValueError('fail')
+
+    return app
+
+
+class TestLoggingMiddleware:
+
+    async def test_body_prefix(self, records: list) -> None:
+        """В журнал попадает только начало тела, ответ приходит целиком."""
+        async with AsyncClient(
+                transport=ASGITransport(app=make_app()),
+                base_url='http://test'
+        ) as ac:
+            response = await ac.post(
+                '/echo', content='x' * 100,
+                headers={'content-type': 'text/plain'}
+            )
+        assert response.text == 'x' * 300
+        fields = records[-1].request_json_fields
+        assert fields['request_body'] == 'x' * 10 + '... (100 байт)'
+        assert fields['response_body'] == 'x' * 10 + '... (300 байт)'
+        assert fields['response_size'] == 300
+
+    async def test_multipart_skipped(self, records: list) -> None:
+        """Тела multipart не копируются в журнал."""
+        async with AsyncClient(
+                transport=ASGITransport(app=make_app()),
+                base_url='http://test'
+        ) as ac:
+            await ac.post('/echo', files={'file': ('a.md', b'# secret')})
+        fields = records[-1].request_json_fields
+        assert fields['request_body'] == 'No Value'
+        assert fields['request_size'] > 0
+
+    async def test_exception(self, records: list) -> None:
+        """Необработанная ошибка превращается в ответ 500 и журналируется."""
+        async with AsyncClient(
+                transport=ASGITransport(app=make_app()),
+                base_url='http://test'
+        ) as ac:
+            response = await ac.get('/fail')
+        assert response.status_code == 500
+        assert records[-1].exc_info is not None
+        assert records[-1].request_json_fields['response_status_code'] == 500
+
+    async def test_sampling_and_fields(self, records: list) -> None:
+        """Успешные ответы прореживаются, ошибки пишутся выбранными полями."""
+        policy = LoggingPolicy(
+            logging.getLogger('root'),
+            fields=['request_path', 'response_status_code'],
+            status_sample_rates={'2xx': 0.0},
+        )
+        async with AsyncClient(
+                transport=ASGITransport(app=make_app(policy)),
+                base_url='http://test'
+        ) as ac:
+            await ac.post('/echo', content='x')
+            await ac.get('/fail')
+        assert len(records) == 1
+        assert records[0].levelno == logging.ERROR
+        assert records[0].request_json_fields == {
+            'request_path': '/fail', 'response_status_code': 500
+        }
+
+    async def test_disabled_logger(self, records: list) -> None:
+        """Если логгер не пишет ошибки, записи не создаются."""
+        logger = logging.getLogger('tests.logging_middleware.disabled')
+        logger.setLevel(logging.CRITICAL)
+        async with AsyncClient(
+                transport=ASGITransport(app=make_app(LoggingPolicy(logger))),
+                base_url='http://test'
+        ) as ac:
+            response = await ac.post('/echo', content='x')
+        assert response.text == 'xxx'
+        assert not records
+
+    def test_route_sample_rate(self) -> None:
+        """Доля по маршруту берется по самому длинному префиксу."""
+        policy = LoggingPolicy(
+            logging.getLogger('root'),
+            status_sample_rates={'2xx': 0.5, '201': 1.0},
+            route_sample_rates={'/api': 0.5, '/api/v1/auth': 0.0},
+        )
+        assert policy.get_sample_rate('/api/v1/summary', 200) == 0.25
+        assert policy.get_sample_rate('/api/v1/summary', 201) == 0.5
+        assert policy.get_sample_rate('/api/v1/auth/login', 200) == 0.0
+        assert policy.get_sample_rate('/docs', 404) == 1.0
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi import status
+from httpx import AsyncClient
+import pytest
+
+from src.auth.models import User
+from src.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from src.summary.models import Summary
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    get_async_session_context
+)
+
+
+class TestPagination:
+    url = "api/v1/summary/"
+
+    def test_cursor_round_trip(self) -> None:
+        """Курсор декодируется в тот же ключ, из которого был получен."""
+        created_at = datetime(2024, 4, 1, 12, 30, 15, 123456)
+        id = uuid4()
+        assert decode_cursor(encode_cursor(created_at, id)) == (created_at, id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "W10", "WzEsIDJd"])
+    def test_decode_invalid_cursor(self, cursor: str) -> None:
+        """Поврежденный курсор не приводит к ошибке 500."""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
+
+    async def test_invalid_cursor_response(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Запрос с поврежденным курсором отклоняется с кодом 400."""
+        _, headers = auth_verif_user
+        response = await ac.get(
+            self.url, params={"cursor": "not-a-cursor"}, headers=headers
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_pages_cover_list(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Страницы идут без пропусков и повторов, последняя без курсора."""
+        user, headers = auth_verif_user
+        created_at = datetime.utcnow()
+        async with get_async_session_context() as session:
+            for i in range(5):
+                session.add(Summary(
+                    name=f"summary_{i}.md",
+                    summary_path=f"static/{user.id}/summary/summary_{i}.md",
+                    author_id=user.id,
+                    # У двух конспектов одинаковое время создания
+                    created_at=created_at - timedelta(minutes=i // 2 * 2),
+                ))
+            await session.commit()
+
+        ids, cursor = [], None
+        for _ in range(3):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await ac.get(self.url, params=params, headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            ids.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+        assert cursor is None
+        assert len(ids) == len(set(ids)) == 5
@@ -0,0 +1,217 @@
+"""
+Регрессионные тесты планов запросов списков.
+
+Запросы, которые реально отправляют логические классы, перехватываются
+и прогоняются через EXPLAIN с выключенными enable_seqscan и enable_sort.
+Если планировщик и так выбирает Seq Scan по горячей таблице или Sort
+всей выборки, значит подходящего индекса нет.
+"""
+from datetime import datetime, timedelta
+import json
+
+import pytest
+
+from src.auth.logic import UserTokenVerify
+from src.auth.models import Role, User
+from src.constants import new_uuid
+from src.exceptions import ObjectNotFoundError
+from src.notes.logic import Note
+from src.notes.models import Note as NoteModel, NoteUser
+from src.pagination import Pagination
+from src.search.logic import SearchPagination, search, suggest
+from src.summary.logic import Summary, SummaryUser
+from src.summary.models import (
+    Summary as SummaryModel, SummaryImage, SummaryUser as SummaryUserModel
+)
+from tests.conftest import (
+    captured_queries, engine_test, get_async_session_context
+)
+
+
+HOT_TABLES = {"summary", "summary_image", "summary_user", "note", "note_user",
+              "user_tokens"}
+USERS_COUNT = 10
+ROWS_PER_USER = 30
+
+
+def contains_limit(node: dict) -> bool:
+    if node["Node Type"] == "Limit":
+        return True
+    return any(contains_limit(child) for child in node.get("Plans", []))
+
+
+def plan_problems(node: dict) -> list[str]:
+    """
+    Ищет в плане полные просмотры горячих таблиц и сортировки.
+
+    Sort над уже ограниченной страницей (например, при joined-загрузке
+    связей поверх подзапроса с LIMIT) допустим, сортировка всей выборки нет.
+    """
+    problems = []
+    relation = node.get("Relation Name")
+    if node["Node Type"] == "Seq Scan" and relation in HOT_TABLES:
+        problems.append(f"Seq Scan on {relation}")
+    if (node["Node Type"] in ("Sort", "Incremental Sort")
+            and not contains_limit(node)):
+        problems.append(f"Sort by {node.get('Sort Key')}")
+    for child in node.get("Plans", []):
+        problems.extend(plan_problems(child))
+    return problems
+
+
+async def explain(statement: str, parameters) -> dict:
+    async with engine_test.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        await conn.exec_driver_sql("SET enable_sort = off")
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@pytest.fixture(scope="function")
+async def seeded_users(roles: list[Role]) -> list[str]:
+    """Пользователи с конспектами, заметками и избранным."""
+    now = datetime.utcnow()
+    users = [new_uuid() for _ in range(USERS_COUNT)]
+    async with engine_test.begin() as conn:
+        await conn.execute(User.__table__.insert(), [
+            dict(id=user_id, email=f"plan_{i}@example.com",
+                 username=f"plan_{i}", hashed_password="-",
+                 role_id=roles[2].id)
+            for i, user_id in enumerate(users)
+        ])
+        summaries, notes = [], []
+        for i, user_id in enumerate(users):
+            for j in range(ROWS_PER_USER):
+                created_at = now - timedelta(minutes=i * ROWS_PER_USER + j)
+                summaries.append(dict(
+                    id=new_uuid(), name=f"{j}.md",
+                    summary_path=f"static/{user_id}/summary/{j}.md",
+                    is_public=j % 3 == 0, author_id=user_id,
+                    created_at=created_at, updated_at=created_at,
+                ))
+                notes.append(dict(
+                    id=new_uuid(), title=f"note {j}", intro="", text="",
+                    is_public=j % 3 == 0, author_id=user_id,
+                    created_at=created_at, updated_at=created_at,
+                ))
+        await conn.execute(SummaryModel.__table__.insert(), summaries)
+        await conn.execute(NoteModel.__table__.insert(), notes)
+        await conn.execute(SummaryImage.__table__.insert(), [
+            dict(id=new_uuid(), path=f"{summary['summary_path']}.png",
+                 summary_id=summary["id"], created_at=now)
+            for summary in summaries[::2]
+        ])
+        await conn.execute(SummaryUserModel.__table__.insert(), [
+            dict(user_id=users[0], summary_id=summary["id"],
+                 created_at=summary["created_at"])
+            for summary in summaries[::3]
+        ])
+        await conn.execute(NoteUser.__table__.insert(), [
+            dict(user_id=users[0], note_id=note["id"],
+                 created_at=note["created_at"])
+            for note in notes[::3]
+        ])
+    async with engine_test.connect() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+    return users
+
+
+class TestQueryPlans:
+
+    async def assert_plans(self, call, allow_sort: bool = False) -> None:
+        async with get_async_session_context() as session:
+            async with captured_queries() as queries:
+                await call(session)
+        assert queries
+        for statement, parameters in queries:
+            problems = plan_problems(await explain(statement, parameters))
+            if allow_sort:
+                problems = [problem for problem in problems
+                            if not problem.startswith("Sort")]
+            assert not problems, f"{problems} in\n{statement}"
+
+    async def test_summary_list(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(session, Pagination()))
+
+    async def test_summary_list_cursor(self, seeded_users: list[str]) -> None:
+        cursor = (datetime.utcnow() - timedelta(minutes=50), new_uuid())
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(cursor=cursor)))
+
+    async def test_summary_list_public(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(), is_public=True))
+
+    async def test_summary_list_author(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(), user_id=seeded_users[1]))
+
+    async def test_summary_list_author_public(
+            self, seeded_users: list[str]
+    ) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(), user_id=seeded_users[1],
+                is_public=False))
+
+    async def test_summary_list_favorited(
+            self, seeded_users: list[str]
+    ) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(), viewer_id=seeded_users[0]))
+
+    async def test_summary_list_username(
+            self, seeded_users: list[str]
+    ) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_list(
+                session, Pagination(), username="plan_1"))
+
+    async def test_popular_summaries(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Summary.get_popular(session, 10))
+
+    async def test_favorite_summaries(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: SummaryUser.get_list(
+                session, seeded_users[0], Pagination()))
+
+    async def test_note_list_author(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Note.get_list(session, seeded_users[1]))
+
+    async def test_note_list_public(self, seeded_users: list[str]) -> None:
+        await self.assert_plans(
+            lambda session: Note.get_list(session, is_public=True))
+
+    async def test_search(self, seeded_users: list[str]) -> None:
+        # Найденные документы сортируются по рангу всегда, проверяется
+        # только, что они находятся по GIN индексам
+        await self.assert_plans(
+            lambda session: search(
+                session, "note", seeded_users[0], SearchPagination()),
+            allow_sort=True)
+
+    async def test_suggest(self, seeded_users: list[str]) -> None:
+        # Подсказки ищутся по триграммным индексам, сортируются только
+        # найденные имена
+        await self.assert_plans(
+            lambda session: suggest(session, "plan", 10), allow_sort=True)
+
+    async def test_verify_token(self, seeded_users: list[str]) -> None:
+        # Токен ищется по индексу sha256 токена
+        async def call(session):
+            with pytest.raises(ObjectNotFoundError):
+                await UserTokenVerify.get(session, "token")
+
+        await self.assert_plans(call)
@@ -0,0 +1,123 @@
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from src.storage.utils import delete_derived_files, delete_file
+from src.summary.render import (
+    EXCERPT_LENGTH, markdown_to_text, render_markdown
+)
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+)
+
+
+class TestRenderMarkdown:
+
+    def test_sanitized(self) -> None:
+        """Сырой HTML экранируется, опасные ссылки не создаются."""
+        html = render_markdown(
+            "<script>alert(1)</script>\n\n"
+            "[x](javascript:alert(1)) [ok](https://example.com)"
+        )["html"]
+        assert "<script>" not in html
+        assert 'href="javascript' not in html
+        assert 'href="https://example.com"' in html
+
+    def test_toc(self) -> None:
+        """Заголовки попадают в оглавление с уникальными id."""
+        rendered = render_markdown("# Введение\n\n## Итоги\n\n## Итоги\n")
+        assert rendered["toc"] == [
+            {"level": 1, "id": "введение", "title": "Введение"},
+            {"level": 2, "id": "итоги", "title": "Итоги"},
+            {"level": 2, "id": "итоги-1", "title": "Итоги"},
+        ]
+        assert '<h2 id="итоги-1">' in rendered["html"]
+
+    def test_excerpt(self) -> None:
+        """Отрывок берется из абзацев без разметки и обрезается."""
+        rendered = render_markdown("# Заголовок\n\nПервый **абзац**.")
+        assert rendered["excerpt"] == "Первый абзац."
+        excerpt = render_markdown("слово " * 200)["excerpt"]
+        assert len(excerpt) <= EXCERPT_LENGTH + 1
+        assert excerpt.endswith("…")
+
+
+class TestRenderedSummary:
+    url = "api/v1/summary/"
+
+    async def test_rendered_etag(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Результат рендеринга отдается с ETag, повторный запрос - 304."""
+        _, headers = auth_verif_user
+        response = await ac.post(
+            f"{self.url}upload",
+            files=[("files", ("render.md", b"# Title\n\nText", "text/markdown"))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        summary = (await ac.get(
+            f"{self.url}me", headers=headers)).json()["items"][0]
+        try:
+            response = await ac.get(
+                f"{self.url}{summary['id']}/rendered", headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            assert data["toc"] == [{"level": 1, "id": "title", "title": "Title"}]
+            assert data["excerpt"] == "Text"
+            etag = response.headers["etag"]
+
+            response = await ac.get(
+                f"{self.url}{summary['id']}/rendered",
+                headers={**headers, "If-None-Match": etag}
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert response.headers["etag"] == etag
+        finally:
+            await delete_file(summary["summary_path"])
+            await delete_derived_files(summary["summary_path"])
+
+    async def test_rendered_private(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Приватный конспект недоступен другим пользователям, в том числе
+        через условный запрос."""
+        _, headers = auth_verif_user
+        _, other_headers = auth_superuser
+        response = await ac.post(
+            f"{self.url}upload",
+            files=[("files", ("private.md", b"# Secret", "text/markdown"))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        summary = (await ac.get(
+            f"{self.url}me", headers=headers)).json()["items"][0]
+        try:
+            response = await ac.get(
+                f"{self.url}{summary['id']}/rendered", headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            etag = response.headers["etag"]
+
+            response = await ac.get(
+                f"{self.url}{summary['id']}/rendered", headers=other_headers)
+            assert response.status_code == status.HTTP_403_FORBIDDEN
+            response = await ac.get(
+                f"{self.url}{summary['id']}/rendered",
+                headers={**other_headers, "If-None-Match": etag}
+            )
+            assert response.status_code == status.HTTP_403_FORBIDDEN
+        finally:
+            await delete_file(summary["summary_path"])
+            await delete_derived_files(summary["summary_path"])
+
+
+class TestSearchText:
+
+    def test_markdown_to_text(self) -> None:
+        """Для поиска остается текст без разметки, включая код."""
+        text = markdown_to_text(
+            "# Заголовок\n\nТекст **жирный**.\n\n![подпись](x.png)\n\n"
+            "```\nprint(1)\n```\n"
+        )
+        assert text == "Заголовок\nТекст жирный.\nподпись\nprint(1)\n"
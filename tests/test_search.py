@@ -0,0 +1,158 @@
+from uuid import uuid4
+
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from src.notes.models import Note
+from src.search.logic import (
+    decode_search_cursor, encode_search_cursor, escape_like, make_snippet,
+    normalize_suggest_text
+)
+from src.summary.models import Summary
+from src.search.constants import HIGHLIGHT_START, HIGHLIGHT_STOP
+from src.storage.utils import delete_derived_files, delete_file
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    get_async_session_context
+)
+
+
+async def create_note(user: User, is_public: bool = True, **fields) -> Note:
+    async with get_async_session_context() as session:
+        note = Note(author_id=user.id, is_public=is_public, **fields)
+        session.add(note)
+        await session.commit()
+        return note
+
+
+class TestSearchUtils:
+
+    def test_snippet_escaped(self) -> None:
+        """Текст фрагмента экранируется, выделяются только совпадения."""
+        headline = f"<b>не</b>  {HIGHLIGHT_START}кот{HIGHLIGHT_STOP}\n"
+        assert make_snippet(headline) == "&lt;b&gt;не&lt;/b&gt; <mark>кот</mark>"
+
+    def test_suggest_text(self) -> None:
+        assert normalize_suggest_text("  Иван  Петров ") == "иван петров"
+        assert escape_like("50%_\\") == "50\\%\\_\\\\"
+
+    def test_cursor(self) -> None:
+        id = uuid4()
+        rank = 0.060792710632085800
+        assert decode_search_cursor(encode_search_cursor(rank, id)) \
+            == (rank, id)
+
+
+class TestSearch:
+    url = "api/v1/search"
+
+    async def test_search(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            superuser: User
+    ) -> None:
+        """
+        Находятся конспекты по тексту файла и заметки, чужие приватные
+        документы не видны, страницы идут по курсору.
+        """
+        user, headers = auth_verif_user
+        response = await ac.post(
+            "api/v1/summary/upload",
+            files=[("files", (
+                "search.md",
+                "# Конспект\n\nПро **пингвинов** Антарктиды.".encode(),
+                "text/markdown"
+            ))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        summary = (await ac.get(
+            "api/v1/summary/me", headers=headers)).json()["items"][0]
+        note = await create_note(
+            user, is_public=False, title="Пингвины", intro="Птицы",
+            text="Пингвин не летает")
+        await create_note(
+            superuser, is_public=False, title="Пингвин", intro="Чужая",
+            text="Приватная заметка")
+        try:
+            response = await ac.get(
+                self.url, params={"q": "пингвин"}, headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            items = response.json()["items"]
+            assert [(item["type"], item["id"]) for item in items] == [
+                ("note", str(note.id)), ("summary", summary["id"])
+            ]
+            assert "<mark>пингвинов</mark>" in items[1]["snippet"]
+
+            response = await ac.get(
+                self.url, params={"q": "пингвин", "limit": 1},
+                headers=headers)
+            page = response.json()
+            assert [item["id"] for item in page["items"]] == [str(note.id)]
+            response = await ac.get(
+                self.url,
+                params={"q": "пингвин", "limit": 1,
+                        "cursor": page["next_cursor"]},
+                headers=headers)
+            page = response.json()
+            assert [item["id"] for item in page["items"]] == [summary["id"]]
+            assert page["next_cursor"] is None
+
+            response = await ac.get(
+                self.url, params={"q": "пингвин", "type": "summary"},
+                headers=headers)
+            assert [item["id"] for item in response.json()["items"]] \
+                == [summary["id"]]
+        finally:
+            await delete_file(summary["summary_path"])
+            await delete_derived_files(summary["summary_path"])
+
+    async def test_invalid_cursor(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        _, headers = auth_verif_user
+        response = await ac.get(
+            self.url, params={"q": "слово", "cursor": "broken"},
+            headers=headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestSuggest:
+    url = "api/v1/search/suggest"
+
+    async def test_suggest(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """
+        Сначала имена, начинающиеся с запроса, затем похожие.
+        Приватные конспекты не подсказываются, ответ кэшируется.
+        """
+        user, headers = auth_verif_user
+        async with get_async_session_context() as session:
+            session.add_all([
+                Summary(name=name, summary_path=f"static/{name}",
+                        author_id=user.id, is_public=is_public)
+                for name, is_public in [
+                    ("Алгебра.md", True),
+                    ("Линейная алгебра.md", True),
+                    ("Алгебра черновик.md", False),
+                    ("Геометрия.md", True),
+                ]
+            ])
+            await session.commit()
+
+        response = await ac.get(
+            self.url, params={"q": " АЛГЕБРА "}, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [summary["name"] for summary in response.json()["summaries"]] \
+            == ["Алгебра.md", "Линейная алгебра.md"]
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+
+        response = await ac.get(
+            self.url, params={"q": "алгебра"}, headers=headers)
+        assert response.headers["X-FastAPI-Cache"] == "HIT"
+
+        response = await ac.get(
+            self.url, params={"q": user.username[:3]}, headers=headers)
+        assert {"id": str(user.id), "username": user.username} \
+            in response.json()["users"]
@@ -0,0 +1,265 @@
+import hashlib
+from io import BytesIO
+import os
+from uuid import uuid4
+
+from fastapi import UploadFile, status
+from httpx import AsyncClient
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from src.auth.models import User
+from src.config import config
+from src.database import commit
+from src.storage.constants import FileTooLargeError
+from src.storage.logic import Blob
+from src.storage.models import Blob as BlobModel
+from src.storage.utils import (
+    STAGING_DIR, delete_derived_files, delete_file, discard_staged,
+    get_absolute_path, get_blob_path, stage_file
+)
+from src.summary.logic import Summary as SummaryLogic
+from src.summary.models import Summary
+from src.summary.render import get_rendered_path
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    get_async_session_context
+)
+
+
+URL = "api/v1/summary/"
+
+
+def unique_content() -> bytes:
+    """Содержимое, которого нет на диске с прошлых запусков."""
+    return f"# Blob\n\n{uuid4()}".encode()
+
+
+def blob_exists(content: bytes) -> bool:
+    hash = hashlib.sha256(content).hexdigest()
+    return os.path.exists(get_absolute_path(get_blob_path(hash)))
+
+
+def staged_files() -> list[str]:
+    """Временные файлы загрузок, которые остались на диске."""
+    staging_dir = get_absolute_path(STAGING_DIR)
+    if not os.path.isdir(staging_dir):
+        return []
+    return os.listdir(staging_dir)
+
+
+async def get_blob(content: bytes) -> BlobModel | None:
+    async with get_async_session_context() as session:
+        return await session.get(
+            BlobModel, hashlib.sha256(content).hexdigest())
+
+
+async def count_summaries() -> int:
+    async with get_async_session_context() as session:
+        return await session.scalar(select(func.count()).select_from(Summary))
+
+
+async def upload(
+        ac: AsyncClient, headers: dict, *contents: bytes
+) -> list[dict]:
+    response = await ac.post(
+        f"{URL}upload",
+        files=[("files", (f"{i}.md", content, "text/markdown"))
+               for i, content in enumerate(contents)],
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return (await ac.get(f"{URL}me", headers=headers)).json()["items"]
+
+
+async def remove_blob(content: bytes) -> None:
+    path = get_blob_path(hashlib.sha256(content).hexdigest())
+    await delete_file(path)
+    await delete_derived_files(path)
+
+
+class TestBlobStore:
+
+    async def test_dedup(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Одинаковое содержимое хранится одним файлом со счетчиком ссылок."""
+        _, headers = auth_verif_user
+        content = unique_content()
+        try:
+            await upload(ac, headers, content)
+            first, second = await upload(ac, headers, content)
+            assert first["summary_path"] == second["summary_path"]
+            assert blob_exists(content)
+            assert (await get_blob(content)).ref_count == 2
+
+            response = await ac.delete(f"{URL}{first['id']}", headers=headers)
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+            assert (await get_blob(content)).ref_count == 1
+
+            response = await ac.delete(
+                f"{URL}{second['id']}", headers=headers)
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+            assert (await get_blob(content)).ref_count == 0
+            # Файл удаляет только purge_unused
+            assert blob_exists(content)
+        finally:
+            await remove_blob(content)
+
+    async def test_purge_unused(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Удаляются только blob'ы без ссылок, вместе с производными."""
+        _, headers = auth_verif_user
+        unused, used = unique_content(), unique_content()
+        try:
+            summaries = await upload(ac, headers, unused, used)
+            [summary] = [item for item in summaries
+                         if item["summary_path"] == get_blob_path(
+                             hashlib.sha256(unused).hexdigest())]
+            response = await ac.get(
+                f"{URL}{summary['id']}/rendered", headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            rendered = get_absolute_path(
+                get_rendered_path(summary["summary_path"]))
+            assert os.path.exists(rendered)
+            response = await ac.delete(
+                f"{URL}{summary['id']}", headers=headers)
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+
+            async with get_async_session_context() as session:
+                async with commit(session):
+                    purged, _ = await Blob.purge_unused(session)
+            assert purged == 1
+            assert await get_blob(unused) is None
+            assert not blob_exists(unused)
+            assert not os.path.exists(rendered)
+            assert (await get_blob(used)).ref_count == 1
+            assert blob_exists(used)
+        finally:
+            await remove_blob(unused)
+            await remove_blob(used)
+
+    async def test_failed_commit(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Если транзакция загрузки не закоммитилась, файлов не остается."""
+        _, headers = auth_verif_user
+        content = unique_content()
+
+        def fail(session) -> None:
+            raise RuntimeError("commit failed")
+
+        event.listen(Session, "before_commit", fail)
+        try:
+            response = await ac.post(
+                f"{URL}upload",
+                files=[("files", ("0.md", content, "text/markdown"))],
+                headers=headers
+            )
+        finally:
+            event.remove(Session, "before_commit", fail)
+        try:
+            assert response.status_code \
+                == status.HTTP_500_INTERNAL_SERVER_ERROR
+            assert await count_summaries() == 0
+            assert await get_blob(content) is None
+            assert not blob_exists(content)
+            assert not staged_files()
+        finally:
+            await remove_blob(content)
+
+
+class TestStaging:
+
+    @pytest.fixture
+    def small_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(config, "MAX_CONTENT_LENGTH", 16)
+        monkeypatch.setattr(config, "UPLOAD_CHUNK_SIZE", 4)
+
+    async def test_hash(self) -> None:
+        """Файл копируется частями, хеш и размер считаются по ходу."""
+        content = unique_content()
+        staged = await stage_file(
+            UploadFile(BytesIO(content), filename="a.md"))
+        try:
+            assert staged.hash == hashlib.sha256(content).hexdigest()
+            assert staged.size == len(content)
+            with open(staged.tmp_path, "rb") as f:
+                assert f.read() == content
+        finally:
+            await discard_staged([staged])
+        assert not os.path.exists(staged.tmp_path)
+
+    async def test_stream_limit(self, small_limit: None) -> None:
+        """
+        Размер проверяется при копировании, если клиент его не передал.
+        Недописанный временный файл удаляется.
+        """
+        with pytest.raises(FileTooLargeError):
+            await stage_file(UploadFile(BytesIO(b"x" * 17), filename="a.md"))
+        assert not staged_files()
+
+    async def test_too_large(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            small_limit: None
+    ) -> None:
+        """Слишком большой файл - 413, временных файлов не остается."""
+        _, headers = auth_verif_user
+        response = await ac.post(
+            f"{URL}upload",
+            files=[("files", ("a.md", b"x" * 17, "text/markdown"))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert not staged_files()
+        assert await count_summaries() == 0
+
+
+class TestUploadBatch:
+
+    async def test_one_file_too_large(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Если один файл не скопировался, не сохраняется ни один."""
+        _, headers = auth_verif_user
+        content = unique_content()
+        monkeypatch.setattr(config, "MAX_CONTENT_LENGTH", len(content))
+        response = await ac.post(
+            f"{URL}upload",
+            files=[("files", ("0.md", content, "text/markdown")),
+                   ("files", ("1.md", content + b"!", "text/markdown"))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert await count_summaries() == 0
+        assert not blob_exists(content)
+        assert not staged_files()
+
+    async def test_insert_failed(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Ошибка записи в базу откатывает все строки пакета."""
+        _, headers = auth_verif_user
+        first, second = unique_content(), unique_content()
+
+        async def fail(*args, **kwargs) -> None:
+            raise RuntimeError("insert failed")
+
+        monkeypatch.setattr(SummaryLogic, "create_many", fail)
+        response = await ac.post(
+            f"{URL}upload",
+            files=[("files", ("0.md", first, "text/markdown")),
+                   ("files", ("1.md", second, "text/markdown"))],
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert await count_summaries() == 0
+        assert await get_blob(first) is None
+        assert await get_blob(second) is None
+        assert not blob_exists(first)
+        assert not blob_exists(second)
+        assert not staged_files()
@@ -0,0 +1,98 @@
+from uuid import uuid4
+
+from fastapi import status
+from httpx import AsyncClient
+
+from src.auth.models import User
+from tests.conftest import (
+    engine_test,  # не удалять engine_test, первый и последний тесты упадут
+    create_summary
+)
+
+
+class TestSummaryOwnership:
+    url = "api/v1/summary/"
+    update = {"name": "renamed", "is_public": True}
+
+    async def test_update_by_author(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Автор обновляет конспект, в ответе автор и изображения."""
+        user, headers = auth_verif_user
+        summary = await create_summary(user, with_image=True)
+        response = await ac.patch(
+            f"{self.url}{summary.id}", json=self.update, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["name"] == "renamed.md"
+        assert data["author"]["username"] == user.username
+        assert len(data["images"]) == 1
+
+    async def test_update_not_author(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Чужой конспект не обновляется."""
+        user, _ = auth_verif_user
+        _, headers = auth_superuser
+        summary = await create_summary(user, with_image=True)
+        response = await ac.patch(
+            f"{self.url}{summary.id}", json=self.update, headers=headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    async def test_update_not_found(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict]
+    ) -> None:
+        """Несуществующий конспект - 404."""
+        _, headers = auth_verif_user
+        response = await ac.patch(
+            f"{self.url}{uuid4()}", json=self.update, headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_delete_not_author(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Чужой конспект не удаляется, свой удаляется."""
+        user, headers = auth_verif_user
+        _, other_headers = auth_superuser
+        summary = await create_summary(user, with_image=True)
+        url = f"{self.url}{summary.id}"
+        response = await ac.delete(url, headers=other_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_delete_image_not_author(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """Чужое изображение не удаляется, свое удаляется."""
+        user, headers = auth_verif_user
+        _, other_headers = auth_superuser
+        summary = await create_summary(user, with_image=True)
+        image = summary.images[0]
+        url = f"{self.url}{summary.id}/images/{image.id}"
+        response = await ac.delete(url, headers=other_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        response = await ac.delete(url, headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_add_images_not_author(
+            self, ac: AsyncClient, auth_verif_user: tuple[User, dict],
+            auth_superuser: tuple[User, dict]
+    ) -> None:
+        """В чужой конспект изображения не добавляются."""
+        user, _ = auth_verif_user
+        _, headers = auth_superuser
+        summary = await create_summary(user, with_image=True)
+        response = await ac.post(
+            f"{self.url}{summary.id}/images",
+            files={"files": ("image.png", b"png", "image/png")},
+            headers=headers
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN